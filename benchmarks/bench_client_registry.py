@@ -0,0 +1,117 @@
+"""First-turn vs. steady-state TTFT with per-Game clients, the pooled registry, and warm-up.
+
+A local HTTPS stand-in serves a streamed OpenAI tool call. New connections pay
+HANDSHAKE_DELAY (emulating TCP + TLS round trips to a remote provider) on top
+of the real local TLS handshake; reused keep-alive connections do not.
+
+Run from the repo root: python -m benchmarks.bench_client_registry
+"""
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import config
+from utils import llm_utils
+
+HANDSHAKE_DELAY = 0.15
+TURNS = 5
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        time.sleep(HANDSHAKE_DELAY)
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        arguments = json.dumps({"narrative": "You look around.", "events": [], "scene": None,
+                                "movement": "NONE", "rule_updates": None})
+        chunk = {"id": "1", "object": "chat.completion.chunk", "created": 0, "model": "stand-in",
+                 "choices": [{"index": 0, "delta": {"tool_calls": [
+                     {"index": 0, "function": {"arguments": arguments}}]}, "finish_reason": None}]}
+        body = f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_https_server(tmpdir):
+    cert, key = os.path.join(tmpdir, "cert.pem"), os.path.join(tmpdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    server = ThreadingHTTPServer(("localhost", 0), StandInHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, cert
+
+
+def ttft(client):
+    start = time.perf_counter()
+    stream = llm_utils.create_openai_message_stream(
+        client, [{"role": "user", "content": "look around"}],
+        tools=config.GAME_TOOLS, tools_choice=config.GAME_TOOL_CHOICE)
+    next(stream)
+    elapsed = time.perf_counter() - start
+    for _ in stream:
+        pass
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server, cert = start_https_server(tmpdir)
+        env = {
+            "OPENAI_API_KEY": "stand-in",
+            "OPENAI_BASE_URL": f"https://localhost:{server.server_address[1]}/v1",
+            "SSL_CERT_FILE": cert,
+        }
+        with patch.dict(os.environ, env):
+            results = []
+
+            def record(label, new_client):
+                results.append((label, [ttft(new_client()) for _ in range(TURNS)]))
+
+            # Previous behaviour: every Game builds its own SDK client
+            record("initialize_client per Game", lambda: llm_utils.initialize_client("openai"))
+
+            llm_utils.close_clients()
+            record("registry, no warm-up", lambda: llm_utils.get_client("openai"))
+
+            llm_utils.close_clients()
+            llm_utils.warm_up_clients(["openai"], background=False)
+            record("registry + warm-up", lambda: llm_utils.get_client("openai"))
+
+            llm_utils.close_clients()
+        server.shutdown()
+
+    for label, times in results:
+        steady = sum(times[1:]) / (len(times) - 1)
+        print(f"{label:<28} first turn {times[0] * 1000:7.1f} ms   steady {steady * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
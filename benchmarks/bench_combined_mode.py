@@ -0,0 +1,190 @@
+"""A/B latency and token comparison: two LLM calls per turn vs. the combined tool.
+
+Replays recorded tool-call streams (benchmarks/fixtures/turn_streams.json) through
+create_openai_message_stream with the recorded delta timing, for:
+  two-call      game_output, then visual_output once the engine message is complete
+  pipelined     visual_output started when the narrative closes (PIPELINED_TURNS)
+  combined      one game_visual_output call (COMBINED_ENGINE_VISUALS)
+
+The checked-in fixture is a synthetic placeholder ("synthetic": true), so its timings
+and token counts are illustrative and the output says so; --record replaces it with
+real captures.
+
+Run from the repo root:
+  python -m benchmarks.bench_combined_mode [--speed 10]
+  python -m benchmarks.bench_combined_mode --record   # capture fixtures from the real API
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import config
+from utils.context_utils import build_engine_context
+from utils.llm_utils import create_openai_message_stream
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "turn_streams.json")
+
+SAMPLE_HISTORY = [{"role": "user", "content": "look around"},
+                  {"role": "assistant", "content": "```html\n<p>A heavy oak door stands before you.</p>\n```"}]
+SAMPLE_SVG = "<svg width='400' height='300'><rect width='100%' height='100%' fill='#5A5A5A'/><rect x='150' y='60' width='100' height='200' fill='#8B5A2B'/></svg>"
+SAMPLE_DESCRIPTION = "A torch-lit stone corridor ending at a heavy oak door bound with iron."
+SAMPLE_ACTION = "open the door"
+
+
+def engine_request(system_prompt):
+    return build_engine_context(system_prompt, {}, SAMPLE_SVG, SAMPLE_DESCRIPTION, ["N", "S", "E", "W"],
+                                [], SAMPLE_HISTORY, SAMPLE_ACTION, config.ENGINE_CONTEXT_TOKEN_BUDGET)
+
+
+def visual_request(narrative):
+    content = (f"Previous Action: {SAMPLE_ACTION}\nResult: {narrative}\n"
+               f"{config.SCENE_SVG_INPUT_NAME}: {SAMPLE_SVG}\nScene description: {SAMPLE_DESCRIPTION}\n")
+    return config.SVG_GENERATION_SYSTEM_PROMPT, [{"role": "user", "content": content}]
+
+
+class ReplayClient:
+    """Stands in for openai.Client, replaying the fixture for whichever tool is requested."""
+
+    def __init__(self, calls, speed):
+        self.calls = calls
+        self.speed = speed
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, tools, **kwargs):
+        return self._stream(self.calls[tools[0]["function"]["name"]])
+
+    def _stream(self, call):
+        start = time.perf_counter()
+        for offset, text in call["deltas"]:
+            delay = offset / self.speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            function = SimpleNamespace(arguments=text)
+            delta = SimpleNamespace(tool_calls=[SimpleNamespace(function=function)])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        usage = call["usage"]
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(
+            prompt_tokens=usage["input_tokens"], completion_tokens=usage["output_tokens"],
+            prompt_tokens_details=SimpleNamespace(cached_tokens=usage["cached_input_tokens"])))
+
+
+def final_output(stream):
+    for chunk in stream:
+        if isinstance(chunk, dict):
+            return chunk
+
+
+def run_two_call(client, pipelined):
+    usages = []
+    prefetch = {}
+
+    def visuals(narrative):
+        system_prompt, messages = visual_request(narrative)
+        prefetch["output"] = final_output(create_openai_message_stream(
+            client, messages, system_prompt, config.VISUAL_TOOLS, config.VISUAL_TOOL_CHOICE,
+            usage_callback=usages.append))
+
+    def start_prefetch(narrative):
+        prefetch["thread"] = threading.Thread(target=visuals, args=(narrative,))
+        prefetch["thread"].start()
+
+    system_blocks, messages, _ = engine_request(config.GAME_ENGINE_SYSTEM_PROMPT)
+    game_output = final_output(create_openai_message_stream(
+        client, messages, system_blocks, config.GAME_TOOLS, config.GAME_TOOL_CHOICE,
+        usage_callback=usages.append, narrative_callback=start_prefetch if pipelined else None))
+    if pipelined:
+        prefetch["thread"].join()
+    else:
+        visuals(game_output["narrative"])
+    return usages
+
+
+def run_combined(client):
+    usages = []
+    system_blocks, messages, _ = engine_request(config.COMBINED_ENGINE_SYSTEM_PROMPT)
+    output = final_output(create_openai_message_stream(
+        client, messages, system_blocks, config.COMBINED_GAME_TOOLS, config.COMBINED_TOOL_CHOICE,
+        usage_callback=usages.append))
+    assert output.get("visuals"), "combined output is missing the visual fields"
+    return usages
+
+
+def replay(speed):
+    with open(FIXTURES) as f:
+        fixture = json.load(f)
+    client = ReplayClient(fixture["calls"], speed)
+
+    synthetic = fixture.get("synthetic", False)
+    if synthetic:
+        print("SYNTHETIC FIXTURE: not measured. Timings and token counts below come from a")
+        print("hand-made placeholder; run with --record against the API for real numbers.\n")
+    else:
+        print(f"{fixture.get('note', 'Recorded fixture')}\n")
+    suffix = " (synthetic)" if synthetic else ""
+    print(f"{'mode':<11} {'calls':>5} {'turn s':>7} {'input':>6} {'cached':>6} {'output':>6}{suffix}")
+    for label, run in (("two-call", lambda: run_two_call(client, pipelined=False)),
+                       ("pipelined", lambda: run_two_call(client, pipelined=True)),
+                       ("combined", lambda: run_combined(client))):
+        start = time.perf_counter()
+        usages = run()
+        elapsed = (time.perf_counter() - start) * speed
+        totals = {key: sum(u[key] for u in usages) for key in ("input_tokens", "cached_input_tokens", "output_tokens")}
+        print(f"{label:<11} {len(usages):>5} {elapsed:>7.2f} {totals['input_tokens']:>6} "
+              f"{totals['cached_input_tokens']:>6} {totals['output_tokens']:>6}")
+
+
+class RecordingClient:
+    """Wraps a real openai.Client and keeps every streamed tool delta with its arrival time."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, tools, **kwargs):
+        return self._record(tools[0]["function"]["name"], self.client.chat.completions.create(tools=tools, **kwargs))
+
+    def _record(self, name, stream):
+        start = time.perf_counter()
+        call = self.calls[name] = {"deltas": [], "usage": None}
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.tool_calls:
+                arguments = chunk.choices[0].delta.tool_calls[0].function.arguments
+                if arguments:
+                    call["deltas"].append([round(time.perf_counter() - start, 4), arguments])
+            if getattr(chunk, "usage", None):
+                details = chunk.usage.prompt_tokens_details
+                call["usage"] = {"input_tokens": chunk.usage.prompt_tokens,
+                                 "cached_input_tokens": (details.cached_tokens or 0) if details else 0,
+                                 "cache_write_tokens": 0,
+                                 "output_tokens": chunk.usage.completion_tokens}
+            yield chunk
+
+
+def record():
+    from utils.llm_utils import get_client
+
+    client = RecordingClient(get_client("openai"))
+    run_two_call(client, pipelined=False)
+    run_combined(client)
+    with open(FIXTURES, "w") as f:
+        json.dump({"synthetic": False, "note": f"Recorded with {config.OPENAI_DEFAULT_MODEL}", "calls": client.calls}, f)
+    print(f"Recorded {', '.join(client.calls)} to {FIXTURES}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--speed", type=float, default=10.0, help="replay this many times faster than recorded")
+    parser.add_argument("--record", action="store_true", help="capture new fixtures from the OpenAI API")
+    args = parser.parse_args()
+    if args.record:
+        record()
+    else:
+        replay(args.speed)
+
+
+if __name__ == "__main__":
+    main()
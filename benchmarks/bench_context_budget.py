@@ -0,0 +1,77 @@
+"""Engine prompt size over a 500-turn synthetic session, unbounded vs. budgeted.
+
+The unbounded column reproduces the previous prompt: every rule, the full SVG,
+the last five events and a chat history that was never actually truncated.
+
+Run from the repo root: python -m benchmarks.bench_context_budget
+"""
+import json
+import random
+import time
+
+import config
+from utils.context_utils import build_engine_context, estimate_tokens
+from utils.chat_history import ChatHistory
+
+TURNS = 500
+REPORT_AT = {1, 10, 50, 100, 250, 500}
+
+
+def synthetic_svg(rng):
+    shapes = "".join(
+        f"<rect x='{rng.randint(0, 400)}' y='{rng.randint(0, 300)}' width='40' height='30' fill='#{rng.randint(0, 0xFFFFFF):06X}'/>"
+        for _ in range(40)
+    )
+    return f"<svg width='400' height='300' xmlns='http://www.w3.org/2000/svg'>{shapes}</svg>"
+
+
+def unbounded_tokens(rules, events, svg, description, history, action):
+    context = (
+        f"Current scene SVG: {svg}\n"
+        f"Current scene description: {description}\n"
+        f"Available directions: N, S, E, W\n"
+        f"Current world rules: {json.dumps(rules)}\n"
+        f"Recent events: {json.dumps(events[-5:])}\n"
+        f"Player action: {action}\n"
+    )
+    messages = history + [{"role": "assistant", "content": context}, {"role": "user", "content": action}]
+    return estimate_tokens(config.GAME_ENGINE_SYSTEM_PROMPT) + sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def main():
+    rng = random.Random(7)
+    rules, events, unbounded_history, history = {}, [], [], ChatHistory()
+    svg = synthetic_svg(rng)
+    description = "A narrow cave passage lit by glowing moss. " * 12
+    narrative = "```html\n<p>" + "You edge forward as water drips from the ceiling. " * 8 + "</p>\n```"
+
+    print(f"{'turn':>5} {'unbounded':>10} {'budgeted':>9} {'assemble ms':>12}")
+    for turn in range(1, TURNS + 1):
+        action = f"Turn {turn}: inspect the moss and move deeper"
+        if turn % 5 == 0:
+            rules[f"Rule {turn}"] = "Glowing moss brightens when touched by running water. " * 3
+        if turn % 10 == 0:
+            svg = synthetic_svg(rng)
+
+        unbounded_history += [{"role": "user", "content": action}]
+        history.append("user", action)
+
+        start = time.perf_counter()
+        system_blocks, messages, tokens = build_engine_context(
+            config.GAME_ENGINE_SYSTEM_PROMPT, rules, svg, description, ["N", "S", "E", "W"],
+            events[-config.ENGINE_RECENT_EVENTS:], history.messages(exclude_last=True), action, config.ENGINE_CONTEXT_TOKEN_BUDGET)
+        elapsed = time.perf_counter() - start
+
+        if turn in REPORT_AT:
+            before = unbounded_tokens(rules, events, svg, description, unbounded_history[:-1], action)
+            after = sum(estimate_tokens(b["text"]) for b in system_blocks) + \
+                sum(estimate_tokens(m["content"]) for m in messages)
+            print(f"{turn:>5} {before:>10} {after:>9} {elapsed * 1000:>12.2f}")
+
+        events += [f"Turn {turn}: moss glowed", f"Turn {turn}: player advanced"]
+        unbounded_history += [{"role": "assistant", "content": narrative}]
+        history.append("assistant", narrative)
+
+
+if __name__ == "__main__":
+    main()
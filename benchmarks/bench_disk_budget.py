@@ -0,0 +1,64 @@
+"""Disk budget scan and eviction cost on a large media directory.
+
+Fills a temporary directory with --files small clips of random ages, then reports the
+worst single scan step (what the background thread holds between yields), the time of
+a full pass, and the eviction that brings the directory down to half its size.
+
+Run from the repo root:
+  python -m benchmarks.bench_disk_budget [--files 50000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+
+import config
+from utils.disk_budget import DiskBudget
+
+FILE_BYTES = 2048
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        now = time.time()
+        for i in range(args.files):
+            path = os.path.join(directory, f"video_{i}.mp4")
+            with open(path, "wb") as f:
+                f.write(b"\0" * FILE_BYTES)
+            mtime = now - rng.uniform(0, 30 * 86400)
+            os.utime(path, (mtime, mtime))
+
+        budget = DiskBudget([directory], max_bytes=args.files * FILE_BYTES // 2, max_age=None)
+        steps = []
+        start = time.perf_counter()
+        while True:
+            step = time.perf_counter()
+            done = budget.scan_step()
+            steps.append(time.perf_counter() - step)
+            if done:
+                break
+        full_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            freed = budget.enforce()
+        enforce = time.perf_counter() - start
+        remaining = len(os.listdir(directory))
+
+    print(f"{'files':>7} {'steps':>6} {'worst step ms':>14} {'full pass ms':>13} {'enforce ms':>11} "
+          f"{'freed MB':>9} {'files left':>11}")
+    print(f"{args.files:>7} {len(steps):>6} {max(steps) * 1000:>14.2f} {full_pass * 1000:>13.1f} "
+          f"{enforce * 1000:>11.1f} {freed / 1024 / 1024:>9.1f} {remaining:>11}")
+    print(f"(scan batch {config.DISK_SCAN_BATCH} entries)")
+
+
+if __name__ == "__main__":
+    main()
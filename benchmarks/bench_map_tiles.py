@@ -0,0 +1,76 @@
+"""World map tile pyramid: render, cached, after one update and after a restart.
+
+Explores a --tiles square world, then requests every pyramid tile covering it at each
+zoom level: cold (rendered), again (served from memory), after one update_location
+(only the covering tiles are rendered again) and with a fresh MapTiles over the same
+cache directory (cells hashed, PNGs reused from disk).
+
+Run from the repo root:
+  python -m benchmarks.bench_map_tiles [--tiles 250000]
+"""
+import argparse
+import math
+import random
+import tempfile
+import time
+
+import config
+from src.map_tiles import MapTiles
+from src.world_map import WorldMap
+
+TERRAIN = ["#7A6A53", "#3B5E2B", "#2A4D69", "#C2B280", "#5A5A5A"]
+
+
+def pyramid(tiles, side):
+    """Every (z, x, y) covering cells [0, side) x [0, side)."""
+    keys = []
+    for z in range(tiles.max_zoom + 1):
+        span = tiles.span(z)
+        last = (side - 1) // span
+        keys += [(z, x, y) for x in range(last + 1) for y in range(-last - 1, 0)]
+    return keys
+
+
+def request_all(tiles, keys):
+    start = time.perf_counter()
+    for key in keys:
+        tiles.tile(*key)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiles", type=int, default=250_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    side = math.isqrt(args.tiles)
+    world_map = WorldMap()
+    for x in range(side):
+        for y in range(side):
+            world_map.update_location(x, y, None, None, TERRAIN[(x // 8 + y // 8 + (rng.random() < 0.1)) % len(TERRAIN)])
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        tiles = MapTiles(world_map, cache_dir=cache_dir)
+        keys = pyramid(tiles, side)
+        cold = request_all(tiles, keys)
+        cold_renders = tiles.renders
+        warm = request_all(tiles, keys)
+
+        world_map.update_location(side // 2, side // 2, None, None, "#FF0000")
+        before = tiles.renders
+        updated = request_all(tiles, keys)
+        rerendered = tiles.renders - before
+
+        restarted = MapTiles(world_map, cache_dir=cache_dir)
+        restart = request_all(restarted, keys)
+
+    print(f"{side * side:,} explored cells, {len(keys)} pyramid tiles over zoom 0-{config.MAP_TILE_MAX_ZOOM}")
+    print(f"{'pass':<16} {'total ms':>9} {'per tile ms':>12} {'rendered':>9}")
+    for label, total, rendered in (("cold", cold, cold_renders), ("cached", warm, 0),
+                                   ("after 1 update", updated, rerendered), ("after restart", restart, restarted.renders)):
+        print(f"{label:<16} {total:>9.1f} {total / len(keys):>12.3f} {rendered:>9}")
+
+
+if __name__ == "__main__":
+    main()
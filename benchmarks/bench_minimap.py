@@ -0,0 +1,86 @@
+"""/minimap request cost: the old recursive DFS vs. the cached Minimap service.
+
+Builds a --side x --side explored world with a handful of terrain colors, then times
+one minimap request three ways: the DFS get_minimap_data used to run on every call (the
+player stands inside the explored area, so it creates no tiles here), the Minimap service
+right after a move (encode), and a poll of an unchanged map (cache hit). Also compares the response bytes.
+
+Run from the repo root:
+  python -m benchmarks.bench_minimap [--side 200]
+"""
+import argparse
+import json
+import random
+import time
+
+import config
+from src.minimap import Minimap
+from src.world_map import WorldMap
+
+TERRAIN = ["#7A6A53", "#3B5E2B", "#2A4D69", "#C2B280", "#5A5A5A", "#FFFFFF"]
+
+
+def dfs_minimap(world_map):
+    """The previous Game.get_minimap_data, on a map where lookups created tiles."""
+    minimap_data = []
+    visited_positions = set()
+
+    def dfs(x, y, distance):
+        if distance <= 0:
+            return
+        visited_positions.add((x, y))
+        minimap_data.append({'x': x, 'y': y, 'color': world_map.get_or_create_location(x, y)["color"]})
+        for direction in world_map.get_available_directions():
+            dx, dy = {"N": (0, 1), "S": (0, -1), "E": (1, 0), "W": (-1, 0)}[direction]
+            new_x, new_y = x + dx, y + dy
+            if (new_x, new_y) not in visited_positions:
+                dfs(new_x, new_y, distance - 1)
+
+    start_x, start_y = world_map.current_position
+    dfs(start_x, start_y, 5)
+    return {'minimap': minimap_data, 'current_position': {'x': start_x, 'y': start_y}}
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--side", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    world_map = WorldMap()
+    for x in range(args.side):
+        for y in range(args.side):
+            # Patches of terrain, as the engine tends to paint neighbouring tiles alike
+            world_map.update_location(x, y, None, None, TERRAIN[(x // 8 + y // 8 + (rng.random() < 0.1)) % len(TERRAIN)])
+    world_map.current_position = (args.side // 2, args.side // 2)
+    minimap = Minimap(world_map)
+    minimap.encoded()  # builds the color grid once, on the first request after loading
+
+    dfs_us, dfs_data = timed(lambda: dfs_minimap(world_map), 50)
+    dfs_bytes = len(json.dumps(dfs_data))
+
+    def after_move():
+        world_map.move("N")
+        world_map.move("S")
+        return minimap.encoded()
+
+    encode_us, (body, _) = timed(after_move, 200)
+    hit_us, _ = timed(minimap.encoded, 10_000)
+    cells = 2 * config.MINIMAP_RADIUS * (config.MINIMAP_RADIUS + 1) + 1  # the diamond the window shows
+
+    print(f"{'request':<22} {'us':>9} {'bytes':>7} {'cells':>6}")
+    print(f"{'DFS (old)':<22} {dfs_us:>9.1f} {dfs_bytes:>7} {len(dfs_data['minimap']):>6}")
+    print(f"{'service, after move':<22} {encode_us:>9.1f} {len(body):>7} {cells:>6}")
+    print(f"{'service, cached poll':<22} {hit_us:>9.2f} {len(body):>7} {cells:>6}")
+    print(f"(a poll with a matching If-None-Match gets a 304 with no body; {minimap.stats()})")
+
+
+if __name__ == "__main__":
+    main()
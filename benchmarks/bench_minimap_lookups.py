@@ -0,0 +1,76 @@
+"""Minimap redraws vs. map size and save time: creating lookups vs. read-only ones.
+
+Walks --turns turns in a straight line, exploring one tile per turn, and after each
+turn redraws both minimaps (the GUI's 15x15 grid and the web minimap's radius-4
+diamond) and saves the map. "creating" reads colors through get_or_create_location,
+which is what get_location_color used to do, so every unexplored cell looked at became
+a stored tile. "read-only" uses get_region. Reports tiles stored per explored tile, the
+saved world_map.json size and the save time over the last turns.
+
+Run from the repo root:
+  python -m benchmarks.bench_minimap_lookups [--turns 200 1000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.world_map import WorldMap
+
+GUI_RANGE = 7
+WEB_RADIUS = 4
+
+
+def creating_minimaps(world_map):
+    cx, cy = world_map.current_position
+    for x in range(cx - GUI_RANGE, cx + GUI_RANGE + 1):
+        for y in range(cy - GUI_RANGE, cy + GUI_RANGE + 1):
+            world_map.get_or_create_location(x, y)["color"]
+    for x in range(cx - WEB_RADIUS, cx + WEB_RADIUS + 1):
+        for y in range(cy - WEB_RADIUS, cy + WEB_RADIUS + 1):
+            if abs(x - cx) + abs(y - cy) <= WEB_RADIUS:
+                world_map.get_or_create_location(x, y)["color"]
+
+
+def read_only_minimaps(world_map):
+    cx, cy = world_map.current_position
+    world_map.get_region(cx - GUI_RANGE, cy - GUI_RANGE, cx + GUI_RANGE + 1, cy + GUI_RANGE + 1)
+    world_map.get_region(cx - WEB_RADIUS, cy - WEB_RADIUS, cx + WEB_RADIUS + 1, cy + WEB_RADIUS + 1)
+
+
+def play(turns, minimaps):
+    world_map = WorldMap()
+    world_map.reset()
+    saves = []
+    for turn in range(turns):
+        world_map.move("E")
+        world_map.update_location(*world_map.current_position, "<svg/>", f"Room {turn}", "#7A6A53")
+        minimaps(world_map)
+        start = time.perf_counter()
+        world_map.save_state()
+        saves.append(time.perf_counter() - start)
+    tail = saves[-max(turns // 10, 1):]
+    return len(world_map.map), os.path.getsize("world_map.json"), sum(tail) / len(tail) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[200, 1000])
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            print(f"{'turns':>6} {'lookups':>10} {'tiles':>7} {'tiles/explored':>15} {'json KB':>8} {'save ms':>8}")
+            for turns in args.turns:
+                explored = turns + 1
+                for label, minimaps in (("creating", creating_minimaps), ("read-only", read_only_minimaps)):
+                    tiles, size, save_ms = play(turns, minimaps)
+                    print(f"{turns:>6} {label:>10} {tiles:>7} {tiles / explored:>15.1f} {size / 1024:>8.1f} {save_ms:>8.2f}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Time per stream for narrative extraction as tool output grows.
+
+Compares the previous approach (append every delta and re-run the start/end
+regexes over the whole buffer) with JsonStringFieldExtractor.
+
+Run from the repo root: python -m benchmarks.bench_narrative_stream
+"""
+import json
+import re
+import time
+
+import config
+from utils.json_stream import JsonStringFieldExtractor
+
+NARRATIVE_START_PATTERN = f'"{config.NARRATIVE_PARAMETER_NAME}"\\s*:\\s*"'
+NARRATIVE_END_PATTERN = r'(?<!\\)("[(,\s*\")(\s*\})])'
+
+SIZES_KB = [1, 5, 10, 25, 50]
+DELTA_SIZE = 8  # roughly what providers send per input_json_delta
+REPEATS = 5
+
+
+def build_deltas(size_kb):
+    """A game_output payload whose narrative fills most of size_kb, split into deltas."""
+    sentence = 'The torch flickers, "casting" long\\ shadows across the wet stone.\n'
+    narrative = (sentence * (size_kb * 1024 // len(sentence) + 1))[:size_kb * 1024 - 200]
+    payload = json.dumps({
+        "narrative": narrative,
+        "events": ["Player lit a torch"],
+        "scene": None,
+        "movement": "NONE",
+        "rule_updates": None,
+    })
+    return [payload[i:i + DELTA_SIZE] for i in range(0, len(payload), DELTA_SIZE)]
+
+
+def rescan_stream(deltas):
+    """The pre-extractor loop from create_*_message_stream."""
+    tool_text = ""
+    in_narrative = False
+    out = []
+    for text in deltas:
+        tool_text += text
+        if not in_narrative:
+            start_match = re.search(NARRATIVE_START_PATTERN, tool_text)
+            if start_match:
+                in_narrative = True
+                tool_text = tool_text[start_match.end():]
+                out.append(tool_text)
+        else:
+            end_match = re.search(NARRATIVE_END_PATTERN, tool_text)
+            if end_match:
+                tool_text = tool_text[:end_match.start()]
+                if text == tool_text[-len(text) - 1:]:
+                    out.append(text)
+                in_narrative = False
+            else:
+                out.append(text)
+    return out
+
+
+def extractor_stream(deltas):
+    extractor = JsonStringFieldExtractor(config.NARRATIVE_PARAMETER_NAME)
+    out = []
+    for text in deltas:
+        decoded = extractor.feed(text)
+        if decoded:
+            out.append(decoded)
+    return out
+
+
+def best_of(func, deltas):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(deltas)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f"{'size':>6} {'deltas':>7} {'rescan ms':>10} {'extractor ms':>13} {'speedup':>8}")
+    for size_kb in SIZES_KB:
+        deltas = build_deltas(size_kb)
+        rescan = best_of(rescan_stream, deltas)
+        extractor = best_of(extractor_stream, deltas)
+        print(f"{size_kb:>4}KB {len(deltas):>7} {rescan * 1000:>10.2f} "
+              f"{extractor * 1000:>13.2f} {rescan / extractor:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Time a turn spends on saving: inline StateManager commits vs. the background writer.
+
+Each simulated turn saves at the end of the turn, then a video callback saves again
+shortly after, like Game does. The map is a JSON WorldMap with --tiles tiles, so every
+save rewrites world_map.json. "caller ms" is the time the request/video thread is
+blocked on the save; with the writer it only enqueues. The writer columns report how
+far the disk trails the game and how many saves were coalesced or dropped from the
+full queue (both superseded by a later save).
+
+Run from the repo root:
+  python -m benchmarks.bench_persistence_writer [--turns 100] [--tiles 20000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_state_commit import CommitWorldState, simulate_turn, turn_image, turn_mutations
+from src.world_map import WorldMap
+from utils.chat_history import ChatHistory
+from utils.persistence import PersistenceWriter
+from utils.state_manager import StateManager
+
+
+def build_map(tiles):
+    world_map = WorldMap()
+    side = int(tiles ** 0.5) + 1
+    for i in range(tiles):
+        world_map.update_location(i % side, i // side, None, f"Tile {i} " * 10, "#336699")
+    return world_map
+
+
+def run(turns, tiles, use_writer):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            world_map, world_state, history = build_map(tiles), CommitWorldState(directory), ChatHistory()
+            manager = StateManager(saves_dir="saves")
+            writer = PersistenceWriter(manager.save_game_state) if use_writer else None
+            save = writer.request if writer else manager.save_game_state
+            blocked = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for turn in range(1, turns + 1):
+                    simulate_turn(turn, world_map, history)
+                    world_state.mutate(turn_mutations(turn))
+                    image, _ = turn_image(turn)
+                    for _ in range(2):  # end of turn, then the video callback
+                        started = time.perf_counter()
+                        save(world_map, world_state, ChatHistory(history.to_list()), None, image)
+                        blocked.append((time.perf_counter() - started) * 1000)
+                if writer:
+                    writer.close()
+                total = time.perf_counter() - start
+            return blocked, total, manager.commits, writer.stats() if writer else None
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--tiles", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'caller ms p50':>14} {'caller ms max':>14} {'total s':>8} {'commits':>8} "
+          f"{'coalesced':>10} {'dropped':>8} {'lag ms mean':>12} {'lag ms max':>11}")
+    for mode in ("inline", "writer"):
+        blocked, total, commits, stats = run(args.turns, args.tiles, mode == "writer")
+        stats = stats or {"coalesced": 0, "dropped": 0, "mean_lag_ms": 0.0, "max_lag_ms": 0.0}
+        print(f"{mode:>8} {statistics.median(blocked):>14.3f} {max(blocked):>14.3f} {total:>8.2f} {commits:>8} "
+              f"{stats['coalesced']:>10} {stats['dropped']:>8} {stats['mean_lag_ms']:>12.1f} {stats['max_lag_ms']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
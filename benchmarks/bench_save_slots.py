@@ -0,0 +1,92 @@
+"""Cost of checkpointing every turn into a save slot, by world size.
+
+Builds a JSON WorldMap of --tiles tiles, then plays --turns turns that each move, update
+a tile, add events and chat messages, and checkpoint. Reports the mean and max bytes
+and milliseconds per checkpoint (capture + write), split into deltas and the periodic
+full snapshots, the time to load the latest checkpoint, and the disk used by a branch.
+
+Run from the repo root:
+  python -m benchmarks.bench_save_slots [--turns 100] [--snapshot-every 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_persistence_writer import build_map
+from benchmarks.bench_world_state_log import turn_mutations
+from utils.asset_store import AssetStore
+from utils.chat_history import ChatHistory
+from utils.save_slots import SaveSlots
+
+
+class BenchWorldState:
+    def __init__(self):
+        self.rules = {}
+        self.events = []
+        self.memory = {"summary": "", "folded": 0}
+
+    def snapshot(self):
+        return dict(self.rules), list(self.events), self.memory
+
+    def mutate(self, mutations):
+        for mutation in mutations:
+            if mutation[0] == "rule":
+                self.rules[mutation[1]] = mutation[2]
+            else:
+                self.events.append(mutation[1])
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def run(tiles, turns, snapshot_every):
+    with tempfile.TemporaryDirectory() as directory:
+        slots = SaveSlots(os.path.join(directory, "slots"), snapshot_every=snapshot_every,
+                          asset_store=AssetStore(os.path.join(directory, "assets")))
+        world_map, world_state, history = build_map(tiles), BenchWorldState(), ChatHistory()
+        costs = {"full": [], "delta": []}
+        for turn in range(1, turns + 1):
+            world_map.move("N")
+            world_map.update_location(*world_map.current_position, None, f"Scene for turn {turn} " * 8, "#556677")
+            world_state.mutate(turn_mutations(turn))
+            history.append("user", f"action {turn}")
+            history.append("assistant", f"Narrative for turn {turn}. " * 10)
+            start = time.perf_counter()
+            checkpoint_id = slots.checkpoint(world_map, world_state, history, None, None)
+            written = slots.flush()
+            costs[slots.index[checkpoint_id]["kind"]].append((written, (time.perf_counter() - start) * 1000))
+
+        start = time.perf_counter()
+        state = SaveSlots(os.path.join(directory, "slots"), snapshot_every=snapshot_every,
+                          asset_store=slots.assets).load()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        before = directory_size(directory)
+        slots.branch("branch", slots.history()[turns // 2]["id"])
+        branch_bytes = directory_size(directory) - before
+        return costs, load_ms, state["replayed"], branch_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'tiles':>7} {'delta KB':>9} {'delta ms':>9} {'delta max ms':>13} {'full KB':>9} {'full ms':>9} "
+          f"{'load ms':>8} {'replayed':>9} {'branch B':>9}")
+    for tiles in (1_000, 10_000, 100_000):
+        costs, load_ms, replayed, branch_bytes = run(tiles, args.turns, args.snapshot_every)
+
+        def mean(kind, i):
+            return sum(cost[i] for cost in costs[kind]) / max(len(costs[kind]), 1)
+
+        print(f"{tiles:>7} {mean('delta', 0) / 1024:>9.1f} {mean('delta', 1):>9.2f} "
+              f"{max(cost[1] for cost in costs['delta']):>13.2f} {mean('full', 0) / 1024:>9.1f} "
+              f"{mean('full', 1):>9.1f} {load_ms:>8.1f} {replayed:>9} {branch_bytes:>9}")
+
+
+if __name__ == "__main__":
+    main()
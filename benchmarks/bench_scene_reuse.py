@@ -0,0 +1,106 @@
+"""Backtracking walk against the local fake providers, with and without scene reuse.
+
+The player walks --depth tiles north and back south, --laps times, through tiles with
+scenes of their own, so after the first lap every turn is a revisit of an unchanged
+scene. Each run counts the visual LLM, Stability and Runway calls the walk cost and the
+mean update_game_state time (the part of a turn after the engine output), with pipelined
+turns on and off: the pipelined visual call starts before the engine has said whether
+the player moves, so on a revisit the request is already out and is cancelled rather
+than avoided ("cancelled" counts those). Videos are awaited after every turn, so a
+revisit always finds its tile's video finished.
+
+Run from the repo root:
+  python -m benchmarks.bench_scene_reuse [--depth 4] [--laps 3] [--realistic]
+"""
+import argparse
+import copy
+import os
+import tempfile
+import time
+
+# First: points config at the fake providers before anything imports it
+from benchmarks.bench_turn_loop import wait_for_videos
+
+import config  # noqa: E402
+from utils.fake_providers import (DEFAULT_TOOL_OUTPUTS, REALISTIC_LATENCY,  # noqa: E402
+                                  start_fake_providers, stop_fake_providers)
+
+
+def walk(depth, laps):
+    return (["N"] * depth + ["S"] * depth) * laps
+
+
+def run(providers, moves, reuse, pipelined):
+    config.REUSE_SCENE_VISUALS = reuse
+    config.PIPELINED_TURNS = pipelined
+    requests = {name: provider.stats["requests"] for name, provider in providers.items()}
+    tasks = len(providers["runway"].tasks)
+    workdir = tempfile.mkdtemp(prefix="llm_world_bench_")
+    repo_root = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from src.game_structure import Game
+
+        game = Game()
+        update_times, reused, cancelled = [], 0, 0
+        for move in moves:
+            game_output = copy.deepcopy(DEFAULT_TOOL_OUTPUTS["game_output"])
+            game_output["movement"] = move
+            # Only sets the description of a tile entered for the first time
+            y = game.world_map.current_position[1] + (1 if move == "N" else -1)
+            game_output["scene"]["scene_description"] += f" Step {y} of the hall."
+            for provider in providers.values():
+                provider.payloads["game_output"] = game_output
+            for chunk in game.process_input(f"walk {move}"):
+                if isinstance(chunk, dict):
+                    start = time.perf_counter()
+                    game.update_game_state(chunk)
+                    update_times.append(time.perf_counter() - start)
+                    reused += game.turn_timing["visuals_reused"]
+                    cancelled += game.turn_timing.get("visual_prefetch_cancelled", False)
+                    break
+            wait_for_videos()
+        game.shutdown()
+    finally:
+        os.chdir(repo_root)
+
+    llm = providers[config.ENGINE_LLM_PROVIDER]
+    return {
+        "visual LLM": llm.stats["requests"] - requests[config.ENGINE_LLM_PROVIDER] - len(moves),
+        "stability": providers["stability"].stats["requests"] - requests["stability"],
+        "runway jobs": len(providers["runway"].tasks) - tasks,
+        "reused": reused,
+        "cancelled": cancelled,
+        "update ms": sum(update_times) / len(update_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--laps", type=int, default=3)
+    parser.add_argument("--realistic", action="store_true", help="use realistic provider latency")
+    args = parser.parse_args()
+
+    providers = start_fake_providers(latency=REALISTIC_LATENCY if args.realistic else None, seed=0)
+    config.LLM_RESPONSE_CACHE = False
+    config.WORLD_MEMORY = False
+    moves = walk(args.depth, args.laps)
+    try:
+        results = {(pipelined, reuse): run(providers, moves, reuse, pipelined)
+                   for pipelined in (False, True) for reuse in (False, True)}
+    finally:
+        stop_fake_providers(providers)
+
+    columns = list(results[False, True])
+    print(f"{len(moves)} turns, {args.depth} tiles north and back x{args.laps}")
+    print(f"{'':<22}" + "".join(f"{column:>13}" for column in columns))
+    for (pipelined, reuse), result in results.items():
+        label = f"{'pipelined' if pipelined else 'sequential'}, {'reuse' if reuse else 'regenerate'}"
+        print(f"{label:<22}" + "".join(
+            f"{result[column]:>13.1f}" if isinstance(result[column], float) else f"{result[column]:>13}"
+            for column in columns))
+
+
+if __name__ == "__main__":
+    main()
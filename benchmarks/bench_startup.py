@@ -0,0 +1,125 @@
+"""Cold start: importing src.game_structure plus Game(), against config.STARTUP_BUDGET.
+
+Writes a saved game (a map of --tiles tiles, events, chat history, an image and a
+video) into a temporary directory, then starts fresh interpreters in it. Each run
+reports the import time, the Game() time (which loads the save) and which heavy modules
+were imported by then. The "eager" row imports the heavy modules and opens the saved
+video with moviepy first, like startup did before they became lazy. Exits non-zero
+when the lazy median is over budget.
+
+Run from the repo root:
+  python -m benchmarks.bench_startup [--runs 5] [--tiles 2000]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import config
+
+HEAVY_MODULES = ["openai", "anthropic", "runwayml", "imgur_python", "moviepy.editor", "cairosvg", "PIL.Image", "numpy"]
+
+CHILD = """
+import json, sys, time
+eager = {eager}
+start = time.perf_counter()
+if eager:
+    for name in {heavy!r}:
+        try:
+            __import__(name)
+        except Exception:
+            pass
+import config
+config.PRELOAD_MODULES_ON_START = False
+config.LLM_WARM_UP_ON_START = False
+import src.game_structure as game_structure
+imported = time.perf_counter()
+game = game_structure.Game()
+if eager and game.current_video:
+    from moviepy.editor import VideoFileClip
+    with VideoFileClip(game.current_video) as clip:
+        clip.duration
+loaded = time.perf_counter()
+print(json.dumps({{"import": imported - start, "game": loaded - imported,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def write_save(directory, tiles):
+    from moviepy.editor import ColorClip
+    from PIL import Image
+
+    from src.world_map import WorldMap
+    from utils.asset_store import AssetStore
+    from utils.chat_history import ChatHistory
+    from utils.event_log import AppendLog
+    from utils.state_manager import StateManager
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        world_map = WorldMap()
+        for i in range(tiles):
+            world_map.update_location(i % 50, i // 50, "<svg/>", f"Tile {i} " * 10, "#336699")
+        log = AppendLog("world_state.json", "world_state.log")
+        log.compact({"rules": {"gravity": "normal"}, "events": [f"event {i}" for i in range(200)]})
+        history = ChatHistory()
+        for i in range(10):
+            history.append("user", f"action {i}")
+            history.append("assistant", f"narrative {i} " * 40)
+        os.makedirs("video_tmp", exist_ok=True)
+        video = os.path.join("video_tmp", "video_0.mp4")
+        ColorClip((320, 180), color=(40, 80, 120), duration=5).write_videofile(video, fps=24, logger=None)
+        manager = StateManager(asset_store=AssetStore())
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.save_game_state(world_map, _Loaded(), history, os.path.abspath(video),
+                                    Image.new("RGB", (768, 432), "gray"))
+    finally:
+        os.chdir(cwd)
+
+
+class _Loaded:
+    """World state already on disk."""
+
+    def save_state(self):
+        return 0
+
+
+def run(directory, eager):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    result = subprocess.run([sys.executable, "-c", CHILD.format(eager=eager, heavy=HEAVY_MODULES)],
+                            cwd=directory, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tiles", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_save(directory, args.tiles)
+        print(f"{'mode':>6} {'import ms':>10} {'Game() ms':>10} {'total ms':>9}  heavy modules loaded")
+        medians = {}
+        for mode in ("eager", "lazy"):
+            runs = [run(directory, mode == "eager") for _ in range(args.runs)]
+            totals = [r["import"] + r["game"] for r in runs]
+            medians[mode] = statistics.median(totals)
+            print(f"{mode:>6} {statistics.median(r['import'] for r in runs) * 1000:>10.1f} "
+                  f"{statistics.median(r['game'] for r in runs) * 1000:>10.1f} {medians[mode] * 1000:>9.1f}  "
+                  f"{', '.join(runs[-1]['heavy']) or '-'}")
+
+    verdict = "within" if medians["lazy"] <= config.STARTUP_BUDGET else "OVER"
+    print(f"\nlazy startup {medians['lazy'] * 1000:.0f} ms, {verdict} the {config.STARTUP_BUDGET * 1000:.0f} ms budget")
+    if medians["lazy"] > config.STARTUP_BUDGET:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Bytes written per turn: the old save sequence vs. one dirty-tracked commit.
+
+Each simulated turn moves the player every third turn, updates the tile, adds
+EVENTS_PER_TURN events and a user/assistant exchange, produces a new image, and then
+the video callback saves again with a new clip. The old sequence rewrites
+world_state.json per event, and each save rewrites the map, the world state, a PNG, the
+base64 image and the video copy. The new one stores the generated image in the asset
+store as ImageManager does, then runs StateManager's commits.
+
+Run from the repo root:
+  python -m benchmarks.bench_state_commit [--turns 200]
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from PIL import Image
+
+from benchmarks.bench_world_state_log import LogState, RewriteState, turn_mutations
+from src.world_map import WorldMap
+from utils.chat_history import ChatHistory
+from utils.state_manager import StateManager
+
+CHECKPOINTS = (1, 10, 50, 100, 200, 500)
+VIDEO_BYTES = 300_000
+
+
+class CommitWorldState(LogState):
+    """The append-log world state with mutation and save split, like WorldState."""
+
+    def mutate(self, mutations):
+        for mutation in mutations:
+            if mutation[0] == "rule":
+                self.rules[mutation[1]] = mutation[2]
+                self.log.append({"op": "rule", "name": mutation[1], "description": mutation[2]})
+            else:
+                self.events.append(mutation[1])
+                self.log.append({"op": "event", "description": mutation[1]})
+
+    def save_state(self):
+        before = self.log.bytes_written
+        self.log.flush()
+        if self.log.needs_compaction():
+            self.log.compact({"rules": self.rules, "events": self.events})
+        return self.log.bytes_written - before
+
+
+def turn_image(turn):
+    """A generated image as it arrives from the provider: JPEG bytes and the opened image."""
+    rng = random.Random(turn)
+    image = Image.new("RGB", (256, 144), tuple(rng.randrange(256) for _ in range(3)))
+    for _ in range(40):
+        x, y = rng.randrange(256), rng.randrange(144)
+        image.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + 24, y + 24))
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG")
+    return Image.open(io.BytesIO(buffered.getvalue())), buffered.getvalue()
+
+
+def old_save(directory, world_map, world_state, history, video, image):
+    """The save sequence before dirty tracking, returning bytes written."""
+    written = 0
+    data = json.dumps({"map": {str(k): tile.to_dict() for k, tile in world_map.map.items()},
+                       "current_position": world_map.current_position})
+    with open(os.path.join(directory, "world_map.json"), "w") as f:
+        f.write(data)
+    written += len(data)
+    before = world_state.bytes_written
+    world_state.save()
+    written += world_state.bytes_written - before
+    state = {"chat_history": history.to_list(), "video_path": None, "current_image": None}
+    if video:
+        saved = os.path.join(directory, f"video_state_{time.time_ns()}.mp4")
+        shutil.copy2(video, saved)
+        written += os.path.getsize(saved)
+        state["video_path"] = saved
+    if image:
+        path = os.path.join(directory, f"image_state_{time.time_ns()}.png")
+        image.save(path)
+        written += os.path.getsize(path)
+        buffered = io.BytesIO()
+        image.save(buffered, format="PNG")
+        state["current_image"] = base64.b64encode(buffered.getvalue()).decode()
+    data = json.dumps(state, separators=(",", ":"))
+    with open(os.path.join(directory, "game_state.json"), "w") as f:
+        f.write(data)
+    return written + len(data)
+
+
+def simulate_turn(turn, world_map, history):
+    if turn % 3 == 0:
+        world_map.move("N")
+    world_map.update_location(*world_map.current_position, None, f"Scene description for turn {turn} " * 8, "#556677")
+    history.append("user", f"action {turn}")
+    history.append("assistant", f"```html\n<p>Narrative for turn {turn}.</p>\n```" * 3)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as old_dir, tempfile.TemporaryDirectory() as new_dir:
+        video = os.path.join(old_dir, "clip.mp4")
+        with open(video, "wb") as f:
+            f.write(os.urandom(VIDEO_BYTES))
+
+        old_map, old_state, old_history = WorldMap(), RewriteState(os.path.join(old_dir, "world_state.json")), ChatHistory()
+        os.chdir(new_dir)
+        try:
+            new_map, new_state, new_history = WorldMap(), CommitWorldState(new_dir), ChatHistory()
+            manager = StateManager(saves_dir="saves")
+
+            # Both sides store the turn's new clip once; the second pair of columns leaves it out
+            print(f"{'turn':>5} {'old KB/turn':>12} {'new KB/turn':>12} {'old w/o clip':>13} {'new w/o clip':>13} "
+                  f"{'old ms':>8} {'new ms':>8} {'unchanged save B':>17}")
+            for turn in range(1, args.turns + 1):
+                image, image_bytes = turn_image(turn)
+
+                start = time.perf_counter()
+                simulate_turn(turn, old_map, old_history)
+                old_bytes = 0
+                for mutation in turn_mutations(turn):
+                    before = old_state.bytes_written
+                    if mutation[0] == "rule":
+                        old_state.rules[mutation[1]] = mutation[2]
+                    else:
+                        old_state.events.append(mutation[1])
+                    old_state.save()
+                    old_bytes += old_state.bytes_written - before
+                old_bytes += old_save(old_dir, old_map, old_state, old_history, None, image)
+                old_bytes += old_save(old_dir, old_map, old_state, old_history, video, image)  # video callback
+                old_ms = (time.perf_counter() - start) * 1000
+
+                start = time.perf_counter()
+                simulate_turn(turn, new_map, new_history)
+                new_state.mutate(turn_mutations(turn))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stored = manager.assets.bytes_written
+                    manager.assets.put_image(image, image_bytes, "jpeg")
+                    new_bytes = manager.assets.bytes_written - stored
+                    manager.save_game_state(new_map, new_state, new_history, None, image)
+                    new_bytes += manager.last_commit_bytes
+                    clip = os.path.join(new_dir, f"video_{turn}.mp4")
+                    shutil.copy2(video, clip)
+                    with open(clip, "ab") as f:
+                        f.write(str(turn).encode())  # every generated clip is new content
+                    manager.save_game_state(new_map, new_state, new_history, clip, image)
+                    new_bytes += manager.last_commit_bytes
+                new_ms = (time.perf_counter() - start) * 1000
+
+                # A save with nothing new, e.g. a repeated callback
+                with contextlib.redirect_stdout(io.StringIO()):
+                    manager.save_game_state(new_map, new_state, new_history, clip, image)
+                idle_bytes = manager.last_commit_bytes
+
+                if turn in CHECKPOINTS:
+                    print(f"{turn:>5} {old_bytes / 1024:>12.1f} {new_bytes / 1024:>12.1f} "
+                          f"{(old_bytes - VIDEO_BYTES) / 1024:>13.1f} {(new_bytes - VIDEO_BYTES) / 1024:>13.1f} "
+                          f"{old_ms:>8.1f} {new_ms:>8.1f} {idle_bytes:>17}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
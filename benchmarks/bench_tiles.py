@@ -0,0 +1,85 @@
+"""Tile memory and region color queries: dict tiles vs. slotted Tiles with the color grid.
+
+For each world size, builds a square world of empty-bodied tiles (as after exploring
+with descriptions stored elsewhere) once with the old dict-per-tile layout and once
+with WorldMap, measuring the memory each holds per tile with tracemalloc (the color
+grid included). Then reads the colors of a minimap-sized (11x11) and a large (256x256)
+region: the old way is one lookup per tile, the new one get_region_colors.
+
+Run from the repo root:
+  python -m benchmarks.bench_tiles [--sizes 10000 1000000]
+"""
+import argparse
+import gc
+import math
+import time
+import tracemalloc
+
+import src.color_grid  # noqa: F401  (numpy's import is not part of the map's memory)
+from src.world_map import WorldMap
+
+
+def dict_tile():
+    return {"svg": None, "description": None, "directions": ["N", "S", "E", "W"], "color": "#7A6A53"}
+
+
+def build_dicts(tiles):
+    side = math.isqrt(tiles)
+    return {(i % side, i // side): dict_tile() for i in range(tiles)}
+
+
+def build_world_map(tiles):
+    side = math.isqrt(tiles)
+    world_map = WorldMap()
+    for i in range(tiles):
+        world_map.update_location(i % side, i // side, None, None, "#7A6A53")
+    world_map.get_region_colors(0, 0, 1, 1)  # build the grid
+    world_map.changed.clear()  # drained by every save slot checkpoint
+    return world_map
+
+
+def measured(build, tiles):
+    gc.collect()
+    tracemalloc.start()
+    result = build(tiles)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def per_tile_colors(tiles, x0, y0, size):
+    return [[tiles[(x, y)]["color"] if (x, y) in tiles else None for x in range(x0, x0 + size)]
+            for y in range(y0, y0 + size)]
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'tiles':>9} {'dict B/tile':>12} {'Tile B/tile':>12} {'region':>8} "
+          f"{'per-tile us':>12} {'grid us':>9} {'speedup':>8}")
+    for tiles in args.sizes:
+        old, old_bytes = measured(build_dicts, tiles)
+        new, new_bytes = measured(build_world_map, tiles)
+        side = math.isqrt(tiles)
+        for size in (11, 256):
+            size = min(size, side)
+            x0 = y0 = (side - size) // 2
+            repeat = 200 if size <= 11 else 5
+            old_us = timed(lambda: per_tile_colors(old, x0, y0, size), repeat)
+            new_us = timed(lambda: new.get_region_colors(x0, y0, x0 + size, y0 + size), repeat)
+            print(f"{tiles:>9} {old_bytes / tiles:>12.0f} {new_bytes / tiles:>12.0f} {f'{size}x{size}':>8} "
+                  f"{old_us:>12.1f} {new_us:>9.1f} {old_us / new_us:>7.0f}x")
+        del old, new
+
+
+if __name__ == "__main__":
+    main()
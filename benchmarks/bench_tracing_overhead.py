@@ -0,0 +1,51 @@
+"""Overhead of the tracing hooks relative to a ~1 ms instrumented operation.
+
+Compares a plain call, a @traced call with tracing disabled and with tracing enabled
+(spans kept in memory and appended to a JSONL file in a temp dir). The acceptance bar
+is under 1% per call while disabled.
+
+Run from the repo root:
+  python -m benchmarks.bench_tracing_overhead
+"""
+import tempfile
+import time
+from unittest.mock import patch
+
+import utils.tracing as tracing
+from utils.tracing import Tracer, traced
+
+CALLS = 200_000
+OPERATION_MS = 1.0
+
+
+def noop():
+    return None
+
+
+def per_call_ns(func, calls=CALLS):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter_ns() - start) / calls
+
+
+def main():
+    baseline = per_call_ns(noop)
+    print(f"{'mode':<10} {'ns/call':>9} {'overhead ns':>12} {f'% of {OPERATION_MS:g} ms op':>14}")
+    print(f"{'plain':<10} {baseline:>9.0f} {0:>12.0f} {0:>14.4f}")
+
+    with tempfile.TemporaryDirectory() as trace_dir:
+        for label, enabled in (("disabled", False), ("enabled", True)):
+            tracer = Tracer(enabled=enabled, trace_dir=trace_dir)
+            with patch.object(tracing, "tracer", tracer):
+                cost = per_call_ns(traced("bench")(noop), CALLS if not enabled else CALLS // 10)
+            tracer.close()
+            overhead = max(cost - baseline, 0)
+            percent = overhead / (OPERATION_MS * 1e6) * 100
+            print(f"{label:<10} {cost:>9.0f} {overhead:>12.0f} {percent:>14.4f}")
+            if not enabled:
+                assert percent < 1, "disabled tracing must stay under 1% of the operation"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Full Game turn loop against the local fake providers (utils/fake_providers.py).
+
+Every provider URL is pointed at the fake servers, so this runs offline with no API
+keys. The game writes its saves into a temporary directory.
+
+Run from the repo root:
+  python -m benchmarks.bench_turn_loop [--turns 20] [--realistic] [--rate-limit 0.1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["LLM_WORLD_FAKE_PROVIDERS"] = "1"
+if "config" in sys.modules:
+    sys.exit("Import bench_turn_loop before config so the fake provider URLs are picked up")
+
+import config  # noqa: E402
+from utils.fake_providers import (REALISTIC_LATENCY, REALISTIC_RUNWAY_TASK,  # noqa: E402
+                                  start_fake_providers, stop_fake_providers)
+
+ACTIONS = ["look around", "walk north", "open the door", "pick up the torch", "climb the stairs"]
+
+
+def play_turn(game, action):
+    for chunk in game.process_input(action):
+        if isinstance(chunk, dict):
+            game.update_game_state(chunk)
+            return True
+        if chunk is None:
+            return False
+    return False
+
+
+def wait_for_videos(timeout=120):
+    """Background video threads write relative to the working directory, so let them finish."""
+    deadline = time.time() + timeout
+    for thread in threading.enumerate():
+        if thread.name == "video-generation":
+            thread.join(max(deadline - time.time(), 0))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--realistic", action="store_true", help="use realistic provider latency")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of provider requests answered with 429")
+    args = parser.parse_args()
+
+    providers = start_fake_providers(
+        latency=REALISTIC_LATENCY if args.realistic else None, rate_limit=args.rate_limit,
+        task_latency=REALISTIC_RUNWAY_TASK if args.realistic else None, seed=0)
+    config.LLM_RESPONSE_CACHE = False
+    workdir = tempfile.mkdtemp(prefix="llm_world_bench_")
+    repo_root = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from src.game_structure import Game
+
+        game = Game()
+        timings = []
+        start = time.perf_counter()
+        for turn in range(args.turns):
+            if play_turn(game, ACTIONS[turn % len(ACTIONS)]):
+                timings.append(dict(game.turn_timing))
+        elapsed = time.perf_counter() - start
+        wait_for_videos()
+        video_ready = time.perf_counter() - start
+        game.shutdown()  # pending saves also write relative to the working directory
+    finally:
+        os.chdir(repo_root)
+        stop_fake_providers(providers)
+
+    stages = sorted({stage for timing in timings for stage, value in timing.items() if isinstance(value, float)})
+    print(f"\n{len(timings)}/{args.turns} turns completed in {elapsed:.2f}s, "
+          f"last video ready at {video_ready:.2f}s ({workdir})")
+    print(f"{'stage':<16} {'mean ms':>9} {'max ms':>9}")
+    for stage in stages:
+        values = [timing[stage] * 1000 for timing in timings if stage in timing]
+        print(f"{stage:<16} {sum(values) / len(values):>9.1f} {max(values):>9.1f}")
+    print(f"\n{'provider':<10} {'requests':>8} {'429s':>6}")
+    for name, provider in providers.items():
+        print(f"{name:<10} {provider.stats['requests']:>8} {provider.stats['rate_limited']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""JSON vs SQLite WorldMap with a large explored world.
+
+Builds TILES tiles (an SVG and a description each), then measures the first full save,
+loading, 1000 moves reading each new tile's SVG and description, minimap color lookups,
+and the save after a single tile changed.
+
+Run from the repo root:
+  python -m benchmarks.bench_world_map [--tiles 100000]
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from src.world_map import SQLiteWorldMap, WorldMap
+
+SVG = "<svg width='400' height='300'><rect width='100%' height='100%' fill='#5A5A5A'/>" + "<circle cx='50' cy='50' r='8'/>" * 12 + "</svg>"
+DESCRIPTION = "A torch-lit stone corridor ending at a heavy oak door bound with iron. " * 6
+MOVES = 1000
+
+
+def populate(world_map, tiles):
+    side = math.isqrt(tiles) + 1
+    for i in range(tiles):
+        world_map.update_location(i % side - side // 2, i // side - side // 2, SVG, DESCRIPTION, "#7A6A53")
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def walk(world_map):
+    for step in range(MOVES):
+        world_map.move("NESW"[step // 25 % 4])
+        world_map.get_current_svg()
+        world_map.get_current_description()
+
+
+def minimap(world_map):
+    cx, cy = world_map.current_position
+    for dx in range(-5, 6):
+        for dy in range(-5, 6):
+            world_map.get_location_color(cx + dx, cy + dy)
+
+
+def run(label, make_map, files, tiles):
+    world_map = make_map()
+    populate(world_map, tiles)
+    first_save, _ = timed(world_map.save_state)
+
+    loaded = make_map()
+    load, _ = timed(loaded.load_state)
+    move, _ = timed(lambda: walk(loaded))
+    lookups, _ = timed(lambda: minimap(loaded))
+    loaded.save_state()
+    loaded.update_location(*loaded.current_position, SVG, "changed", "#000000")
+    one_tile, written = timed(loaded.save_state)
+    for instance in (world_map, loaded):
+        if hasattr(instance, "close"):
+            instance.close()
+    size = sum(os.path.getsize(path) for path in files if os.path.exists(path))
+    print(f"{label:<7} {first_save:>11.0f} {load:>9.1f} {move:>14.1f} {lookups:>12.2f} {one_tile:>12.1f} "
+          f"{written / 1024:>13.1f} {size / 1e6:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tiles", type=int, default=100_000)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            print(f"{args.tiles:,} tiles, {MOVES} moves")
+            print(f"{'backend':<7} {'1st save ms':>11} {'load ms':>9} {'1000 moves ms':>14} {'minimap ms':>12} "
+                  f"{'1-tile save':>12} {'1-tile KB out':>13} {'disk MB':>8}")
+            run("json", WorldMap, ["world_map.json"], args.tiles)
+            run("sqlite", lambda: SQLiteWorldMap(db_path="world_map.db", json_path=None),
+                ["world_map.db", "world_map.db-wal"], args.tiles)
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
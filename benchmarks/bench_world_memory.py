@@ -0,0 +1,76 @@
+"""World state size, load time and engine prompt size against session length.
+
+Plays synthetic sessions of --turns turns (two events and one user/assistant pair per
+turn) through WorldState and ChatHistory, once keeping every event and once with
+WorldMemory folding after each turn (local summarizer, so no LLM calls are timed).
+Reports the events held, the world_state.json + log bytes, the time to load them and
+the engine prompt's estimated tokens at the end of each session.
+
+Run from the repo root:
+  python -m benchmarks.bench_world_memory [--turns 100 1000 10000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+import config
+from src.game_structure import WorldState
+from utils.chat_history import ChatHistory
+from utils.context_utils import build_engine_context, estimate_tokens
+from utils.world_memory import WorldMemory, local_summarizer
+
+NARRATIVE = "```html\n<p>" + "You edge forward as water drips from the ceiling. " * 4 + "</p>\n```"
+
+
+def play(directory, turns, memory):
+    paths = (os.path.join(directory, "world_state.json"), os.path.join(directory, "world_state.log"))
+    world_state = WorldState(*paths)
+    history = ChatHistory()
+    for turn in range(turns):
+        history.append("user", f"Turn {turn}: inspect the moss and move deeper")
+        world_state.add_event(f"Turn {turn}: the moss glowed brighter")
+        world_state.add_event(f"Turn {turn}: the player found a rune marked {turn * 7 % 97}")
+        history.append("assistant", NARRATIVE)
+        world_state.save_state()
+        if memory:
+            memory.maybe_fold(world_state, history)
+            memory.wait()
+    world_state.save_state()
+
+    state_bytes = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+    start = time.perf_counter()
+    loaded = WorldState(*paths)
+    loaded.load_state()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    system_blocks, messages, _ = build_engine_context(
+        config.GAME_ENGINE_SYSTEM_PROMPT, loaded.rules, "", "A narrow cave passage.", ["N", "S"],
+        loaded.events[-config.ENGINE_RECENT_EVENTS:], history.messages(), "look around",
+        config.ENGINE_CONTEXT_TOKEN_BUDGET, memory=loaded.memory["summary"])
+    prompt = sum(estimate_tokens(block["text"]) for block in system_blocks) + \
+        sum(estimate_tokens(message["content"]) for message in messages)
+    return len(loaded.events), state_bytes, load_ms, prompt, estimate_tokens(loaded.memory["summary"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print(f"{'turns':>6} {'memory':>7} {'events':>7} {'state KB':>9} {'load ms':>8} {'prompt tok':>11} {'memory tok':>11}")
+    for turns in args.turns:
+        for folding in (False, True):
+            memory = WorldMemory(local_summarizer) if folding else None
+            with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+                events, state_bytes, load_ms, prompt, memory_tokens = play(directory, turns, memory)
+            if memory:
+                memory.close()
+            print(f"{turns:>6} {'on' if folding else 'off':>7} {events:>7} {state_bytes / 1024:>9.1f} "
+                  f"{load_ms:>8.2f} {prompt:>11} {memory_tokens:>11}")
+
+
+if __name__ == "__main__":
+    main()
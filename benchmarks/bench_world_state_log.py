@@ -0,0 +1,118 @@
+"""Bytes written per turn for WorldState persistence: full rewrites vs. the append log.
+
+Each simulated turn adds EVENTS_PER_TURN events (and a rule every RULE_EVERY turns),
+then saves once, like Game.update_game_state. The rewrite column replays the old
+behaviour: world_state.json rewritten on every add_rule/add_event and once more by
+StateManager.save_game_state. Write amplification is bytes written / bytes of new records.
+
+Run from the repo root:
+  python -m benchmarks.bench_world_state_log [--turns 2000]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from utils.event_log import AppendLog
+
+EVENTS_PER_TURN = 5
+RULE_EVERY = 4
+CHECKPOINTS = (10, 100, 1000, 2000, 5000)
+
+
+def turn_mutations(turn):
+    mutations = [("event", f"Turn {turn}: the player noticed detail number {i} about the hall") for i in range(EVENTS_PER_TURN)]
+    if turn % RULE_EVERY == 0:
+        mutations.append(("rule", f"rule_{turn}", "Torches relight themselves at dawn"))
+    return mutations
+
+
+class RewriteState:
+    def __init__(self, path):
+        self.path = path
+        self.rules, self.events = {}, []
+        self.bytes_written = 0
+
+    def save(self):
+        data = json.dumps({"rules": self.rules, "events": self.events})
+        with open(self.path, "w") as f:
+            f.write(data)
+        self.bytes_written += len(data)
+
+    def turn(self, mutations):
+        for mutation in mutations:
+            if mutation[0] == "rule":
+                self.rules[mutation[1]] = mutation[2]
+            else:
+                self.events.append(mutation[1])
+            self.save()
+        self.save()
+
+
+class LogState:
+    def __init__(self, directory):
+        self.log = AppendLog(os.path.join(directory, "world_state.json"), os.path.join(directory, "world_state.log"))
+        self.rules, self.events = {}, []
+
+    @property
+    def bytes_written(self):
+        return self.log.bytes_written
+
+    def turn(self, mutations):
+        for mutation in mutations:
+            if mutation[0] == "rule":
+                self.rules[mutation[1]] = mutation[2]
+                self.log.append({"op": "rule", "name": mutation[1], "description": mutation[2]})
+            else:
+                self.events.append(mutation[1])
+                self.log.append({"op": "event", "description": mutation[1]})
+        self.log.flush()
+        if self.log.needs_compaction():
+            self.log.compact({"rules": self.rules, "events": self.events})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as rewrite_dir, tempfile.TemporaryDirectory() as log_dir:
+        rewrite = RewriteState(os.path.join(rewrite_dir, "world_state.json"))
+        appended = LogState(log_dir)
+        record_bytes = 0
+        times = {"rewrite": 0.0, "log": 0.0}
+        previous = {"rewrite": 0, "log": 0, "records": 0}
+
+        print(f"{'turn':>5} {'rewrite B/turn':>15} {'log B/turn':>11} {'rewrite amp':>12} {'log amp':>8} "
+              f"{'rewrite ms':>11} {'log ms':>7}")
+        for turn in range(1, args.turns + 1):
+            mutations = turn_mutations(turn)
+            record_bytes += sum(len(json.dumps(m)) for m in mutations)
+
+            start = time.perf_counter()
+            rewrite.turn(mutations)
+            times["rewrite"] = time.perf_counter() - start
+            start = time.perf_counter()
+            appended.turn(mutations)
+            times["log"] = time.perf_counter() - start
+
+            if turn in CHECKPOINTS:
+                new_records = record_bytes - previous["records"]
+                rewrite_turn = rewrite.bytes_written - previous["rewrite"]
+                log_turn = appended.bytes_written - previous["log"]
+                print(f"{turn:>5} {rewrite_turn:>15,} {log_turn:>11,} {rewrite_turn / new_records:>12.1f} "
+                      f"{log_turn / new_records:>8.2f} {times['rewrite'] * 1000:>11.2f} {times['log'] * 1000:>7.2f}")
+            previous = {"rewrite": rewrite.bytes_written, "log": appended.bytes_written, "records": record_bytes}
+
+        print(f"\nTotal written over {args.turns} turns: rewrite {rewrite.bytes_written / 1e6:.1f} MB, "
+              f"log {appended.bytes_written / 1e6:.2f} MB (includes compaction snapshots)")
+
+        start = time.perf_counter()
+        snapshot, records = AppendLog(appended.log.snapshot_path, appended.log.log_path).load()
+        print(f"Load: snapshot with {len(snapshot['events']) if snapshot else 0} events + {len(records)} "
+              f"tail records in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
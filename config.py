@@ -1,8 +1,17 @@
 import os
+import copy
 from dotenv import load_dotenv
 
 load_dotenv("local.env")
 
+# Local stand-in provider servers (utils/fake_providers.py). With LLM_WORLD_FAKE_PROVIDERS=1
+# every provider URL below points at them and placeholder keys are used, so turns run offline
+FAKE_PROVIDERS = os.getenv("LLM_WORLD_FAKE_PROVIDERS", "0") == "1"
+FAKE_PROVIDERS_HOST = "127.0.0.1"
+FAKE_PROVIDER_PORTS = {"openai": 8901, "anthropic": 8902, "stability": 8903, "imgur": 8904, "runway": 8905}
+FAKE_PROVIDER_URLS = {name: f"http://{FAKE_PROVIDERS_HOST}:{port}" for name, port in FAKE_PROVIDER_PORTS.items()}
+FAKE_PROVIDER_KEY = "fake-key"
+
 # LLM Provider Settings
 LLM_PROVIDER = "openai"  # or "openai"
 ENGINE_LLM_PROVIDER = "openai"
@@ -11,28 +20,132 @@ VISUAL_LLM_PROVIDER = "openai"
 # OpenAI Settings
 OPENAI_API_KEY_ENV_VAR = "OPENAI_API_KEY"
 OPENAI_DEFAULT_MODEL = "gpt-4o"  # or "gpt-4" if you have access
+OPENAI_BASE_URL = FAKE_PROVIDER_URLS["openai"] + "/v1" if FAKE_PROVIDERS else os.getenv("OPENAI_BASE_URL")
 
 # API Settings
 ANTROPIC_API_KEY_ENV_VAR = "ANTHROPIC_API_KEY"
+ANTHROPIC_BASE_URL = FAKE_PROVIDER_URLS["anthropic"] if FAKE_PROVIDERS else os.getenv("ANTHROPIC_BASE_URL")
 
 # LLM Settings
 ANTHROPIC_DEFAULT_MODEL = "claude-3-5-sonnet-20240620"
 MAX_TOKENS = 3000
 TEMPERATURE = 0.7
 
+# LLM HTTP connection pool (shared by every Game in the process, see utils.llm_utils.get_client)
+LLM_HTTP_POOL_SIZE = 20
+LLM_HTTP_KEEPALIVE_EXPIRY = 120  # seconds an idle connection is kept open between turns
+LLM_HTTP_TIMEOUT = 120
+LLM_HTTP_CONNECT_TIMEOUT = 10
+LLM_WARM_UP_ON_START = True  # open provider connections before the first player turn
+
+# Memoized LLM responses (only temperature=0 calls are cached)
+LLM_RESPONSE_CACHE = True
+LLM_RESPONSE_CACHE_DIR = "./llm_cache"
+LLM_RESPONSE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+LLM_RESPONSE_CACHE_TTL = 24 * 60 * 60  # seconds
+
+# Start the visual LLM call as soon as the engine narrative has streamed, instead of
+# after the whole engine message (falls back to a fresh call if the player moved)
+PIPELINED_TURNS = True
+
+# Messages kept in the saved chat history (user and assistant turns)
+MAX_CHAT_HISTORY = 10
+
+# Engine prompt assembly (estimated tokens, excluding the tool schema)
+ENGINE_CONTEXT_TOKEN_BUDGET = 6000
+ENGINE_RECENT_EVENTS = 5
+
+# World rules/events persistence: mutations are appended to world_state.log and fsynced
+# once per save, then folded into the world_state.json snapshot every N records
+WORLD_STATE_COMPACT_EVERY = 500
+
+# World map storage: "json" rewrites world_map.json on every save, "sqlite" keeps one
+# row per tile in WORLD_MAP_DB_PATH (imported from world_map.json on first load), saves
+# only changed tiles and holds WORLD_MAP_TILE_CACHE recently used tiles in memory
+WORLD_MAP_BACKEND = "json"
+WORLD_MAP_DB_PATH = "world_map.db"
+WORLD_MAP_TILE_CACHE = 1024
+
+# Game saves run on a background writer thread (utils/persistence.py) that coalesces a
+# burst of save requests into one write of the latest state; False saves inline
+PERSISTENCE_WRITER = True
+PERSISTENCE_QUEUE_SIZE = 16
+PERSISTENCE_FLUSH_TIMEOUT = 30  # seconds shutdown waits for pending saves
+
+# Named save slots (utils/save_slots.py): every turn is checkpointed as a delta against
+# the previous one, with a full snapshot at least every CHECKPOINT_SNAPSHOT_EVERY deltas,
+# so loading any checkpoint replays at most that many deltas
+SAVE_SLOTS_DIR = "./saves/slots"
+SAVE_SLOT = "default"
+CHECKPOINT_SNAPSHOT_EVERY = 20
+
+# Startup: the provider SDKs, moviepy and cairosvg are imported on first use. With
+# PRELOAD_MODULES_ON_START they are then imported on a background thread once the game has
+# loaded, so the first turn does not pay for them either
+PRELOAD_MODULES_ON_START = True
+PRELOAD_MODULES = ["openai", "anthropic", "runwayml", "moviepy.editor", "cairosvg"]
+STARTUP_BUDGET = 1.0  # seconds for importing src.game_structure plus Game(), see benchmarks/bench_startup.py
+
+# Disk budget for generated media (utils/disk_budget.py): files under DISK_BUDGET_DIRS not
+# used for DISK_MAX_AGE seconds are deleted, then the least recently used ones while over
+# DISK_BUDGET_BYTES. Files referenced by the live game or a save slot's latest turn are kept
+DISK_BUDGET_DIRS = ["./saves/assets", "./video_tmp", "./saves", "./saves/map_tiles"]
+DISK_BUDGET_BYTES = 2 * 1024 ** 3
+DISK_MAX_AGE = 14 * 24 * 3600  # None keeps files until the byte budget needs the space
+DISK_SCAN_BATCH = 500  # directory entries indexed per scan step
+DISK_BUDGET_INTERVAL = 60  # seconds between scan passes
+
+# World memory (utils/world_memory.py): once WORLD_MEMORY_FOLD_EVERY events have piled up
+# past the newest WORLD_MEMORY_EVENT_WINDOW, or the chat history is full, a background
+# thread folds everything older than the windows into one summary of at most
+# WORLD_MEMORY_MAX_TOKENS, which the engine prompt carries instead. Prompt size and saved
+# state then stay flat however long the session runs. "local" summarizes without an LLM
+# call by keeping the newest lines that fit
+WORLD_MEMORY = True
+WORLD_MEMORY_EVENT_WINDOW = 20
+WORLD_MEMORY_HISTORY_WINDOW = 4  # chat messages kept verbatim after a fold
+WORLD_MEMORY_FOLD_EVERY = 10
+WORLD_MEMORY_MAX_TOKENS = 400
+WORLD_MEMORY_SUMMARIZER = "llm"  # or "local"
+
+# Minimap (src/minimap.py): explored tiles up to MINIMAP_RADIUS steps from the player, a
+# diamond as the old DFS reveal drew. The window is encoded once per move or tile change
+# and served from cache with an ETag otherwise
+MINIMAP_RADIUS = 4
+
+# World map tile pyramid (src/map_tiles.py), served at /world_tiles/<z>/<x>/<y>.png and
+# browsable at /world. At MAP_TILE_MAX_ZOOM a tile covers one 32x32 block of cells and each
+# zoom level out doubles that. Rendered tiles are cached in MAP_TILES_DIR (within the disk
+# budget) and only the tiles covering a changed cell are rendered again
+MAP_TILES_DIR = "./saves/map_tiles"
+MAP_TILE_SIZE = 256  # pixels, a power of two
+MAP_TILE_MAX_ZOOM = 5
+
+# Scene revisits: tiles remember the first-person visuals (visual LLM output, image and
+# video) generated on them, stamped with a hash of the tile's SVG and description. Walking
+# back into a tile whose scene is unchanged shows them again without calling the visual
+# LLM, Stability or Runway
+REUSE_SCENE_VISUALS = True
+# The disk budget keeps the remembered images and videos of tiles at most this many steps
+# from the player; farther ones may be evicted and are generated again on the next visit
+SCENE_VISUALS_KEEP_RADIUS = 8
+
 # Image Generator Settings
-IMAGE_GENERATION_MODEL = os.environ.get('IMAGE_GENERATION_MODEL')
+IMAGE_GENERATION_MODEL = os.environ.get('IMAGE_GENERATION_MODEL', "sd3.5-large" if FAKE_PROVIDERS else None)
 IMAGE_GENERATION_SEED = 1
 
-SD_KEY = os.environ.get("SD_KEY")
-SD_API_HOST = os.getenv('SD_API_HOST', 'https://api.stability.ai')
+SD_KEY = os.environ.get("SD_KEY", FAKE_PROVIDER_KEY if FAKE_PROVIDERS else None)
+SD_API_HOST = FAKE_PROVIDER_URLS["stability"] if FAKE_PROVIDERS else os.getenv('SD_API_HOST', 'https://api.stability.ai')
 
-IMGUR_CLIENT_ID = os.getenv("IMGUR_CLIENT_ID")
+IMGUR_CLIENT_ID = os.getenv("IMGUR_CLIENT_ID", FAKE_PROVIDER_KEY if FAKE_PROVIDERS else None)
 IMGUR_CLIENT_SECRET = os.getenv("IMGUR_CLIENT_SECRET")
+IMGUR_API_URL = FAKE_PROVIDER_URLS["imgur"] if FAKE_PROVIDERS else "https://api.imgur.com"
 
-VIDEO_GENERATION_MODEL = os.getenv("VIDEO_GENERATION_MODEL")
+VIDEO_GENERATION_MODEL = os.getenv("VIDEO_GENERATION_MODEL", "gen3a_turbo" if FAKE_PROVIDERS else None)
 VIDEO_FIRST_PERSON_MODIFIER = "{prompt}"
-VIDEO_GENERATION_KEY = os.getenv("RUNWAY_API_KEY")
+VIDEO_GENERATION_KEY = os.getenv("RUNWAY_API_KEY", FAKE_PROVIDER_KEY if FAKE_PROVIDERS else None)
+RUNWAY_BASE_URL = FAKE_PROVIDER_URLS["runway"] if FAKE_PROVIDERS else os.getenv("RUNWAYML_BASE_URL")
+VIDEO_POLL_INTERVAL = 0.05 if FAKE_PROVIDERS else 1  # seconds between Runway task polls
 CONTINUOUS_VIDEO = True
 GENERATE_VIDEO = True
 
@@ -52,6 +165,10 @@ GENERATE_SVG = False
 DEBUG_MODE = True
 LOG_FILE = "llm_world.log"
 
+# Per-turn span tracing (JSONL + Chrome trace-event files in TRACE_DIR)
+TRACING_ENABLED = os.getenv("LLM_WORLD_TRACING", "0") == "1"
+TRACE_DIR = "./traces"
+
 NARRATIVE_PARAMETER_NAME = "narrative" #used for streaming
 SCENE_SVG_INPUT_NAME = "Scene SVG"
 SVG_GENERATION_SYSTEM_PROMPT = "Generate first-person visuals based on the user's previous action, scene SVG, and scene description. Be highly descriptive and don't miss any details."
@@ -202,3 +319,38 @@ VISUAL_TOOLS = [
     }
 ]
 VISUAL_TOOL_CHOICE = {"type": "function", "function": {"name": "visual_output"}}
+
+WORLD_MEMORY_SYSTEM_PROMPT = "You keep the long-term memory of a fantasy adventure. Merge the current memory with the older events and turns into one summary of at most {max_words} words. Keep what matters later: places visited, characters met, items gained or lost, promises, threats and unresolved quests. Drop flavor text."
+
+WORLD_MEMORY_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "world_memory",
+            "description": "Provide the updated world memory.",
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "summary": {"type": "string", "description": "The merged memory, plain prose, oldest facts first."},
+                },
+                "required": ["summary"],
+                "additionalProperties": False,
+            },
+        }
+    }
+]
+WORLD_MEMORY_TOOL_CHOICE = {"type": "function", "function": {"name": "world_memory"}}
+
+# Single-call mode: one engine tool whose output also carries the visual fields, so a
+# turn needs one LLM round trip instead of game_output followed by visual_output
+COMBINED_ENGINE_VISUALS = False
+COMBINED_ENGINE_SYSTEM_PROMPT = GAME_ENGINE_SYSTEM_PROMPT + " " + SVG_GENERATION_SYSTEM_PROMPT
+
+COMBINED_GAME_TOOLS = copy.deepcopy(GAME_TOOLS)
+COMBINED_GAME_TOOLS[0]["function"]["name"] = "game_visual_output"
+COMBINED_GAME_TOOLS[0]["function"]["description"] += " Also provide the first-person visuals that result from the player action."
+COMBINED_GAME_TOOLS[0]["function"]["parameters"]["properties"]["visuals"] = copy.deepcopy(
+    VISUAL_TOOLS[0]["function"]["parameters"]["properties"]["visuals"])
+COMBINED_GAME_TOOLS[0]["function"]["parameters"]["required"].append("visuals")
+COMBINED_TOOL_CHOICE = {"type": "function", "function": {"name": "game_visual_output"}}
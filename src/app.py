@@ -1,6 +1,7 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, abort, render_template, request, jsonify, send_file
 from src.game_structure import Game
-from utils.llm_utils import initialize_client, update_chat_history
+from utils.llm_utils import get_response_cache
+from utils.tracing import tracer
 import base64
 from io import BytesIO
 import os
@@ -37,6 +38,33 @@ def reset():
     game.reset()
     return jsonify({'status': 'success'})
 
+@app.route('/slots')
+def get_slots():
+    return jsonify({'active': game.save_slots.active, 'slots': game.save_slots.list_slots()})
+
+@app.route('/slots/<slot>/checkpoints')
+def get_slot_checkpoints(slot):
+    return jsonify({'checkpoints': game.save_slots.history(slot)})
+
+@app.route('/slots/<slot>/load', methods=['POST'])
+def load_slot(slot):
+    if not game.load_slot(slot, request.form.get('checkpoint')):
+        return jsonify({'status': 'error', 'message': f'Nothing saved in slot {slot}'})
+    return jsonify({'status': 'success'})
+
+@app.route('/slots/<slot>/new', methods=['POST'])
+def new_slot(slot):
+    game.new_slot(slot)
+    return jsonify({'status': 'success'})
+
+@app.route('/slots/<slot>/branch', methods=['POST'])
+def branch_slot(slot):
+    try:
+        game.branch_slot(slot, request.form['checkpoint'])
+    except KeyError as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+    return jsonify({'status': 'success'})
+
 @app.route('/video_status')
 def get_video_status():
     print(game.rate_limited)
@@ -88,12 +116,66 @@ def get_image():
 
 @app.route('/minimap')
 def get_minimap():
-    minimap_data = game.get_minimap_data()
-    return jsonify(minimap_data)
+    # Cached until the player moves or a tile changes; polls of an unchanged map get a 304
+    body, etag = game.minimap.encoded()
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in request.headers.get('If-None-Match', ''):
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
+
+@app.route('/world')
+def world():
+    # Pan and zoom over the whole explored world, drawn from the tile pyramid below
+    return render_template('world.html', max_zoom=game.map_tiles.max_zoom, tile_size=game.map_tiles.tile_size,
+                           view=game.map_tiles.view(game.world_map.current_position))
+
+@app.route('/world_tiles/<int:z>/<int(signed=True):x>/<int(signed=True):y>.png')
+def get_world_tile(z, x, y):
+    try:
+        path = game.map_tiles.tile(z, x, y)
+    except ValueError:
+        abort(404)
+    if path is None:
+        return Response(game.map_tiles.blank(), mimetype='image/png')
+    return send_file(os.path.abspath(path), mimetype='image/png', max_age=0)
 
 @app.route('/chat_history')
 def get_chat_history():
-    return jsonify({'history': game.chat_history})
+    return jsonify({'history': game.chat_history.to_list()})
+
+@app.route('/llm_cache_stats')
+def get_llm_cache_stats():
+    cache = get_response_cache()
+    return jsonify(cache.stats() if cache else {'status': 'disabled'})
+
+@app.route('/persistence_stats')
+def get_persistence_stats():
+    # Writer lag and coalescing, plus bytes the state manager has committed
+    stats = game.persistence.stats() if game.persistence else {'status': 'synchronous'}
+    stats['bytes_written'] = game.state_manager.bytes_written
+    stats['commits'] = game.state_manager.commits
+    return jsonify(stats)
+
+@app.route('/disk_budget')
+def get_disk_budget():
+    return jsonify(game.disk_budget.stats())
+
+@app.route('/world_memory')
+def get_world_memory():
+    if not game.world_memory:
+        return jsonify({'status': 'disabled'})
+    stats = game.world_memory.stats()
+    stats['summary'] = game.world_state.memory['summary']
+    stats['folded'] = game.world_state.memory['folded']
+    stats['events'] = len(game.world_state.events)
+    return jsonify(stats)
+
+@app.route('/trace')
+def get_trace():
+    # Chrome trace of the spans recorded so far; load it in chrome://tracing or Perfetto
+    if not tracer.enabled:
+        return jsonify({'status': 'disabled'})
+    return jsonify(tracer.chrome_trace())
 
 @app.route('/compile_videos', methods=['POST'])
 def compile_videos():
@@ -0,0 +1,69 @@
+CHUNK = 32
+PRESENT = 0x01000000  # set on every stored color, so 0 means "no tile here"
+
+
+def parse_color(color):
+    """"#RRGGBB" or "#RGB" as 0xRRGGBB. Anything else (e.g. a color name) counts as white."""
+    value = (color or "").lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    try:
+        return int(value, 16) & 0xFFFFFF if len(value) == 6 else 0xFFFFFF
+    except ValueError:
+        return 0xFFFFFF
+
+
+def format_color(value):
+    return f"#{int(value) & 0xFFFFFF:06X}" if value else None
+
+
+class ColorGrid:
+    """Tile colors in CHUNK x CHUNK numpy uint32 blocks, keyed by chunk coordinates.
+
+    Each cell is ``PRESENT | 0xRRGGBB``, or 0 where there is no tile, so reading the
+    colors of a region is a few array slices rather than one lookup per tile. Arrays are
+    indexed ``[y, x]`` with y growing north, like map positions. numpy is imported with
+    the first chunk, so importing this module for its constants stays cheap.
+    """
+
+    def __init__(self):
+        self.chunks = {}
+
+    def set(self, x, y, color):
+        key = (x // CHUNK, y // CHUNK)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            import numpy as np
+
+            chunk = self.chunks[key] = np.zeros((CHUNK, CHUNK), dtype=np.uint32)
+        chunk[y % CHUNK, x % CHUNK] = PRESENT | parse_color(color)
+
+    def get(self, x, y):
+        chunk = self.chunks.get((x // CHUNK, y // CHUNK))
+        return int(chunk[y % CHUNK, x % CHUNK]) if chunk is not None else 0
+
+    def region(self, x0, y0, x1, y1):
+        """Cells for x0 <= x < x1 and y0 <= y < y1 as a (y1 - y0, x1 - x0) uint32 array."""
+        import numpy as np
+
+        out = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=np.uint32)
+        if out.size == 0:
+            return out
+        for cy in range(y0 // CHUNK, (y1 - 1) // CHUNK + 1):
+            for cx in range(x0 // CHUNK, (x1 - 1) // CHUNK + 1):
+                chunk = self.chunks.get((cx, cy))
+                if chunk is None:
+                    continue
+                # Overlap of the region and this chunk, in world coordinates
+                left, right = max(x0, cx * CHUNK), min(x1, (cx + 1) * CHUNK)
+                bottom, top = max(y0, cy * CHUNK), min(y1, (cy + 1) * CHUNK)
+                out[bottom - y0:top - y0, left - x0:right - x0] = \
+                    chunk[bottom - cy * CHUNK:top - cy * CHUNK, left - cx * CHUNK:right - cx * CHUNK]
+        return out
+
+    def clear(self):
+        self.chunks = {}
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks.values())
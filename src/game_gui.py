@@ -1,13 +1,10 @@
 import tkinter as tk
 from tkinter import scrolledtext
 from src.game_structure import Game
-from utils.llm_utils import initialize_client, update_chat_history
 import threading
 from PIL import Image, ImageTk
 import html
 import io
-import cairosvg
-import codecs
 import config
 
 from tkvideo import tkvideo
@@ -18,7 +15,6 @@ from PIL import Image, ImageTk
 import threading
 import time
 from collections import deque
-from moviepy.editor import VideoFileClip, concatenate_videoclips
 
 import shutil
 
@@ -92,18 +88,13 @@ class VideoPlayer:
         self.label.configure(image='')
         self.label.image = None
 
-def unescape_string(s):
-    s = s.replace("\\n", "\n")
-    return codecs.decode(s, 'unicode_escape')
-
 class GameGUI:
     def __init__(self, master):
         self.master = master
         master.title("LLM World Explorer")
 
         # Initialize game
-        self.game = Game()
-        self.game.load_state()  # Ensure game state is loaded before proceeding
+        self.game = Game()  # loads the saved state
 
         # Setup UI components
         self.setup_ui()
@@ -211,6 +202,8 @@ class GameGUI:
 
     def _stitch_next_video(self):
         """Stitch next video in queue with current video"""
+        from moviepy.editor import VideoFileClip, concatenate_videoclips
+
         new_video_path = self.video_queue.popleft()
         final_path = os.path.join("./video_final", "current.mp4")
 
@@ -336,12 +329,7 @@ class GameGUI:
             if chunk is None:
                 break
             if isinstance(chunk, str):
-                # This is a narrative chunk
-                try:
-                    chunk = unescape_string(chunk)
-                except:
-                    pass
-                
+                # This is a narrative chunk, already JSON-decoded by the stream
                 if chunk.startswith("```html"):
                     # Parse HTML content
                     chunk = chunk[7:-3]  # Remove ```html and ```
@@ -439,11 +427,12 @@ class GameGUI:
         tile_size = 10
         visible_range = 7  # Number of tiles visible in each direction
 
-        # Draw the grid
+        # Draw the grid; unexplored cells are white, without creating tiles for them
+        colors = self.game.world_map.get_region(cx - visible_range, cy - visible_range,
+                                                cx + visible_range + 1, cy + visible_range + 1)
         for x in range(-visible_range, visible_range + 1):
             for y in range(-visible_range, visible_range + 1):
-                pos_x, pos_y = cx + x, cy + y
-                color = self.game.world_map.get_location_color(pos_x, pos_y)
+                color = colors.get((cx + x, cy + y), "#FFFFFF")
                 
                 # Calculate the position on the minimap
                 map_x = (x + visible_range) * tile_size
@@ -475,6 +464,8 @@ class GameGUI:
         self.rules_events_display.config(state=tk.DISABLED)
 
     def svg_to_image(self, svg_string):
+        import cairosvg
+
         try:
             png_data = cairosvg.svg2png(bytestring=svg_string.encode('utf-8'))
             return Image.open(io.BytesIO(png_data))
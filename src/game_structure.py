@@ -1,60 +1,139 @@
 import json
 import os
 import io
+import functools
 import time
 import base64
 import shutil
-from PIL import Image
-from utils.llm_utils import create_message_stream, update_chat_history, initialize_client
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.llm_utils import create_message_stream, get_client, warm_up_clients
 from utils.image_utils import ImageManager
 from utils.video_utils import VideoManager
 from utils.state_manager import StateManager
-from src.world_map import WorldMap
+from utils.asset_store import AssetStore, ASSET_ID_KEY
+from utils.disk_budget import DiskBudget
+from utils.context_utils import build_engine_context
+from utils.chat_history import ChatHistory
+from utils.event_log import AppendLog
+from utils.persistence import PersistenceWriter
+from utils.save_slots import SaveSlots
+from utils.startup import preload_modules
+from utils.world_memory import LLMSummarizer, WorldMemory, local_summarizer
+from utils.tracing import tracer
+from src.map_tiles import MapTiles
+from src.minimap import Minimap
+from src.world_map import create_world_map
 import config
 import logging
 
 class WorldState:
-    def __init__(self):
+    """World rules and events, persisted as a snapshot plus an append-only log.
+
+    ``add_rule``/``add_event`` only buffer a log record; ``save_state`` fsyncs the
+    buffered records in one append and compacts the log into the snapshot when it
+    has grown past config.WORLD_STATE_COMPACT_EVERY records. ``memory`` is the bounded
+    summary that ``fold`` (see utils/world_memory.py) replaces the oldest events with.
+    """
+
+    def __init__(self, path='world_state.json', log_path='world_state.log'):
         self.rules = {}
         self.events = []
-        self.load_state()
+        self.memory = {'summary': "", 'folded': 0}  # replaced whole, never edited in place
+        self.epoch = 0  # bumped by restore, so a fold computed before it is discarded
+        self.log = AppendLog(path, log_path)
+        self._lock = threading.Lock()  # the video callback thread saves too
 
     def load_state(self):
-        try:
-            with open('world_state.json', 'r') as f:
-                data = json.load(f)
-                self.rules = data.get('rules', {})
-                self.events = data.get('events', [])
-        except FileNotFoundError:
-            pass  # Start with empty state if file doesn't exist
+        snapshot, records = self.log.load()
+        with self._lock:
+            self.rules = (snapshot or {}).get('rules', {})
+            self.events = (snapshot or {}).get('events', [])
+            self.memory = (snapshot or {}).get('memory', {'summary': "", 'folded': 0})
+            for record in records:
+                self._apply(record)
+
+    def _apply(self, record):
+        if record['op'] == 'rule':
+            self.rules[record['name']] = record['description']
+        elif record['op'] == 'event':
+            self.events.append(record['description'])
+        elif record['op'] == 'fold':
+            del self.events[:record['count']]
+            self.memory = {'summary': record['summary'], 'folded': self.memory['folded'] + record['count']}
+
+    def _state(self):
+        return {'rules': self.rules, 'events': self.events, 'memory': self.memory}
 
     def save_state(self):
-        with open('world_state.json', 'w') as f:
-            json.dump({'rules': self.rules, 'events': self.events}, f)
+        """Persist buffered mutations. Returns the bytes written."""
+        with self._lock:
+            written = self.log.flush()
+            if self.log.needs_compaction():
+                before = self.log.bytes_written
+                self.log.compact(self._state())
+                written += self.log.bytes_written - before
+            return written
+
+    def snapshot(self):
+        """Copies of the rules and events, and the memory."""
+        with self._lock:
+            return dict(self.rules), list(self.events), self.memory
+
+    def restore(self, rules, events, memory=None):
+        """Replace all rules, events and the memory, writing them as a fresh snapshot."""
+        with self._lock:
+            self.rules = dict(rules)
+            self.events = list(events)
+            self.memory = dict(memory) if memory else {'summary': "", 'folded': 0}
+            self.epoch += 1
+            self.log.compact(self._state())
+
+    def fold(self, count, summary, epoch):
+        """Replace the oldest ``count`` events by ``summary``. False if the state was restored since ``epoch``."""
+        with self._lock:
+            if epoch != self.epoch or count > len(self.events):
+                return False
+            record = {'op': 'fold', 'count': count, 'summary': summary}
+            self._apply(record)
+            self.log.append(record)
+            return True
 
     def add_rule(self, rule_name, rule_description):
-        self.rules[rule_name] = rule_description
-        self.save_state()
+        with self._lock:
+            self.rules[rule_name] = rule_description
+            self.log.append({'op': 'rule', 'name': rule_name, 'description': rule_description})
 
     def add_event(self, event_description):
-        self.events.append(event_description)
-        self.save_state()
+        with self._lock:
+            self.events.append(event_description)
+            self.log.append({'op': 'event', 'description': event_description})
 
 class Game:
     def __init__(self):
-        self.engine_client = initialize_client(config.ENGINE_LLM_PROVIDER)
-        self.visual_client = initialize_client(config.VISUAL_LLM_PROVIDER)
-
-        self.state_manager = StateManager()
-        self.image_manager = ImageManager()
-        self.video_manager = VideoManager()
+        if config.LLM_WARM_UP_ON_START:
+            warm_up_clients([config.ENGINE_LLM_PROVIDER, config.VISUAL_LLM_PROVIDER])
 
         os.makedirs("./saves", exist_ok=True)
         os.makedirs("./video_tmp", exist_ok=True)
 
-        self.world_map = WorldMap()
+        self.asset_store = AssetStore()
+        self.state_manager = StateManager(asset_store=self.asset_store)
+        self.image_manager = ImageManager(asset_store=self.asset_store)
+        self.video_manager = VideoManager()
+        self.save_slots = SaveSlots(asset_store=self.asset_store)
+        self.persistence = PersistenceWriter(self._commit) if config.PERSISTENCE_WRITER else None
+        self.world_memory = None
+        if config.WORLD_MEMORY:
+            summarizer = (LLMSummarizer(lambda: self.engine_client) if config.WORLD_MEMORY_SUMMARIZER == "llm"
+                          else local_summarizer)
+            self.world_memory = WorldMemory(summarizer, on_fold=self.save_state)
+
+        self.world_map = create_world_map()
+        self.minimap = Minimap(self.world_map)
+        self.map_tiles = MapTiles(self.world_map)
         self.world_state = WorldState()
-        self.chat_history = []
+        self.chat_history = ChatHistory()
         self.current_image = None
         self.new_image = None
         self.current_svg = None
@@ -62,9 +141,27 @@ class Game:
         self.video_processing = False
 
         self.generate_video = config.GENERATE_VIDEO
+        self.turn_usage = {}  # stage -> token usage of the latest turn
+        self.turn_timing = {}  # stage -> seconds, for the latest turn
+        self.context_tokens = None  # estimated engine context size of the latest turn
+        self._turn_started = None
+        self._visual_prefetch = None
+        self._visual_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="visual-prefetch")
         self.load_state()
-        self.video_manager.cleanup_old_videos()
         self.rate_limited = False
+        self.disk_budget = DiskBudget(referenced=self.referenced_files)
+        self.disk_budget.start()
+        if config.PRELOAD_MODULES_ON_START:
+            preload_modules(config.PRELOAD_MODULES)
+
+    # Clients are built on first use, which is when the provider SDK gets imported
+    @property
+    def engine_client(self):
+        return get_client(config.ENGINE_LLM_PROVIDER)
+
+    @property
+    def visual_client(self):
+        return get_client(config.VISUAL_LLM_PROVIDER)
 
     def load_state(self):
         state = self.state_manager.load_game_state(
@@ -73,26 +170,98 @@ class Game:
             self.video_manager
         )
         if state:
-            self.chat_history = state.get('chat_history', [])
+            self.chat_history = state.get('chat_history', ChatHistory())
             self.current_video = state.get('video_path')
             self.current_image = state.get('current_image')
 
+    def referenced_files(self):
+        """Media the live game, the last save, a save slot head or a nearby revisit still uses."""
+        asset_ids = set(self.state_manager.saved_assets) | self.save_slots.head_assets()
+        for image in (self.current_image, self.new_image):
+            if image is not None and image.info.get(ASSET_ID_KEY):
+                asset_ids.add(image.info[ASSET_ID_KEY])
+        if config.REUSE_SCENE_VISUALS:
+            asset_ids |= self.nearby_visual_assets(config.SCENE_VISUALS_KEEP_RADIUS)
+        paths = [self.asset_store.path(asset_id) for asset_id in asset_ids]
+        return paths + [self.current_video] + list(self.video_manager.active_clips)
+
+    def nearby_visual_assets(self, radius):
+        """Image and video asset IDs remembered on tiles at most ``radius`` steps from the player."""
+        cx, cy = self.world_map.current_position
+        asset_ids = set()
+        for x, y in self.world_map.get_region(cx - radius, cy - radius, cx + radius + 1, cy + radius + 1):
+            if abs(x - cx) + abs(y - cy) > radius:
+                continue
+            visuals = self.world_map.cached_visuals(x, y)
+            if visuals:
+                asset_ids.update(asset_id for asset_id in (visuals["image"], visuals["video"]) if asset_id)
+        return asset_ids
+
     def save_state(self):
-        self.state_manager.save_game_state(
+        # The chat history is copied so the writer saves this turn's messages, not later ones
+        args = (
             self.world_map,
             self.world_state,
-            self.chat_history,
+            ChatHistory(self.chat_history.to_list(), max_history=self.chat_history.max_history),
             self.current_video,
             self.current_image
         )
+        if self.persistence:
+            self.persistence.request(*args)
+        else:
+            self._commit(*args)
+
+    def _commit(self, *args):
+        self.state_manager.save_game_state(*args)
+        self.save_slots.flush()
+
+    def checkpoint(self):
+        """Add the current state to the active save slot (written with the next save)."""
+        return self.save_slots.checkpoint(
+            self.world_map, self.world_state, self.chat_history, self.current_video, self.current_image)
+
+    def load_slot(self, slot, checkpoint_id=None):
+        """Switch to a save slot, at its latest checkpoint or at ``checkpoint_id``."""
+        if self.persistence:
+            self.persistence.flush()
+        state = self.save_slots.load(slot, checkpoint_id)
+        if state is None:
+            return False
+        self.world_map.restore(state['tiles'], state['current_position'])
+        self.world_state.restore(state['rules'], state['events'], state['memory'])
+        self.chat_history = ChatHistory(state['history'])
+        self.current_video = self.asset_store.path(state['video']) if self.asset_store.exists(state['video']) else None
+        self.current_image = self.asset_store.open_image(state['image']) if self.asset_store.exists(state['image']) else None
+        self.save_state()
+        return True
+
+    def new_slot(self, slot):
+        """Start a new adventure in ``slot``, leaving the other slots untouched."""
+        self.save_slots.start(slot)
+        self.reset()
+
+    def branch_slot(self, slot, checkpoint_id):
+        """Continue from an earlier checkpoint in a new slot, sharing its saved history."""
+        self.save_slots.branch(slot, checkpoint_id)
+        return self.load_slot(slot)
+
+    def shutdown(self):
+        """Write any pending saves. Also runs at interpreter exit."""
+        if self.world_memory:
+            self.world_memory.close(timeout=config.PERSISTENCE_FLUSH_TIMEOUT)
+        if self.persistence:
+            self.persistence.close(timeout=config.PERSISTENCE_FLUSH_TIMEOUT)
+        self.disk_budget.stop()
 
     def reset(self):
         """Reset the game to initial state."""
         self.world_map.reset()
-        self.world_state = WorldState()
-        self.chat_history = []
+        self.world_state.restore({}, [])
+        self.chat_history.clear()
         self.current_image = None
         self.current_video = None
+        self.save_slots.start(self.save_slots.active)
+        self.checkpoint()
         self.save_state()
 
     def start_video_generation(self, image_path, prompt):
@@ -100,13 +269,10 @@ class Game:
             if rate_limited:
                 self.rate_limited = True
                 self.current_image = self.new_image
-                if self.current_image:
-                    self.image_manager.save_image(self.current_image, "./current_frame.png")
             else:
                 self.current_video = video_path
                 if last_frame:
                     self.current_image = last_frame
-                    self.image_manager.save_image(self.current_image, "./current_frame.png")
                 self.rate_limited = False
             self.video_processing = False
             self.save_state()
@@ -119,35 +285,129 @@ class Game:
             rate_limited_flag=self.rate_limited
         )
 
-    def process_input(self, user_input):
-        current_svg = self.world_map.get_current_svg()
-        current_description = self.world_map.get_current_description()
-
-        context = (
-            f"Current scene SVG: {current_svg}\n"
-            f"Current scene description: {current_description}\n"
-            f"Available directions: {', '.join(self.world_map.get_available_directions())}\n"
-            f"Current world rules: {json.dumps(self.world_state.rules)}\n"
-            f"Recent events: {json.dumps(self.world_state.events[-5:])}\n"
-            f"Player action: {user_input}\n"
+    def build_engine_request(self, user_input):
+        """System blocks and messages for the engine call, trimmed to the context budget."""
+        system_prompt = (config.COMBINED_ENGINE_SYSTEM_PROMPT if config.COMBINED_ENGINE_VISUALS
+                         else config.GAME_ENGINE_SYSTEM_PROMPT)
+        system_blocks, messages, tokens = build_engine_context(
+            system_prompt=system_prompt,
+            rules=self.world_state.rules,
+            scene_svg=self.world_map.get_current_svg(),
+            scene_description=self.world_map.get_current_description(),
+            directions=self.world_map.get_available_directions(),
+            recent_events=self.world_state.events[-config.ENGINE_RECENT_EVENTS:],
+            # chat_history already ends with this turn's action, which goes in the context
+            history=self.chat_history.messages(exclude_last=True),
+            user_input=user_input,
+            budget=config.ENGINE_CONTEXT_TOKEN_BUDGET,
+            memory=self.world_state.memory['summary'],
         )
-        system_prompt = config.GAME_ENGINE_SYSTEM_PROMPT
-
-        self.chat_history = update_chat_history(self.chat_history, "user", user_input)
+        self.context_tokens = tokens
+        logging.info(f"Engine context: ~{tokens} tokens (budget {config.ENGINE_CONTEXT_TOKEN_BUDGET})")
+        return system_blocks, messages
+
+    def record_usage(self, stage, usage):
+        self.turn_usage[stage] = usage
+        if usage.get("cached"):
+            logging.info(f"{stage.capitalize()} tokens: none, replayed from the response cache")
+            return
+        uncached = usage["input_tokens"] - usage["cached_input_tokens"]
+        logging.info(f"{stage.capitalize()} tokens: {usage['input_tokens']} input "
+                     f"({usage['cached_input_tokens']} cached, {uncached} uncached), {usage['output_tokens']} output")
 
-        chat_history = update_chat_history(self.chat_history, "assistant", context)
-        chat_history = update_chat_history(chat_history, "user", user_input)
+    def process_input(self, user_input):
+        self.cancel_visual_prefetch()  # left over from a turn that never reached update_game_state
+        self.turn_usage = {}
+        self.turn_timing = {}
+        self._turn_started = time.perf_counter()
+        tracer.turn = (tracer.turn or 0) + 1
+        self.chat_history.append("user", user_input)
+
+        system_blocks, messages = self.build_engine_request(user_input)
+
+        if config.COMBINED_ENGINE_VISUALS:
+            # Visual fields arrive in the same tool output; nothing to pipeline
+            tools, tools_choice, narrative_callback = config.COMBINED_GAME_TOOLS, config.COMBINED_TOOL_CHOICE, None
+        else:
+            tools, tools_choice = config.GAME_TOOLS, config.GAME_TOOL_CHOICE
+            narrative_callback = self.start_visual_prefetch if config.PIPELINED_TURNS else None
 
         return create_message_stream(
             self.engine_client,
-            system_prompt=system_prompt,
-            chat_history=chat_history,
+            system_prompt=system_blocks,
+            chat_history=messages,
             model=config.ENGINE_LLM_PROVIDER,
-            tools=config.GAME_TOOLS,
-            tools_choice=config.GAME_TOOL_CHOICE
+            tools=tools,
+            tools_choice=tools_choice,
+            usage_callback=lambda usage: self.record_usage("engine", usage),
+            narrative_callback=narrative_callback
+        )
+
+    def _timed_visuals(self, user_input, scene_svg, scene_description, narrative, cancelled=None):
+        started = time.perf_counter()
+        visual_output = self.generate_first_person_visuals(user_input, scene_svg, scene_description, narrative,
+                                                           cancelled=cancelled)
+        return visual_output, started, time.perf_counter()
+
+    def start_visual_prefetch(self, narrative):
+        """Start the visual LLM call as soon as the engine's narrative field has closed.
+
+        Assumes the player stays on the current tile; resolve_visuals redoes the call
+        if the rest of the engine output moves them. Whether they move is only known once
+        the whole output is in, so a revisit that reuses remembered visuals cancels the
+        prefetch instead (see cancel_visual_prefetch).
+        """
+        inputs = (
+            self.chat_history[-1]['content'] if self.chat_history else "",
+            self.world_map.get_current_svg(),
+            self.world_map.get_current_description(),
+            narrative,
         )
-    
-    def generate_first_person_visuals(self, user_input, scene_svg, scene_description, narrative):
+        cancelled = threading.Event()
+        future = self._visual_executor.submit(self._timed_visuals, *inputs, cancelled=cancelled)
+        self._visual_prefetch = (inputs, future, cancelled)
+
+    def cancel_visual_prefetch(self):
+        """Drop the pending prefetch. A queued one never starts; a running one stops reading its stream."""
+        prefetch, self._visual_prefetch = self._visual_prefetch, None
+        if prefetch:
+            _, future, cancelled = prefetch
+            cancelled.set()
+            future.cancel()
+            self.turn_timing["visual_prefetch_cancelled"] = True
+
+    def resolve_visuals(self, user_input, scene_svg, scene_description, narrative):
+        """Visual output for the final turn inputs, reusing the prefetch when they match."""
+        inputs = (user_input, scene_svg, scene_description, narrative)
+        wait_started = time.perf_counter()
+        prefetch = self._visual_prefetch
+
+        if prefetch and prefetch[0] == inputs:
+            self._visual_prefetch = None
+            visual_output, started, finished = prefetch[1].result()
+            self.turn_timing["visual_prefetched"] = True
+        else:
+            if prefetch:
+                logging.info("Scene changed after the narrative; regenerating visuals")
+                self.cancel_visual_prefetch()
+            visual_output, started, finished = self._timed_visuals(*inputs)
+            self.turn_timing["visual_prefetched"] = False
+
+        waited = time.perf_counter() - wait_started
+        self.turn_timing["visual_call"] = finished - started
+        self.turn_timing["visual_wait"] = waited
+        self.turn_timing["visual_hidden"] = max(0.0, (finished - started) - waited)
+        return visual_output
+
+    def generate_first_person_visuals(self, user_input, scene_svg, scene_description, narrative, cancelled=None):
+        """Visual LLM output for the scene, or {} if ``cancelled`` (a threading.Event) is set meanwhile.
+
+        A failed visual stream also gives {}; the error is logged and set on the span.
+        """
+        with tracer.span("generate_first_person_visuals") as span:
+            return self._stream_visuals(span, user_input, scene_svg, scene_description, narrative, cancelled)
+
+    def _stream_visuals(self, span, user_input, scene_svg, scene_description, narrative, cancelled):
         user_input_formatted = (
             f"Previous Action: {user_input}\n"
             f"Result: {narrative}\n"
@@ -156,7 +416,7 @@ class Game:
         )
         system_prompt = config.SVG_GENERATION_SYSTEM_PROMPT
 
-        print(user_input_formatted)
+        logging.debug(f"Visual LLM input:\n{user_input_formatted}")
 
         chat_history = [
             {
@@ -171,22 +431,29 @@ class Game:
             system_prompt=system_prompt,
             model=config.VISUAL_LLM_PROVIDER,
             tools=config.VISUAL_TOOLS,
-            tools_choice=config.VISUAL_TOOL_CHOICE
+            tools_choice=config.VISUAL_TOOL_CHOICE,
+            usage_callback=lambda usage: self.record_usage("visual", usage)
         )
 
+        chunk = None
         try:
             for chunk in visual_stream:
+                if cancelled is not None and cancelled.is_set():
+                    visual_stream.close()
+                    span.set(cancelled=True)
+                    return {}
                 if isinstance(chunk, dict):
                     return chunk.get("visuals", {})
         except Exception as e:
-            print(e)
-            if 'chunk' in locals():
-                print(json.dumps(chunk))
+            logging.exception(f"Visual stream failed after chunk {chunk!r}")
+            span.set(error=repr(e))
         return {}
 
     def update_game_state(self, game_output):
         if not isinstance(game_output, dict):
             return
+        if self._turn_started is not None:
+            self.turn_timing["engine_stream"] = time.perf_counter() - self._turn_started
 
         movement = game_output.get('movement')
         narrative = game_output.get('narrative', '')
@@ -199,7 +466,8 @@ class Game:
         user_input = self.chat_history[-1]['content'] if self.chat_history else ""
 
         # Handle movement
-        if movement and movement != "NONE":
+        moved = bool(movement and movement != "NONE")
+        if moved:
             success, svg, description = self.world_map.move(movement)
 
         # Handle scene updates
@@ -210,42 +478,59 @@ class Game:
             new_description = description or scene.get("scene_description", "")
             self.world_map.update_location(*new_location, new_svg, new_description, tile_color)
 
-        print(json.dumps(game_output))
+        logging.debug(f"Engine output: {json.dumps(game_output)}")
 
-        # Generate visuals
-        visual_output = self.generate_first_person_visuals(
-            user_input,
-            svg,
-            description,
-            narrative=narrative
-        )
+        # Walking back into an unchanged scene shows what was generated there before
+        position = self.world_map.current_position
+        cached = self.reusable_visuals(position) if moved and config.REUSE_SCENE_VISUALS else None
+        self.turn_timing["visuals_reused"] = cached is not None
+
+        # Generate visuals (possibly already started while the engine was streaming)
+        if cached:
+            self.cancel_visual_prefetch()
+            visual_output = cached["output"]
+        elif config.COMBINED_ENGINE_VISUALS and game_output.get("visuals"):
+            visual_output = game_output["visuals"]
+        else:
+            visual_output = self.resolve_visuals(user_input, svg, description, narrative)
         first_person_description = visual_output.get("first_person_description")
         first_person_video = visual_output.get("first_person_video")
         first_person_svg = visual_output.get("first_person_svg")
 
-        print(f"First Person Description:\n{first_person_description}")
-        print(f"First Person Video:\n{first_person_video}")
+        logging.debug(f"First person description: {first_person_description}")
+        logging.debug(f"First person video: {first_person_video}")
 
         self.current_svg = first_person_svg  # for dev UI display
 
-        if first_person_description:
+        reused_video = False
+        if cached:
+            self.new_image = self.asset_store.open_image(cached["image"])
+            reused_video = self.asset_store.exists(cached["video"])
+            if reused_video:
+                self.current_video = self.asset_store.path(cached["video"])
+                self.current_image = self.new_image
+        elif first_person_description:
             new_image = self.image_manager.generate_new_image(visual_output, config)
             if new_image:
                 self.new_image = new_image
-                self.image_manager.save_image(self.new_image, "./temp.png")
+                if config.REUSE_SCENE_VISUALS:
+                    self.world_map.remember_visuals(*position, {
+                        "output": visual_output, "image": self.asset_store.put_image(new_image), "video": None})
         
         # Set current_image if none exists
         if self.current_image is None and self.new_image:
             self.current_image = self.new_image
 
-        # Attempt video generation
-        if self.new_image and not self.video_processing and config.GENERATE_VIDEO and not self.rate_limited:
+        # Attempt video generation, unless the revisited scene already has its video
+        if (self.new_image and not reused_video and not self.video_processing and config.GENERATE_VIDEO
+                and not self.rate_limited):
             video_prompt = config.VIDEO_FIRST_PERSON_MODIFIER.format(prompt=first_person_video)
-            temp_img_path = "./temp.png"
+            # The video input is the stored asset itself, no temp copy
+            image_id = self.asset_store.put_image(self.new_image)
             self.video_manager.start_video_generation(
-                image_path=temp_img_path,
+                image_path=self.asset_store.path(image_id),
                 prompt=video_prompt,
-                callback=self.handle_video_callback,
+                callback=functools.partial(self.handle_video_callback, scene=(position, image_id)),
                 rate_limited_flag=self.rate_limited
             )
 
@@ -262,56 +547,60 @@ class Game:
             for event in events:
                 self.world_state.add_event(event)
 
-        self.chat_history = update_chat_history(self.chat_history, "assistant", narrative)
+        self.chat_history.append("assistant", narrative)
 
+        # One commit per turn, writing only what this turn changed
+        self.checkpoint()
         self.save_state()
-
-    def handle_video_callback(self, video_path, last_frame, rate_limited):
+        if not self.persistence:
+            self.turn_timing["state_bytes"] = self.state_manager.last_commit_bytes
+        if self.world_memory:
+            self.world_memory.maybe_fold(self.world_state, self.chat_history)
+
+        if self._turn_started is not None:
+            self.turn_timing["turn_total"] = time.perf_counter() - self._turn_started
+            tracer.add_span("turn", self._turn_started, time.perf_counter(), context_tokens=self.context_tokens,
+                            usage=self.turn_usage, **self.turn_timing)
+        logging.info("Turn timing: " + ", ".join(
+            f"{stage}={value:.2f}s" if isinstance(value, float) else f"{stage}={value}"
+            for stage, value in self.turn_timing.items()))
+
+    def handle_video_callback(self, video_path, last_frame, rate_limited, scene=None):
         if rate_limited:
             self.rate_limited = True
             self.current_image = self.new_image
-            if self.current_image:
-                self.image_manager.save_image(self.current_image, "./current_frame.png")
         else:
             self.current_video = video_path
             if last_frame:
                 self.current_image = last_frame
-                self.image_manager.save_image(self.current_image, "./current_frame.png")
             self.rate_limited = False
+            if scene and video_path:
+                self.remember_video(*scene, video_path)
         self.video_processing = False
         self.save_state()
 
+    def reusable_visuals(self, position):
+        """Visuals remembered at ``position`` for its current scene, if their image is still stored."""
+        visuals = self.world_map.cached_visuals(*position)
+        if visuals and self.asset_store.exists(visuals["image"]):
+            return visuals
+        return None
+
+    def remember_video(self, position, image_id, video_path):
+        """Add a finished video to the visuals of the tile it was made for.
+
+        Skipped if the tile's visuals were regenerated or its scene changed meanwhile.
+        """
+        visuals = self.world_map.cached_visuals(*position)
+        if visuals and visuals["image"] == image_id:
+            self.world_map.remember_visuals(*position, dict(visuals, video=self.asset_store.put_file(video_path)))
+
     def get_current_image(self):
         return self.current_image
 
     def get_minimap_data(self):
-        minimap_data = []
-        visited_positions = set()
-
-        def dfs(x, y, distance):
-            if distance <= 0:
-                return
-
-            visited_positions.add((x, y))
-            minimap_data.append({
-                'x': x,
-                'y': y,
-                'color': self.world_map.get_location_color(x, y)
-            })
-
-            for direction in self.world_map.get_available_directions():
-                dx, dy = {"N": (0, 1), "S": (0, -1), "E": (1, 0), "W": (-1, 0)}[direction]
-                new_x, new_y = x + dx, y + dy
-                if (new_x, new_y) not in visited_positions:
-                    dfs(new_x, new_y, distance - 1)
-
-        start_x, start_y = self.world_map.current_position
-        dfs(start_x, start_y, 5)  # Explore up to a distance of 5 from the current position
-
-        return {
-            'minimap': minimap_data,
-            'current_position': {'x': start_x, 'y': start_y}
-        }
+        """The minimap window, palette and run-length encoded (see src/minimap.py)."""
+        return self.minimap.data()
 
     def compile_videos(self):
         return self.video_manager.compile_videos()
\ No newline at end of file
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import os
+import threading
+
+import config
+from src.color_grid import CHUNK, PRESENT
+from utils.file_utils import write_atomic
+
+
+def render_cells(cells, size):
+    """RGBA pixels (size x size x 4) of a square array of color grid cells, first row on top.
+
+    Small arrays are scaled up with square cells; large ones are reduced to the average
+    color of the explored cells under each pixel, so a lone explored tile stays visible
+    when zoomed out. Both sides must be powers of two.
+    """
+    import numpy as np
+
+    rgba = np.empty(cells.shape + (4,), dtype=np.uint8)
+    rgba[..., 0] = (cells >> 16) & 0xFF
+    rgba[..., 1] = (cells >> 8) & 0xFF
+    rgba[..., 2] = cells & 0xFF
+    rgba[..., 3] = np.where(cells & PRESENT, 255, 0)
+    n = cells.shape[0]
+    if n <= size:
+        return rgba.repeat(size // n, axis=0).repeat(size // n, axis=1)
+    f = n // size
+    blocks = rgba.reshape(size, f, size, f, 4)
+    present = blocks[..., 3] > 0
+    count = present.sum(axis=(1, 3))
+    rgb = (blocks[..., :3] * present[..., None]).sum(axis=(1, 3), dtype=np.uint32) // np.maximum(count, 1)[..., None]
+    out = np.empty((size, size, 4), dtype=np.uint8)
+    out[..., :3] = rgb
+    out[..., 3] = np.where(count > 0, 255, 0)
+    return out
+
+
+def encode_png(rgba):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, "RGBA").save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+class MapTiles:
+    """PNG tile pyramid of the world map colors, served at /world_tiles/<z>/<x>/<y>.png.
+
+    At ``max_zoom`` a ``tile_size`` pixel tile covers one CHUNK x CHUNK block of the color
+    grid, and every zoom level out doubles the cells per side. Tile x grows east and tile
+    y grows south: tile (x, y) at zoom z spans world x in [x * S, (x + 1) * S) and world y
+    in [-(y + 1) * S, -y * S), with S = CHUNK << (max_zoom - z).
+
+    Rendered tiles are files in ``cache_dir`` named after a hash of their cells, so a tile
+    whose cells did not change is never rendered twice, across restarts too. A served
+    tile's file is remembered until the map reports a color change inside it (through
+    ``WorldMap.color_listeners``); until then requests read neither the map nor the
+    renderer, and an update_location only costs the one tile per zoom level covering it.
+    Tiles without explored cells are not stored.
+    """
+
+    def __init__(self, world_map, cache_dir=config.MAP_TILES_DIR, tile_size=config.MAP_TILE_SIZE,
+                 max_zoom=config.MAP_TILE_MAX_ZOOM):
+        if tile_size % CHUNK or tile_size & (tile_size - 1):
+            raise ValueError(f"tile_size must be a power of two and a multiple of {CHUNK}")
+        self.world_map = world_map
+        self.cache_dir = cache_dir
+        self.tile_size = tile_size
+        self.max_zoom = max_zoom
+        self.renders = 0
+        self.reused = 0  # tiles found on disk under their cell hash
+        self.hits = 0
+        self._fresh = {}  # (z, x, y) -> file path (None when empty), valid until invalidated
+        self._paths = {}  # (z, x, y) -> last file written, removed when superseded
+        self._epoch = 0
+        self._blank = None
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        world_map.color_listeners.append(self.invalidate)
+
+    def span(self, z):
+        """Cells per tile side at zoom ``z``."""
+        return CHUNK << (self.max_zoom - z)
+
+    def invalidate(self, position):
+        """Forget the tiles covering ``position``, or every tile when it is None."""
+        with self._lock:
+            self._epoch += 1
+            if position is None:
+                self._fresh.clear()
+                return
+            x, y = position
+            for z in range(self.max_zoom + 1):
+                span = self.span(z)
+                self._fresh.pop((z, x // span, -(y // span) - 1), None)
+
+    def tile(self, z, x, y):
+        """Path of the PNG for tile (x, y) at zoom ``z``, or None if it has no explored cells."""
+        if not 0 <= z <= self.max_zoom:
+            raise ValueError(f"Zoom must be between 0 and {self.max_zoom}")
+        key = (z, x, y)
+        with self._lock:
+            epoch = self._epoch
+            if key in self._fresh:
+                path = self._fresh[key]
+                if path is None or self._touch(path):
+                    self.hits += 1
+                    return path
+
+        span = self.span(z)
+        cells = self.world_map.get_region_colors(x * span, -(y + 1) * span, (x + 1) * span, -y * span)[::-1]
+        path = None
+        if cells.any():
+            digest = hashlib.blake2b(cells.tobytes(), digest_size=8, key=str(self.tile_size).encode()).hexdigest()
+            path = os.path.join(self.cache_dir, f"{z}_{x}_{y}_{digest}.png")
+            if self._touch(path):
+                with self._lock:
+                    self.reused += 1
+            else:
+                write_atomic(path, encode_png(render_cells(cells, self.tile_size)))
+                with self._lock:
+                    self.renders += 1
+
+        with self._lock:
+            previous = self._paths.get(key)
+            if path:
+                self._paths[key] = path
+            if self._epoch == epoch:  # no color changed meanwhile
+                self._fresh[key] = path
+        if previous and previous != path:
+            try:
+                os.remove(previous)
+            except FileNotFoundError:
+                pass
+        return path
+
+    @staticmethod
+    def _touch(path):
+        # Served tiles count as used for the disk budget
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def blank(self):
+        """A transparent PNG, for tiles with nothing explored."""
+        if self._blank is None:
+            import numpy as np
+
+            self._blank = encode_png(np.zeros((self.tile_size, self.tile_size, 4), dtype=np.uint8))
+        return self._blank
+
+    def view(self, position):
+        """Leaflet (CRS.Simple) coordinates of the center of cell ``position`` at the maximum zoom."""
+        cell = self.tile_size / CHUNK
+        x, y = position
+        return {"lat": (y + 0.5) * cell / 2 ** self.max_zoom, "lng": (x + 0.5) * cell / 2 ** self.max_zoom}
+
+    def stats(self):
+        with self._lock:
+            return {"renders": self.renders, "reused": self.reused, "hits": self.hits,
+                    "fresh": len(self._fresh), "max_zoom": self.max_zoom}
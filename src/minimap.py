@@ -0,0 +1,99 @@
+import hashlib
+import json
+import threading
+
+import config
+from src.color_grid import format_color
+
+
+def encode_window(cells):
+    """Palette and run-length encoding of a 2D array of color grid cells, row by row.
+
+    Returns ``(palette, runs)``: ``palette[0]`` is always None (no tile), the other
+    entries are "#RRGGBB" strings, and ``runs`` is a flat ``[count, palette index, ...]``
+    list covering every cell in order.
+    """
+    import numpy as np
+
+    values, inverse = np.unique(np.concatenate(([0], cells.ravel())), return_inverse=True)
+    inverse = inverse[1:]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(inverse)) + 1))
+    lengths = np.diff(np.concatenate((starts, [inverse.size])))
+    palette = [format_color(value) for value in values]
+    return palette, np.column_stack((lengths, inverse[starts])).ravel().tolist()
+
+
+def decode_window(palette, runs, width):
+    """Rows of colors (None where there is no tile), the inverse of encode_window."""
+    cells = []
+    for count, index in zip(runs[::2], runs[1::2]):
+        cells += [palette[index]] * count
+    return [cells[i:i + width] for i in range(0, len(cells), width)]
+
+
+class Minimap:
+    """The window of tiles around the player, encoded once per map change.
+
+    The window is the ``(2 * radius + 1)`` square centered on the player, rows from north
+    to south, read from the map's color grid and encoded with ``encode_window``. Only
+    tiles at most ``radius`` steps away (``|dx| + |dy| <= radius``) are shown, the diamond
+    the minimap always revealed, so the corners of the square read as unexplored. The
+    encoded payload and its ETag are cached against ``world_map.version``, which only
+    moves and tile changes bump, so polling an unchanged map returns the cached bytes.
+    """
+
+    def __init__(self, world_map, radius=config.MINIMAP_RADIUS):
+        self.world_map = world_map
+        self.radius = radius
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cached = None  # (version, data, body, etag)
+        self._beyond_reach = None  # cells more than radius steps away, built with the first window
+
+    def _build(self):
+        import numpy as np
+
+        cx, cy = self.world_map.current_position
+        r = self.radius
+        if self._beyond_reach is None:
+            offsets = np.abs(np.arange(-r, r + 1))
+            self._beyond_reach = offsets[:, None] + offsets[None, :] > r
+        cells = self.world_map.get_region_colors(cx - r, cy - r, cx + r + 1, cy + r + 1)[::-1]  # north first
+        cells = np.where(self._beyond_reach, cells.dtype.type(0), cells)
+        palette, runs = encode_window(cells)
+        return {
+            'x0': cx - r,
+            'y0': cy + r,  # y of the first (northernmost) row
+            'width': 2 * r + 1,
+            'height': 2 * r + 1,
+            'palette': palette,
+            'runs': runs,
+            'current_position': {'x': cx, 'y': cy},
+        }
+
+    def _current(self):
+        version = self.world_map.version  # read first: a change while building misses next time
+        with self._lock:
+            if self._cached is not None and self._cached[0] == version:
+                self.hits += 1
+                return self._cached
+            self.misses += 1
+            data = self._build()
+            body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            self._cached = (version, data, body, etag)
+            return self._cached
+
+    def data(self):
+        """The window as a dict (shared with the cache, do not modify)."""
+        return self._current()[1]
+
+    def encoded(self):
+        """``(body, etag)``: the window as compact JSON bytes and a strong ETag for them."""
+        _, _, body, etag = self._current()
+        return body, etag
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "radius": self.radius}
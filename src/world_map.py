@@ -1,29 +1,129 @@
+import ast
+import hashlib
 import json
+import os
 import random
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+from utils.file_utils import write_atomic
+
+
+def _parse_position(key):
+    """Parse a saved "(x, y)" key without eval."""
+    return tuple(ast.literal_eval(key))
+
+
+DIRECTIONS = ("N", "S", "E", "W")
+_direction_sets = {}
+
+
+def intern_directions(directions):
+    """The shared tuple for a set of directions, so tiles do not each hold a copy."""
+    key = tuple(directions)
+    return _direction_sets.setdefault(key, key)
+
+
+class Tile:
+    """One map location.
+
+    ``__slots__`` and interned direction tuples keep a tile at a fraction of the size of
+    the dict it replaces, while ``tile["svg"]``, ``tile.get(...)`` and ``dict(tile)`` still
+    work. Change colors through ``WorldMap.update_location`` so the color grid follows.
+
+    ``visuals`` holds the first-person assets last generated on the tile (see
+    ``WorldMap.remember_visuals``). It is not one of the keys and ``to_dict`` only
+    carries it when set.
+    """
+
+    KEYS = ("svg", "description", "directions", "color")
+    __slots__ = KEYS + ("visuals",)
+
+    def __init__(self, svg=None, description=None, directions=DIRECTIONS, color="#FFFFFF", visuals=None):
+        self.svg = svg
+        self.description = description
+        self.directions = intern_directions(directions)
+        self.color = color
+        self.visuals = visuals
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("svg"), data.get("description"), data.get("directions", DIRECTIONS),
+                   data.get("color", "#FFFFFF"), data.get("visuals"))
+
+    def to_dict(self):
+        data = {"svg": self.svg, "description": self.description, "directions": list(self.directions),
+                "color": self.color}
+        if self.visuals:
+            data["visuals"] = self.visuals
+        return data
+
+    def scene_fingerprint(self):
+        """Hash of the scene the first-person visuals are generated from."""
+        scene = f"{self.svg or ''}\0{self.description or ''}".encode('utf-8')
+        return hashlib.blake2b(scene, digest_size=16).hexdigest()
+
+    def keys(self):
+        return self.KEYS
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        setattr(self, key, intern_directions(value) if key == "directions" else value)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if isinstance(other, Tile):
+            other = other.to_dict()
+        elif isinstance(other, dict):
+            other = dict(other, directions=list(other.get("directions", ())))
+        else:
+            return NotImplemented
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Tile({self.to_dict()!r})"
+
 
 class WorldMap:
     def __init__(self):
         self.map = {}
         self.current_position = (0, 0)
+        self.dirty = False  # set by every mutation, cleared by save_state
+        self.changed = set()  # positions changed since the last take_changes (save slot checkpoints)
+        self._grid = None  # ColorGrid, built on the first region query and then kept in sync
+        self.version = 0  # bumped when a tile color or the position changes, e.g. to key the minimap
+        self.color_listeners = []  # called with the position whose color changed, or None for all of them
 
     def get_or_create_location(self, x, y):
         position = (x, y)
         if position not in self.map:
-            available_directions = ["N", "S", "E", "W"]
-            self.map[position] = {
-                "svg": None,
-                "description": None,
-                "directions": available_directions,
-                "color": "#FFFFFF"  # Default color
-            }
+            self.map[position] = Tile()
+            self.dirty = True
+            self.changed.add(position)
+            self._grid_set(position, "#FFFFFF")
         return self.map[position]
 
     def update_location(self, x, y, svg, description, color=None):
         location = self.get_or_create_location(x, y)
-        location["svg"] = svg
-        location["description"] = description
+        location.svg = svg
+        location.description = description
         if color:
-            location["color"] = color
+            location.color = color
+            self._grid_set((x, y), color)
+        self.dirty = True
+        self.changed.add((x, y))
 
     def move(self, direction):
         moves = {"N": (0, 1), "S": (0, -1), "E": (1, 0), "W": (-1, 0)}
@@ -31,6 +131,8 @@ class WorldMap:
             self.current_position[0] + moves[direction][0],
             self.current_position[1] + moves[direction][1]
         )
+        self.dirty = True
+        self.version += 1
         return True, self.get_current_svg(), self.get_current_description()
 
     def get_current_svg(self):
@@ -39,22 +141,377 @@ class WorldMap:
     def get_current_description(self):
         return self.get_or_create_location(*self.current_position).get("description")
 
-    def get_location_color(self, x, y):
-        return self.get_or_create_location(x, y)["color"]
+    def peek(self, x, y):
+        """The tile at (x, y), or None where none exists. Unlike get_or_create_location, creates nothing."""
+        return self.map.get((x, y))
+
+    def get_location_color(self, x, y, default=None):
+        """Color of the tile at (x, y), or ``default`` where none exists. Creates nothing."""
+        tile = self.peek(x, y)
+        return tile.color if tile is not None else default
 
     def get_available_directions(self):
         return self.get_or_create_location(*self.current_position)["directions"]
 
+    def remember_visuals(self, x, y, visuals):
+        """Keep the first-person assets generated at (x, y), stamped with the scene they show.
+
+        ``visuals`` holds the visual LLM "output" and the "image" and "video" asset IDs.
+        """
+        location = self.get_or_create_location(x, y)
+        location.visuals = dict(visuals, fingerprint=location.scene_fingerprint())
+        self.dirty = True
+        self.changed.add((x, y))
+
+    def cached_visuals(self, x, y):
+        """The visuals remembered at (x, y) if its scene has not changed since, else None."""
+        tile = self.peek(x, y)
+        if tile is None or not tile.visuals or tile.visuals.get("fingerprint") != tile.scene_fingerprint():
+            return None
+        return tile.visuals
+
+    def get_region(self, x0, y0, x1, y1):
+        """Colors ("#RRGGBB") of the existing tiles with x0 <= x < x1 and y0 <= y < y1, keyed by position."""
+        from src.color_grid import format_color
+
+        grid = self.get_region_colors(x0, y0, x1, y1)
+        ys, xs = grid.nonzero()
+        return {(x0 + int(x), y0 + int(y)): format_color(grid[y, x]) for y, x in zip(ys, xs)}
+
+    def get_region_colors(self, x0, y0, x1, y1):
+        """Colors of x0 <= x < x1, y0 <= y < y1 as a uint32 array indexed [y - y0, x - x0].
+
+        Cells hold ``color_grid.PRESENT | 0xRRGGBB``, or 0 where no tile exists; nothing
+        is created. The first call builds the color grid from every tile.
+        """
+        if self._grid is None:
+            from src.color_grid import ColorGrid
+
+            grid = ColorGrid()
+            for (x, y), color in self._iter_colors():
+                grid.set(x, y, color)
+            self._grid = grid
+        return self._grid.region(x0, y0, x1, y1)
+
+    def _iter_colors(self):
+        return ((position, tile.color) for position, tile in list(self.map.items()))
+
+    def _grid_set(self, position, color):
+        self.version += 1
+        if self._grid is not None:
+            self._grid.set(*position, color)
+        for listener in self.color_listeners:
+            listener(position)
+
+    def _reset_grid(self):
+        self._grid = None
+        self.version += 1
+        for listener in self.color_listeners:
+            listener(None)
+
+    def take_changes(self):
+        """Copies of the tiles changed since the last call, keyed by position."""
+        changed, self.changed = self.changed, set()
+        return {position: self.get_or_create_location(*position).to_dict() for position in changed}
+
+    def iter_tiles(self):
+        """``(position, tile dict)`` for every tile, e.g. for a full save slot snapshot."""
+        for position, tile in list(self.map.items()):
+            yield position, tile.to_dict()
+
+    def restore(self, tiles, current_position):
+        """Replace the whole map, e.g. with a save slot checkpoint."""
+        self.map = {position: Tile.from_dict(tile) for position, tile in tiles.items()}
+        self._reset_grid()
+        self.current_position = tuple(current_position)
+        self.get_or_create_location(*self.current_position)
+        self.changed = set()
+        self.dirty = True
+
     def save_state(self):
-        with open('world_map.json', 'w') as f:
-            json.dump({"map": {str(k): v for k, v in self.map.items()}, "current_position": self.current_position}, f)
+        """Atomically rewrite world_map.json if anything changed. Returns the bytes written."""
+        if not self.dirty:
+            return 0
+        self.dirty = False  # before serializing, so a concurrent mutation marks it dirty again
+        # list() copies the items atomically, so a save on the writer thread tolerates new tiles
+        tiles = list(self.map.items())
+        data = json.dumps({"map": {str(k): v.to_dict() for k, v in tiles}, "current_position": self.current_position})
+        return write_atomic('world_map.json', data.encode('utf-8'))
 
     def load_state(self):
         try:
             with open('world_map.json', 'r') as f:
                 state = json.load(f)
-            self.map = {eval(k): v for k, v in state["map"].items()}
+            self.map = {_parse_position(k): Tile.from_dict(v) for k, v in state["map"].items()}
+            self._reset_grid()
             self.current_position = tuple(state["current_position"])
+            self.dirty = False
         except FileNotFoundError:
             print("Map not found.")
-            self.get_or_create_location(0, 0)
\ No newline at end of file
+            self.get_or_create_location(0, 0)
+
+    def reset(self):
+        self.map = {}
+        self._reset_grid()
+        self.current_position = (0, 0)
+        self.changed = set()
+        self.get_or_create_location(0, 0)
+        self.dirty = True
+
+
+_UNLOADED = object()  # svg/description/visuals not fetched from the database yet
+
+
+def _dump_visuals(visuals):
+    return json.dumps(visuals) if visuals else None
+
+
+def _load_visuals(data):
+    return json.loads(data) if data else None
+
+
+class SQLiteWorldMap(WorldMap):
+    """WorldMap stored in SQLite, one row per tile keyed on (x, y).
+
+    Loading reads only the current position. Tiles are fetched on demand into an LRU of
+    ``cache_size`` hot tiles, and color lookups (the minimap) skip the SVG and description
+    bodies, which are fetched the first time they are read. ``save_state`` upserts only
+    the tiles changed since the last save, in one transaction. An existing world_map.json
+    is imported the first time an empty database is loaded.
+    """
+
+    def __init__(self, db_path=config.WORLD_MAP_DB_PATH, cache_size=config.WORLD_MAP_TILE_CACHE,
+                 json_path='world_map.json'):
+        self.db_path = db_path
+        self.json_path = json_path
+        self.cache_size = cache_size
+        self.current_position = (0, 0)
+        self.dirty = False
+        self.changed = set()
+        self._grid = None
+        self.version = 0
+        self.color_listeners = []
+        self._tiles = OrderedDict()  # LRU of position -> tile
+        self._dirty_tiles = {}  # position -> tile, kept out of the LRU until saved
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tiles (
+                x INTEGER NOT NULL,
+                y INTEGER NOT NULL,
+                color TEXT NOT NULL,
+                directions TEXT NOT NULL,
+                svg TEXT,
+                description TEXT,
+                visuals TEXT,
+                PRIMARY KEY (x, y)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tiles)")}
+        if "visuals" not in columns:  # databases written before tiles kept their visuals
+            self._conn.execute("ALTER TABLE tiles ADD COLUMN visuals TEXT")
+
+    @property
+    def map(self):
+        """Every tile, fully loaded. Only for small worlds and exports."""
+        with self._lock:
+            rows = self._conn.execute("SELECT x, y, color, directions, svg, description, visuals FROM tiles").fetchall()
+            tiles = {(x, y): Tile(svg, description, json.loads(directions), color, _load_visuals(visuals))
+                     for x, y, color, directions, svg, description, visuals in rows}
+            tiles.update(self._dirty_tiles)
+            return tiles
+
+    def _cache(self, position, tile):
+        self._tiles[position] = tile
+        self._tiles.move_to_end(position)
+        while len(self._tiles) > self.cache_size:
+            self._tiles.popitem(last=False)
+
+    def _fetch(self, position, bodies):
+        """Cached or stored tile (None if it does not exist), with bodies loaded if asked."""
+        tile = self._dirty_tiles.get(position)
+        if tile is not None:
+            return tile
+        tile = self._tiles.get(position)
+        if tile is None:
+            row = self._conn.execute("SELECT color, directions FROM tiles WHERE x = ? AND y = ?", position).fetchone()
+            if row is None:
+                return None
+            tile = Tile(_UNLOADED, _UNLOADED, json.loads(row[1]), row[0], _UNLOADED)
+        if bodies and tile.svg is _UNLOADED:
+            tile.svg, tile.description, visuals = self._conn.execute(
+                "SELECT svg, description, visuals FROM tiles WHERE x = ? AND y = ?", position).fetchone()
+            tile.visuals = _load_visuals(visuals)
+        self._cache(position, tile)
+        return tile
+
+    def _mark_dirty(self, position, tile, recolor=True):
+        self._dirty_tiles[position] = tile
+        self._tiles.pop(position, None)
+        self.dirty = True
+        self.changed.add(position)
+        if recolor:
+            self._grid_set(position, tile.color)
+
+    def get_or_create_location(self, x, y):
+        position = (x, y)
+        with self._lock:
+            tile = self._fetch(position, bodies=True)
+            if tile is None:
+                tile = Tile()
+                self._mark_dirty(position, tile)
+            return tile
+
+    def update_location(self, x, y, svg, description, color=None):
+        with self._lock:
+            location = self.get_or_create_location(x, y)
+            location.svg = svg
+            location.description = description
+            if color:
+                location.color = color
+            self._mark_dirty((x, y), location)
+
+    def remember_visuals(self, x, y, visuals):
+        with self._lock:
+            location = self.get_or_create_location(x, y)
+            location.visuals = dict(visuals, fingerprint=location.scene_fingerprint())
+            self._mark_dirty((x, y), location, recolor=False)
+
+    def move(self, direction):
+        with self._lock:
+            return super().move(direction)
+
+    def take_changes(self):
+        with self._lock:
+            return super().take_changes()
+
+    def get_region_colors(self, x0, y0, x1, y1):
+        with self._lock:
+            return super().get_region_colors(x0, y0, x1, y1)
+
+    def _iter_colors(self):
+        for x, y, color in self._conn.execute("SELECT x, y, color FROM tiles"):
+            if (x, y) not in self._dirty_tiles:
+                yield (x, y), color
+        for position, tile in self._dirty_tiles.items():
+            yield position, tile.color
+
+    def iter_tiles(self):
+        """Every tile as ``(position, dict)``, streamed from the database rather than the LRU.
+
+        Neither builds Tile objects nor touches the cache, so a full snapshot of a large
+        world does not evict the hot tiles. Unsaved changes come from memory.
+        """
+        with self._lock:
+            dirty = dict(self._dirty_tiles)
+            rows = self._conn.execute("SELECT x, y, color, directions, svg, description, visuals FROM tiles")
+            for x, y, color, directions, svg, description, visuals in rows:
+                if (x, y) in dirty:
+                    continue
+                tile = {"svg": svg, "description": description, "directions": json.loads(directions), "color": color}
+                if visuals:
+                    tile["visuals"] = json.loads(visuals)
+                yield (x, y), tile
+            for position, tile in dirty.items():
+                yield position, tile.to_dict()
+
+    def restore(self, tiles, current_position):
+        rows = [(x, y, tile.get("color", "#FFFFFF"), json.dumps(tile.get("directions", ["N", "S", "E", "W"])),
+                 tile.get("svg"), tile.get("description"), _dump_visuals(tile.get("visuals")))
+                for (x, y), tile in tiles.items()]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tiles")
+            self._conn.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_position', ?)",
+                               (json.dumps(list(current_position)),))
+            self._tiles.clear()
+            self._reset_grid()
+            self._dirty_tiles = {}
+            self.current_position = tuple(current_position)
+            self.get_or_create_location(*self.current_position)
+            self.changed = set()
+
+    def peek(self, x, y):
+        with self._lock:
+            return self._fetch((x, y), bodies=True)
+
+    def get_location_color(self, x, y, default=None):
+        with self._lock:
+            tile = self._fetch((x, y), bodies=False)
+            return tile.color if tile is not None else default
+
+    def save_state(self):
+        """Upsert the tiles changed since the last save. Returns the bytes of row data written."""
+        with self._lock:
+            if not self.dirty:
+                return 0
+            rows = [(x, y, tile["color"], json.dumps(tile["directions"]), tile["svg"], tile["description"],
+                     _dump_visuals(tile.visuals)) for (x, y), tile in self._dirty_tiles.items()]
+            position = json.dumps(self.current_position)
+            with self._conn:
+                self._conn.executemany("""
+                    INSERT INTO tiles (x, y, color, directions, svg, description, visuals)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (x, y) DO UPDATE SET color = excluded.color, directions = excluded.directions,
+                        svg = excluded.svg, description = excluded.description, visuals = excluded.visuals
+                """, rows)
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_position', ?)", (position,))
+            for (x, y), tile in self._dirty_tiles.items():
+                self._cache((x, y), tile)
+            self._dirty_tiles = {}
+            self.dirty = False
+            return len(position) + sum(16 + sum(len(value or "") for value in row[2:]) for row in rows)
+
+    def load_state(self):
+        with self._lock:
+            self._tiles.clear()
+            self._reset_grid()
+            self._dirty_tiles = {}
+            self.dirty = False
+            has_tiles = self._conn.execute("SELECT 1 FROM tiles LIMIT 1").fetchone()
+            if not has_tiles and self.json_path and os.path.exists(self.json_path):
+                self.migrate_json(self.json_path)
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'current_position'").fetchone()
+            self.current_position = tuple(json.loads(row[0])) if row else (0, 0)
+            self.get_or_create_location(*self.current_position)
+
+    def migrate_json(self, json_path):
+        """Import a world_map.json written by the JSON WorldMap."""
+        with open(json_path, 'r') as f:
+            state = json.load(f)
+        rows = []
+        for key, tile in state["map"].items():
+            x, y = _parse_position(key)
+            rows.append((x, y, tile.get("color", "#FFFFFF"), json.dumps(tile.get("directions", ["N", "S", "E", "W"])),
+                         tile.get("svg"), tile.get("description"), _dump_visuals(tile.get("visuals"))))
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('current_position', ?)",
+                               (json.dumps(list(state["current_position"])),))
+        print(f"Migrated {len(rows)} tiles from {json_path} to {self.db_path}")
+
+    def reset(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tiles")
+            self._conn.execute("DELETE FROM meta")
+            self._tiles.clear()
+            self._reset_grid()
+            self._dirty_tiles = {}
+            self.current_position = (0, 0)
+            self.changed = set()
+            self.get_or_create_location(0, 0)
+
+    def close(self):
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+def create_world_map():
+    """The WorldMap for the configured storage backend."""
+    if config.WORLD_MAP_BACKEND == "sqlite":
+        return SQLiteWorldMap()
+    return WorldMap()
@@ -0,0 +1,62 @@
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from utils.asset_store import AssetStore
+
+
+def jpeg_bytes(color):
+    buffered = io.BytesIO()
+    Image.new("RGB", (16, 9), color).save(buffered, format="JPEG")
+    return buffered.getvalue()
+
+
+class TestAssetStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.store = AssetStore(os.path.join(self.tmp.name, "assets"))
+
+    def test_same_content_is_stored_once(self):
+        first = self.store.put_bytes(b"frame", "png")
+        second = self.store.put_bytes(b"frame", "png")
+        self.assertEqual(first, second)
+        self.assertEqual(os.listdir(self.store.root), [first])
+        self.assertEqual(self.store.bytes_written, 5)
+        self.assertEqual(self.store.deduplicated, 1)
+
+    def test_put_file_hashes_content(self):
+        path = os.path.join(self.tmp.name, "video_0.mp4")
+        with open(path, "wb") as f:
+            f.write(b"clip" * 1000)
+        asset_id = self.store.put_file(path)
+        self.assertTrue(asset_id.endswith(".mp4"))
+        self.assertEqual(self.store.put_file(path), asset_id)
+        self.assertEqual(self.store.bytes_written, 4000)
+
+    def test_generated_image_keeps_provider_encoding(self):
+        data = jpeg_bytes("red")
+        image = Image.open(io.BytesIO(data))
+        asset_id = self.store.put_image(image, data, "jpeg")
+        with open(self.store.path(asset_id), "rb") as f:
+            self.assertEqual(f.read(), data)
+        # Saving the same image again neither encodes nor writes
+        written = self.store.bytes_written
+        self.assertEqual(self.store.put_image(image), asset_id)
+        self.assertEqual(self.store.bytes_written, written)
+
+    def test_open_image_decodes_lazily(self):
+        asset_id = self.store.put_bytes(jpeg_bytes("blue"), "jpeg")
+        image = self.store.open_image(asset_id)
+        self.assertTrue(image.tile)  # header read, pixels not decoded yet
+        self.assertEqual(image.getpixel((0, 0))[2] > 200, True)
+        self.assertFalse(image.tile)
+        self.assertEqual(self.store.put_image(image), asset_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import config
+from utils.llm_utils import acreate_message_stream, initialize_async_client
+
+CONCURRENT_STREAMS = 200
+DELTA_SIZE = 16
+DELTA_LATENCY = 0.005
+
+
+def tool_payload(i):
+    return json.dumps({
+        "narrative": f"```html\n<p>Turn {i}: the \\\"door\\\" creaks open.</p>\n```",
+        "events": [f"Door {i} opened"],
+        "scene": None,
+        "movement": "NONE",
+        "rule_updates": None,
+    })
+
+
+class FakeOpenAIStream:
+    def __init__(self, payload):
+        self.deltas = [payload[i:i + DELTA_SIZE] for i in range(0, len(payload), DELTA_SIZE)]
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for delta in self.deltas:
+            await asyncio.sleep(DELTA_LATENCY)
+            function = SimpleNamespace(arguments=delta)
+            delta_obj = SimpleNamespace(tool_calls=[SimpleNamespace(function=function)])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta_obj)])
+
+
+class FakeAsyncOpenAI:
+    """Local stand-in for openai.AsyncClient's streamed chat completions."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, **kwargs):
+        await asyncio.sleep(DELTA_LATENCY)
+        return FakeOpenAIStream(tool_payload(messages[-1]["content"]))
+
+
+class FakeAnthropicStream:
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        for i in range(0, len(self.payload), DELTA_SIZE):
+            await asyncio.sleep(DELTA_LATENCY)
+            delta = SimpleNamespace(type="input_json_delta", partial_json=self.payload[i:i + DELTA_SIZE])
+            yield SimpleNamespace(type="content_block_delta", delta=delta)
+
+    async def get_final_message(self):
+        block = SimpleNamespace(type="tool_use", input=json.loads(self.payload))
+        return SimpleNamespace(content=[block])
+
+
+class FakeAsyncAnthropic:
+    """Local stand-in for anthropic.AsyncAnthropic's messages.stream."""
+
+    def __init__(self):
+        self.messages = SimpleNamespace(stream=self._stream)
+
+    def _stream(self, messages, **kwargs):
+        return FakeAnthropicStream(tool_payload(messages[-1]["content"]))
+
+
+async def consume(client, i, started, tools=None, tools_choice=None):
+    narrative, final = "", None
+    stream = acreate_message_stream(client, chat_history=[{"role": "user", "content": str(i)}],
+                                    tools=tools, tools_choice=tools_choice)
+    async for chunk in stream:
+        if isinstance(chunk, str):
+            if not narrative:
+                started()
+            narrative += chunk
+        elif isinstance(chunk, dict):
+            final = chunk
+    return narrative, final
+
+
+async def run_all(client, streams, **kwargs):
+    """Results of ``streams`` concurrent streams, and the thread count once all of them are in flight."""
+    in_flight = asyncio.Event()
+    started = []
+
+    def on_start():
+        started.append(True)
+        if len(started) == streams:
+            in_flight.set()
+
+    async def sample_threads():
+        await in_flight.wait()
+        return threading.active_count()
+
+    sampler = asyncio.create_task(sample_threads())
+    results = await asyncio.gather(*(consume(client, i, on_start, **kwargs) for i in range(streams)))
+    return results, await sampler
+
+
+class TestAsyncMessageStream(unittest.TestCase):
+
+    def run_concurrent(self, provider, client):
+        threads_before = threading.active_count()
+        with patch("config.LLM_PROVIDER", provider), patch("config.LLM_RESPONSE_CACHE", False):
+            start = time.perf_counter()
+            results, threads_in_flight = asyncio.run(run_all(client, CONCURRENT_STREAMS))
+            wall_time = time.perf_counter() - start
+
+        per_stream = DELTA_LATENCY * (len(tool_payload(0)) // DELTA_SIZE + 1)
+        print(f"\n{provider}: {CONCURRENT_STREAMS} streams in {wall_time:.2f}s "
+              f"(~{per_stream:.2f}s each sequentially), threads {threads_before} -> {threads_in_flight} in flight")
+
+        for i, (narrative, final) in enumerate(results):
+            self.assertEqual(narrative, final["narrative"])
+            self.assertEqual(final["events"], [f"Door {i} opened"])
+        # One event loop thread drives every stream at once; nothing close to serial time
+        self.assertEqual(threads_in_flight, threads_before)
+        self.assertLess(wall_time, per_stream * CONCURRENT_STREAMS / 10)
+
+    def test_openai_concurrent_streams(self):
+        self.run_concurrent("openai", FakeAsyncOpenAI())
+
+    def test_anthropic_concurrent_streams(self):
+        self.run_concurrent("anthropic", FakeAsyncAnthropic())
+
+    def test_cache_disk_io_runs_off_the_event_loop(self):
+        from utils import llm_utils
+
+        disk_threads = []
+
+        def recording(method):
+            def wrapper(cache, *args):
+                disk_threads.append(threading.current_thread())
+                return method(cache, *args)
+            return wrapper
+
+        async def twice():
+            loop_thread = threading.current_thread()
+            for _ in range(2):  # a miss recorded, then a hit replayed
+                await consume(FakeAsyncOpenAI(), 0, lambda: None)
+            return loop_thread
+
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                patch.multiple(config, LLM_PROVIDER="openai", LLM_RESPONSE_CACHE=True, LLM_RESPONSE_CACHE_DIR=cache_dir), \
+                patch.object(llm_utils, "_response_cache", None), \
+                patch.object(llm_utils.ResponseCache, "get", recording(llm_utils.ResponseCache.get)), \
+                patch.object(llm_utils.ResponseCache, "put", recording(llm_utils.ResponseCache.put)):
+            loop_thread = asyncio.run(twice())
+            self.assertEqual(llm_utils.get_response_cache().stats()["hits"], 1)
+        self.assertEqual(len(disk_threads), 3)  # get, put, get
+        self.assertNotIn(loop_thread, disk_threads)
+
+    def test_error_yields_none(self):
+        class BrokenClient:
+            chat = SimpleNamespace(completions=SimpleNamespace(create=None))
+
+        async def collect():
+            return [chunk async for chunk in acreate_message_stream(BrokenClient())]
+
+        with patch("config.LLM_PROVIDER", "openai"), patch("config.LLM_RESPONSE_CACHE", False), \
+                self.assertLogs(level="ERROR"):
+            self.assertEqual(asyncio.run(collect()), [None])
+
+
+class TestAsyncClientsAgainstFakeServer(unittest.TestCase):
+    """initialize_async_client against utils/fake_providers running in another process.
+
+    The server's handler threads live in that process, so this process's thread count
+    only reflects the client side.
+    """
+
+    STREAMS = 50
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = subprocess.Popen(
+            [sys.executable, "-u", "-m", "utils.fake_providers", "--realistic", "--ephemeral"],
+            stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        cls.urls = {}
+        for line in cls.server.stdout:
+            if line.startswith("Run the game"):
+                break
+            name, url = line.split()
+            cls.urls[name] = url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        cls.server.stdout.close()
+
+    def run_against_server(self, provider, tools, tools_choice):
+        async def main():
+            client = initialize_async_client(provider)
+            try:
+                # The SDK looks up platform details in a worker thread on a client's first
+                # request; after that, streams need no threads at all
+                await consume(client, "warm-up", lambda: None, tools=tools, tools_choice=tools_choice)
+                threads_before = threading.active_count()
+                start = time.perf_counter()
+                results, threads_in_flight = await run_all(client, self.STREAMS, tools=tools, tools_choice=tools_choice)
+                return results, threads_before, threads_in_flight, time.perf_counter() - start
+            finally:
+                await client.close()
+
+        with patch.multiple(config, LLM_PROVIDER=provider, LLM_RESPONSE_CACHE=False, FAKE_PROVIDERS=True,
+                            OPENAI_BASE_URL=self.urls["openai"] + "/v1", ANTHROPIC_BASE_URL=self.urls["anthropic"]):
+            results, threads_before, threads_in_flight, wall_time = asyncio.run(main())
+
+        print(f"\n{provider} (fake server): {self.STREAMS} streams in {wall_time:.2f}s, "
+              f"threads {threads_before} -> {threads_in_flight} in flight")
+        for narrative, final in results:
+            self.assertEqual(narrative, final["narrative"])
+        self.assertEqual(threads_in_flight, threads_before)
+        # Realistic latency is about 0.5s to the first byte plus 20ms per chunk for each stream
+        self.assertLess(wall_time, self.STREAMS * 0.5 / 5)
+
+    def test_openai(self):
+        self.run_against_server("openai", config.GAME_TOOLS, config.GAME_TOOL_CHOICE)
+
+    def test_anthropic(self):
+        tools = [{"name": "game_output", "input_schema": {"type": "object"}}]
+        self.run_against_server("anthropic", tools, {"type": "tool", "name": "game_output"})
+
+
+if __name__ == '__main__':
+    unittest.main()
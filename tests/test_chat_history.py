@@ -0,0 +1,84 @@
+import json
+import sys
+import threading
+import unittest
+from utils.chat_history import ChatHistory
+
+
+class TestChatHistory(unittest.TestCase):
+
+    def test_bounded(self):
+        history = ChatHistory(max_history=4)
+        for i in range(10):
+            history.append("user", f"action {i}")
+            history.append("assistant", f"narrative {i}")
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history[0], {"role": "user", "content": "action 8"})
+        self.assertEqual(history[-1]["content"], "narrative 9")
+
+    def test_alternation_enforced(self):
+        history = ChatHistory()
+        history.append("assistant", "orphan narrative")
+        self.assertEqual(len(history), 0)
+        history.append("user", "first try")
+        history.append("user", "retry")
+        history.append("assistant", "ok")
+        self.assertEqual([m["content"] for m in history], ["retry", "ok"])
+
+    def test_head_is_user_after_eviction(self):
+        history = ChatHistory(max_history=3)
+        history.append("user", "a")
+        history.append("assistant", "b")
+        history.append("user", "c")
+        history.append("assistant", "d")
+        self.assertEqual([m["role"] for m in history], ["user", "assistant"])
+
+    def test_payload_view_shares_messages(self):
+        history = ChatHistory([{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"},
+                               {"role": "user", "content": "c"}])
+        view = history.messages(exclude_last=True)
+        self.assertEqual([m["content"] for m in view], ["a", "b"])
+        self.assertIs(view[0], history[0])
+
+    def test_round_trip_from_legacy_list(self):
+        legacy = [{"role": "user", "content": str(i)} if i % 2 == 0 else {"role": "assistant", "content": str(i)}
+                  for i in range(14)]
+        history = ChatHistory.from_list(legacy, max_history=10)
+        self.assertEqual(len(history), 10)
+        restored = ChatHistory.from_list(json.loads(json.dumps(history.to_list())), max_history=10)
+        self.assertEqual(restored.to_list(), history.to_list())
+        self.assertEqual(len(ChatHistory.from_list(None)), 0)
+
+    def test_fold_thread_reads_and_drops_while_the_game_appends(self):
+        history = ChatHistory(max_history=8)
+        errors = []
+        done = threading.Event()
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+
+        def fold():
+            try:
+                while not done.is_set():
+                    for _ in history:
+                        pass
+                    messages = history.messages(exclude_last=True)
+                    history.drop(messages[:2])
+            except Exception as e:
+                errors.append(e)
+
+        folder = threading.Thread(target=fold)
+        folder.start()
+        try:
+            for i in range(100000):
+                history.append("user", f"action {i}")
+                history.append("assistant", f"narrative {i}")
+        finally:
+            done.set()
+            folder.join()
+        self.assertEqual(errors, [])
+        self.assertTrue(all(message["role"] == "user" for message in history.to_list()[:1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
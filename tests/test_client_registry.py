@@ -0,0 +1,61 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+import config
+from utils import llm_utils
+
+
+class TestClientRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.requests = []
+        self.fail = False
+        patchers = [
+            patch.dict(os.environ, {"OPENAI_API_KEY": "key-a", "ANTHROPIC_API_KEY": "key-b"}),
+            patch.multiple(config, OPENAI_BASE_URL="http://openai.test/v1", ANTHROPIC_BASE_URL="http://anthropic.test"),
+            patch.object(llm_utils, "_build_http_client", self.build_http_client),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        llm_utils.close_clients()
+        self.addCleanup(llm_utils.close_clients)
+
+    def build_http_client(self):
+        def handler(request):
+            if self.fail:
+                raise httpx.ConnectError("connection refused", request=request)
+            self.requests.append((request.method, str(request.url)))
+            return httpx.Response(404)
+
+        return httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_one_client_per_provider_and_key(self):
+        openai_client = llm_utils.get_client("openai")
+        self.assertIs(llm_utils.get_client("openai"), openai_client)
+        self.assertIsNot(llm_utils.get_client("anthropic"), openai_client)
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "key-c"}):
+            rotated = llm_utils.get_client("openai")
+        self.assertIsNot(rotated, openai_client)
+        self.assertEqual(rotated.api_key, "key-c")
+
+    def test_warm_up_goes_through_the_pooled_transport(self):
+        llm_utils.warm_up_clients(["openai", "anthropic", "openai"], background=False)
+        self.assertEqual(sorted(self.requests), [("HEAD", "http://anthropic.test"), ("HEAD", "http://openai.test/v1/")])
+
+    def test_warm_up_failures_are_swallowed(self):
+        self.fail = True
+        with self.assertLogs(level="WARNING") as logs:
+            llm_utils.warm_up_clients(["openai"], background=False)
+        with patch.dict(os.environ, {"ANTHROPIC_API_KEY": ""}), patch.object(config, "FAKE_PROVIDERS", False), \
+                self.assertLogs(level="WARNING") as missing_key:
+            llm_utils.warm_up_clients(["anthropic"], background=False)
+        self.assertIn("Warm-up failed for openai", logs.output[0])
+        self.assertIn("ANTHROPIC_API_KEY", missing_key.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from utils.context_utils import ContextSection, assemble_context, build_engine_context, estimate_tokens
+from utils.llm_utils import _anthropic_usage, _openai_usage
+
+
+class TestContextAssembler(unittest.TestCase):
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("a b, c"), 4)
+        self.assertEqual(estimate_tokens("extraordinarily"), 4)
+
+    def test_under_budget_is_untouched(self):
+        sections = assemble_context([ContextSection("text", 1, text="hello there")], budget=100)
+        self.assertEqual(sections["text"].text, "hello there")
+        self.assertEqual(sections["text"].omitted, 0)
+
+    def test_lowest_priority_trimmed_first(self):
+        sections = assemble_context([
+            ContextSection("action", 100, text="open the door", required=True),
+            ContextSection("events", 70, items=["event one", "event two"]),
+            ContextSection("history", 30, items=[f"message {i}" for i in range(10)]),
+        ], budget=15)
+        self.assertEqual(sections["events"].items, ["event one", "event two"])
+        self.assertEqual(sections["history"].items, ["message 9"])
+        self.assertEqual(sections["history"].omitted, 9)
+
+    def test_elide_whole_and_required(self):
+        sections = assemble_context([
+            ContextSection("action", 100, text="word " * 50, required=True),
+            ContextSection("svg", 40, text="<svg>" + "<rect/>" * 20 + "</svg>", elide_whole=True),
+        ], budget=10)
+        self.assertEqual(sections["svg"].text, "")
+        self.assertEqual(sections["action"].text, "word " * 50)
+
+    def test_engine_context_fits_budget_and_keeps_alternation(self):
+        history = []
+        for i in range(20):
+            history += [{"role": "user", "content": f"action {i}"},
+                        {"role": "assistant", "content": "narrative " * 40}]
+        rules = {f"rule {i}": "description " * 10 for i in range(30)}
+        args = ("system", rules, "<svg>" + "<rect/>" * 200 + "</svg>", "a cave", ["N", "S"],
+                ["e1", "e2"], history, "look around", 600)
+
+        system_blocks, messages, tokens = build_engine_context(*args)
+        self.assertLessEqual(tokens, 600)
+        self.assertEqual(messages[0]["role"], "user")
+        self.assertEqual([m["role"] for m in messages[:-1]], ["user", "assistant"] * ((len(messages) - 1) // 2))
+        self.assertIn("Player action: look around", messages[-1]["content"])
+        self.assertIn("omitted", system_blocks[2]["text"])
+        # Same state, same bytes
+        self.assertEqual(build_engine_context(*args), (system_blocks, messages, tokens))
+
+
+class TestPromptCaching(unittest.TestCase):
+
+    def build(self, turn, memory="The player crossed the courtyard."):
+        history = [{"role": "user", "content": f"action {turn - 1}"},
+                   {"role": "assistant", "content": f"narrative {turn - 1}"}]
+        return build_engine_context(
+            "system prompt", {"gravity": "normal"}, "<svg/>", f"scene description {turn}", ["N", "S"],
+            [f"event {turn}"], history, f"player action {turn}", 6000, memory=memory)
+
+    @staticmethod
+    def breakpoints(system_blocks):
+        return [block["text"].split(":")[0] for block in system_blocks if "cache_control" in block]
+
+    def test_stable_prefix_has_at_most_three_breakpoints_in_order(self):
+        system_blocks, _, _ = self.build(1)
+        self.assertEqual(system_blocks[0]["text"], "system prompt")
+        self.assertNotIn("cache_control", system_blocks[0])
+        self.assertEqual(self.breakpoints(system_blocks),
+                         ["Current world rules", "World memory (earlier events)", "Current scene SVG"])
+        self.assertEqual(self.breakpoints(self.build(1, memory="")[0]), ["Current world rules", "Current scene SVG"])
+        # Anything that changes per turn leaves the prefix byte for byte the same
+        self.assertEqual(self.build(2)[0], system_blocks)
+
+    def test_volatile_context_only_in_last_user_message(self):
+        system_blocks, messages, _ = self.build(7)
+        self.assertEqual(messages[-1]["role"], "user")
+        earlier = [block["text"] for block in system_blocks] + [message["content"] for message in messages[:-1]]
+        for volatile in ("scene description 7", "event 7", "player action 7"):
+            self.assertIn(volatile, messages[-1]["content"])
+            self.assertFalse(any(volatile in text for text in earlier), volatile)
+
+    def test_usage_parsers_report_cache_reads_and_writes(self):
+        from anthropic.types import Usage
+        from openai.types import CompletionUsage
+
+        # Shaped like the message_start usage of utils/fake_providers.FakeAnthropic
+        anthropic_usage = Usage.model_validate({"input_tokens": 120, "output_tokens": 40,
+                                                "cache_read_input_tokens": 900, "cache_creation_input_tokens": 300})
+        self.assertEqual(_anthropic_usage(anthropic_usage), {
+            "input_tokens": 1320, "cached_input_tokens": 900, "cache_write_tokens": 300, "output_tokens": 40})
+        self.assertEqual(_anthropic_usage(Usage.model_validate({"input_tokens": 120, "output_tokens": 40})),
+                         {"input_tokens": 120, "cached_input_tokens": 0, "cache_write_tokens": 0, "output_tokens": 40})
+
+        # And like the final usage chunk of FakeOpenAI; OpenAI caches without a separate write charge
+        openai_usage = CompletionUsage.model_validate({"prompt_tokens": 1320, "completion_tokens": 40, "total_tokens": 1360,
+                                                       "prompt_tokens_details": {"cached_tokens": 1024}})
+        self.assertEqual(_openai_usage(openai_usage), {
+            "input_tokens": 1320, "cached_input_tokens": 1024, "cache_write_tokens": 0, "output_tokens": 40})
+        no_details = CompletionUsage.model_validate({"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12})
+        self.assertEqual(_openai_usage(no_details)["cached_input_tokens"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
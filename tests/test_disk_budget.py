@@ -0,0 +1,103 @@
+import os
+import tempfile
+import time
+import unittest
+
+from utils.asset_store import AssetStore
+from utils.disk_budget import DiskBudget
+from utils.video_utils import VideoManager
+
+
+class TestDiskBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = os.path.join(self.tmp.name, "media")
+        os.makedirs(self.root)
+        self.referenced = set()
+
+    def write(self, name, size, age):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as f:
+            f.write(b"\0" * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def budget(self, max_bytes=10_000, max_age=None, scan_batch=2):
+        return DiskBudget([self.root], max_bytes=max_bytes, max_age=max_age,
+                          referenced=lambda: self.referenced, scan_batch=scan_batch)
+
+    def test_scan_is_incremental(self):
+        for i in range(5):
+            self.write(f"clip_{i}.mp4", 100, i)
+        self.write("notes.txt", 100, 0)
+        budget = self.budget()
+        self.assertFalse(budget.scan_step())
+        self.assertEqual(len(budget.files), 2)
+        while not budget.scan_step():
+            pass
+        self.assertEqual((len(budget.files), budget.total_bytes), (5, 500))
+
+    def test_evicts_least_recently_used_over_budget(self):
+        paths = [self.write(f"clip_{i}.mp4", 4000, age=100 - i) for i in range(4)]
+        budget = self.budget()
+        self.assertEqual(budget.enforce(), 0)  # nothing is evicted before a full scan
+        while not budget.scan_step():
+            pass
+        self.assertEqual(budget.enforce(), 8000)
+        self.assertEqual([os.path.exists(p) for p in paths], [False, False, True, True])
+        self.assertEqual(budget.total_bytes, 8000)
+
+    def test_referenced_files_are_kept(self):
+        oldest = self.write("oldest.png", 6000, age=1000)
+        newer = self.write("newer.png", 6000, age=10)
+        self.referenced.add(oldest)
+        budget = self.budget()
+        budget.maintain()
+        budget.maintain()
+        self.assertTrue(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(newer))
+
+    def test_age_policy(self):
+        old = self.write("old.mp4", 10, age=3600)
+        fresh = self.write("fresh.mp4", 10, age=0)
+        budget = self.budget(max_age=60, scan_batch=1)
+        budget.maintain()  # expired files go as soon as they are indexed
+        budget.maintain()
+        budget.maintain()
+        self.assertEqual((os.path.exists(old), os.path.exists(fresh)), (False, True))
+
+    def test_reused_asset_counts_as_recent(self):
+        store = AssetStore(self.root)
+        first = store.path(store.put_bytes(b"a" * 6000, "png"))
+        second = store.path(store.put_bytes(b"b" * 6000, "png"))
+        os.utime(first, (time.time() - 500,) * 2)
+        os.utime(second, (time.time() - 100,) * 2)
+        budget = self.budget()
+        while not budget.scan_step():
+            pass
+        store.put_bytes(b"a" * 6000, "png")  # used again after indexing
+        budget.enforce()
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+
+
+class TestClipNumbering(unittest.TestCase):
+
+    def test_numbers_survive_restarts_and_eviction(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            video_dir = os.path.join(tmp, "video_tmp")
+            manager = VideoManager(video_dir, os.path.join(tmp, "saves"))
+            first = [manager.reserve_clip_path() for _ in range(3)]
+            open(first[1], 'wb').close()
+            restarted = VideoManager(video_dir, os.path.join(tmp, "saves"))
+            self.assertEqual(os.path.basename(restarted.reserve_clip_path()), "video_3.mp4")
+
+            os.remove(os.path.join(video_dir, "next_clip"))  # counter lost: fall back to the clips on disk
+            self.assertEqual(os.path.basename(VideoManager(video_dir, tmp).reserve_clip_path()), "video_2.mp4")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.event_log import AppendLog
+
+
+class TestAppendLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.snapshot_path = os.path.join(self.tmp.name, "world_state.json")
+        self.log_path = os.path.join(self.tmp.name, "world_state.log")
+
+    def make_log(self, compact_every=100):
+        return AppendLog(self.snapshot_path, self.log_path, compact_every=compact_every)
+
+    def test_flush_batches_records_into_one_append(self):
+        log = self.make_log()
+        for i in range(5):
+            log.append({"op": "event", "description": f"event {i}"})
+        self.assertFalse(os.path.exists(self.log_path))
+        written = log.flush()
+        self.assertEqual(written, os.path.getsize(self.log_path))
+        self.assertEqual(log.flush(), 0)
+
+        snapshot, records = self.make_log().load()
+        self.assertIsNone(snapshot)
+        self.assertEqual([r["description"] for r in records], [f"event {i}" for i in range(5)])
+        self.assertEqual([r["seq"] for r in records], [1, 2, 3, 4, 5])
+
+    def test_compaction_folds_log_into_snapshot(self):
+        log = self.make_log(compact_every=3)
+        events = []
+        for i in range(4):
+            events.append(f"event {i}")
+            log.append({"op": "event", "description": events[-1]})
+        log.flush()
+        self.assertTrue(log.needs_compaction())
+        log.compact({"events": events})
+        self.assertEqual(os.path.getsize(self.log_path), 0)
+
+        log.append({"op": "event", "description": "event 4"})
+        log.flush()
+        reloaded = self.make_log()
+        snapshot, records = reloaded.load()
+        self.assertEqual(snapshot["events"], events)
+        self.assertEqual([r["description"] for r in records], ["event 4"])
+        self.assertEqual(reloaded.seq, 5)
+
+    def test_records_already_in_snapshot_are_not_replayed(self):
+        # Crash after the snapshot was replaced but before the log was truncated
+        log = self.make_log()
+        log.append({"op": "event", "description": "a"})
+        log.append({"op": "event", "description": "b"})
+        log.flush()
+        with open(self.snapshot_path, "w") as f:
+            json.dump({"events": ["a", "b"], "seq": 2}, f)
+        snapshot, records = self.make_log().load()
+        self.assertEqual(snapshot["events"], ["a", "b"])
+        self.assertEqual(records, [])
+
+    def test_torn_tail_is_dropped(self):
+        log = self.make_log()
+        log.append({"op": "event", "description": "kept"})
+        log.flush()
+        with open(self.log_path, "ab") as f:
+            f.write(b'{"op":"event","descr')
+
+        reloaded = self.make_log()
+        _, records = reloaded.load()
+        self.assertEqual([r["description"] for r in records], ["kept"])
+        reloaded.append({"op": "event", "description": "next"})
+        reloaded.flush()
+        _, records = self.make_log().load()
+        self.assertEqual([r["description"] for r in records], ["kept", "next"])
+
+    def test_legacy_snapshot_without_seq(self):
+        with open(self.snapshot_path, "w") as f:
+            json.dump({"rules": {"gravity": "down"}, "events": ["start"]}, f)
+        log = self.make_log()
+        snapshot, records = log.load()
+        self.assertEqual(snapshot["rules"], {"gravity": "down"})
+        self.assertEqual((records, log.seq), ([], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
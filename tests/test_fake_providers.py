@@ -0,0 +1,104 @@
+import time
+import unittest
+
+import anthropic
+import openai
+import requests
+import runwayml
+
+import config
+from utils.fake_providers import Latency, start_fake_providers, stop_fake_providers
+from utils.llm_utils import create_anthropic_message_stream, create_openai_message_stream
+
+
+def drain(stream):
+    narrative, final = "", None
+    for chunk in stream:
+        if isinstance(chunk, str):
+            narrative += chunk
+        elif isinstance(chunk, dict):
+            final = chunk
+    return narrative, final
+
+
+class TestFakeProviders(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Ephemeral ports so the suite never clashes with a standalone fake server
+        cls.providers = start_fake_providers(ports={}, seed=0)
+        cls.urls = {name: provider.base_url for name, provider in cls.providers.items()}
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_fake_providers(cls.providers)
+
+    def test_openai_streamed_tool_call(self):
+        client = openai.Client(api_key="fake", base_url=self.urls["openai"] + "/v1")
+        usages = []
+        narrative, final = drain(create_openai_message_stream(
+            client, [{"role": "user", "content": "open the door"}], "system",
+            config.GAME_TOOLS, config.GAME_TOOL_CHOICE, usage_callback=usages.append))
+        self.assertEqual(narrative, final["narrative"])
+        self.assertEqual(final["movement"], "N")
+        self.assertGreater(usages[0]["output_tokens"], 0)
+
+    def test_anthropic_streamed_tool_call(self):
+        client = anthropic.Anthropic(api_key="fake", base_url=self.urls["anthropic"])
+        tools = [{"name": "visual_output", "input_schema": {"type": "object"}}]
+        system = [{"type": "text", "text": "system prompt", "cache_control": {"type": "ephemeral"}}]
+        usages = []
+        _, final = drain(create_anthropic_message_stream(
+            client, [{"role": "user", "content": "look"}], system, tools,
+            {"type": "tool", "name": "visual_output"}, usage_callback=usages.append))
+        self.assertIn("first_person_description", final["visuals"])
+        self.assertGreater(usages[0]["cached_input_tokens"], 0)
+
+    def test_image_upload_and_video_task(self):
+        image = requests.post(f"{self.urls['stability']}/v2beta/stable-image/generate/sd3",
+                              files={"none": ""}, data={"output_format": "jpeg"}, headers={"accept": "image/*"})
+        self.assertEqual(image.headers["Content-Type"], "image/jpeg")
+
+        link = requests.post(f"{self.urls['imgur']}/3/image", files={"image": image.content}).json()["data"]["link"]
+        self.assertEqual(requests.get(link).status_code, 200)
+
+        client = runwayml.RunwayML(api_key="fake", base_url=self.urls["runway"])
+        task = client.image_to_video.create(model="gen3a_turbo", prompt_image=link, prompt_text="walk")
+        task = client.tasks.retrieve(id=task.id)
+        self.assertEqual(task.status, "SUCCEEDED")
+        self.assertTrue(task.output[0].endswith(".mp4"))
+
+
+class TestFaultInjection(unittest.TestCase):
+
+    def test_rate_limit_injection(self):
+        providers = start_fake_providers(ports={}, rate_limit={"openai": 1.0})
+        self.addCleanup(stop_fake_providers, providers)
+        client = openai.Client(api_key="fake", base_url=providers["openai"].base_url + "/v1", max_retries=0)
+        with self.assertLogs(level="ERROR"):
+            chunks = list(create_openai_message_stream(client, [{"role": "user", "content": "hi"}], "system",
+                                                       config.GAME_TOOLS, config.GAME_TOOL_CHOICE))
+        self.assertEqual(chunks, [None])
+        self.assertEqual(providers["openai"].stats, {"requests": 1, "rate_limited": 1})
+
+        upload = requests.post(f"{providers['imgur'].base_url}/3/image", files={"image": b"x"})
+        self.assertEqual(upload.status_code, 200)
+
+    def test_latency_and_stream_pacing(self):
+        providers = start_fake_providers(ports={}, latency={"openai": Latency(0.05, per_chunk=0.002)})
+        self.addCleanup(stop_fake_providers, providers)
+        client = openai.Client(api_key="fake", base_url=providers["openai"].base_url + "/v1")
+        start = time.perf_counter()
+        stream = create_openai_message_stream(client, [{"role": "user", "content": "hi"}], "system",
+                                              config.GAME_TOOLS, config.GAME_TOOL_CHOICE)
+        first = next(stream)
+        ttft = time.perf_counter() - start
+        drain(stream)
+        total = time.perf_counter() - start
+        self.assertIsInstance(first, str)
+        self.assertGreaterEqual(ttft, 0.05)
+        self.assertGreater(total, ttft + 0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
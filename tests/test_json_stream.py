@@ -0,0 +1,63 @@
+import json
+import random
+import unittest
+from utils.json_stream import JsonStringFieldExtractor
+
+
+def feed_all(extractor, pieces):
+    return "".join(extractor.feed(piece) for piece in pieces)
+
+
+class TestJsonStringFieldExtractor(unittest.TestCase):
+
+    def setUp(self):
+        self.narrative = 'He said "hi"\\ then\n\tleft é \U0001F600 ```html\n<p>ok</p>\n```'
+        self.payload = json.dumps({
+            "events": ["a \"narrative\": \"fake\"", "b"],
+            "scene": {"narrative": "nested, not top level"},
+            "narrative": self.narrative,
+            "movement": "N",
+        })
+
+    def test_whole_payload(self):
+        extractor = JsonStringFieldExtractor("narrative")
+        self.assertEqual(extractor.feed(self.payload), self.narrative)
+        self.assertTrue(extractor.done)
+        self.assertEqual(extractor.value, self.narrative)
+
+    def test_every_split_point(self):
+        for i in range(len(self.payload) + 1):
+            extractor = JsonStringFieldExtractor("narrative")
+            result = feed_all(extractor, [self.payload[:i], self.payload[i:]])
+            self.assertEqual(result, self.narrative, f"split at {i}")
+
+    def test_one_char_deltas_with_unicode_escapes(self):
+        payload = json.dumps({"narrative": self.narrative}, ensure_ascii=True)
+        extractor = JsonStringFieldExtractor("narrative")
+        self.assertEqual(feed_all(extractor, payload), self.narrative)
+
+    def test_random_chunking(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            pieces, pos = [], 0
+            while pos < len(self.payload):
+                step = rng.randint(1, 12)
+                pieces.append(self.payload[pos:pos + step])
+                pos += step
+            extractor = JsonStringFieldExtractor("narrative")
+            self.assertEqual(feed_all(extractor, pieces), self.narrative)
+
+    def test_missing_field(self):
+        extractor = JsonStringFieldExtractor("narrative")
+        self.assertEqual(extractor.feed('{"narrative": null, "events": []}'), "")
+        self.assertFalse(extractor.done)
+
+    def test_no_output_after_close(self):
+        extractor = JsonStringFieldExtractor("narrative")
+        extractor.feed('{"narrative": "done"')
+        self.assertTrue(extractor.done)
+        self.assertEqual(extractor.feed(', "events": ["more"]}'), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from utils.llm_utils import initialize_client, create_message, update_chat_history
+from utils.llm_utils import initialize_client, create_message
 
 class TestLLMUtils(unittest.TestCase):
 
@@ -49,18 +49,5 @@ class TestLLMUtils(unittest.TestCase):
             self.assertIsNone(response)
             self.assertIn("Error creating message: API Error", log.output[0])
 
-    def test_update_chat_history(self):
-        history = []
-        history = update_chat_history(history, "user", "Hello")
-        self.assertEqual(len(history), 1)
-        self.assertEqual(history[0]["role"], "user")
-        self.assertEqual(history[0]["content"], "Hello")
-
-        # Test max history
-        for i in range(15):
-            history = update_chat_history(history, "user", f"Message {i}")
-        self.assertEqual(len(history), 10)
-        self.assertEqual(history[-1]["content"], "Message 14")
-
 if __name__ == '__main__':
     unittest.main()
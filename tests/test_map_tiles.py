@@ -0,0 +1,87 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.map_tiles import MapTiles
+from src.world_map import SQLiteWorldMap, WorldMap
+
+
+class TestMapTiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = os.path.join(self.tmp.name, "map_tiles")
+        self.world_map = WorldMap()
+        self.world_map.update_location(0, 0, None, "start", "#FF0000")
+        self.world_map.update_location(1, 0, None, "east", "#00FF00")
+        self.world_map.update_location(0, 40, None, "far north", "#0000FF")
+
+    def open_tiles(self, world_map=None):
+        return MapTiles(world_map or self.world_map, cache_dir=self.cache_dir, tile_size=256, max_zoom=3)
+
+    def pixel(self, path, x, y):
+        with Image.open(path) as image:
+            return image.convert("RGBA").getpixel((x, y))
+
+    def test_cells_land_on_the_right_pixels(self):
+        tiles = self.open_tiles()
+        path = tiles.tile(3, 0, -1)  # x in [0, 32), y in [0, 32), 8 pixels per cell
+        self.assertEqual(self.pixel(path, 4, 252), (255, 0, 0, 255))  # (0, 0) at the bottom left
+        self.assertEqual(self.pixel(path, 12, 252), (0, 255, 0, 255))
+        self.assertEqual(self.pixel(path, 4, 244)[3], 0)
+        self.assertIsNone(tiles.tile(3, 5, 5))
+        # Zoomed all the way out one tile holds 256 cells a side, a pixel each
+        overview = tiles.tile(0, 0, -1)
+        self.assertEqual(self.pixel(overview, 0, 255), (255, 0, 0, 255))
+        self.assertEqual(self.pixel(overview, 0, 255 - 40), (0, 0, 255, 255))
+        with self.assertRaises(ValueError):
+            tiles.tile(4, 0, 0)
+
+    def test_reduced_tiles_keep_lone_cells(self):
+        tiles = MapTiles(self.world_map, cache_dir=self.cache_dir, tile_size=64, max_zoom=3)
+        path = tiles.tile(0, 0, -1)  # 256 cells over 64 pixels
+        self.assertEqual(self.pixel(path, 0, 63), (127, 127, 0, 255))  # red and green averaged
+        self.assertEqual(self.pixel(path, 0, 63 - 10), (0, 0, 255, 255))
+
+    def test_update_rerenders_only_covering_tiles(self):
+        tiles = self.open_tiles()
+        for z in range(4):
+            span = tiles.span(z)
+            tiles.tile(z, 0, -1)
+            tiles.tile(z, 0, -(40 // span) - 1)
+        renders = tiles.renders
+        for z in range(4):
+            tiles.tile(z, 0, -1)
+        self.assertEqual(tiles.renders, renders)
+
+        self.world_map.update_location(0, 40, None, "far north", "#00FFFF")
+        for z in range(4):
+            tiles.tile(z, 0, -1)
+        # (0, 40) shares a tile with (0, 0) at zooms 0 to 2, not at 3 (32 cells a side)
+        self.assertEqual(tiles.renders, renders + 3)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 5)  # superseded files are removed
+
+    def test_disk_cache_survives_restart(self):
+        self.open_tiles().tile(3, 0, -1)
+        reopened = self.open_tiles()
+        reopened.tile(3, 0, -1)
+        self.assertEqual((reopened.renders, reopened.reused), (0, 1))
+
+    def test_sqlite_map(self):
+        world_map = SQLiteWorldMap(db_path=os.path.join(self.tmp.name, "world_map.db"), json_path=None)
+        self.addCleanup(world_map.close)
+        world_map.load_state()
+        tiles = self.open_tiles(world_map)
+        world_map.update_location(2, 3, None, "stored", "#010203")
+        world_map.save_state()
+        path = tiles.tile(3, 0, -1)
+        self.assertEqual(self.pixel(path, 2 * 8, 255 - 3 * 8), (1, 2, 3, 255))
+        world_map.update_location(2, 3, None, "dirty", "#040506")
+        self.assertEqual(self.pixel(tiles.tile(3, 0, -1), 2 * 8, 255 - 3 * 8), (4, 5, 6, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.color_grid import PRESENT
+from src.minimap import Minimap, decode_window, encode_window
+from src.world_map import SQLiteWorldMap, WorldMap
+
+
+class TestMinimap(unittest.TestCase):
+
+    def explored(self, world_map):
+        world_map.update_location(0, 0, None, "start", "#102030")
+        world_map.update_location(1, 0, None, "east", "#405060")
+        world_map.update_location(0, 2, None, "north", "#102030")
+        return world_map
+
+    def test_encoding_round_trip(self):
+        cells = np.array([[0, 0, PRESENT | 0x102030], [PRESENT | 0x102030, PRESENT | 0xFFFFFF, 0]], dtype=np.uint32)
+        palette, runs = encode_window(cells)
+        self.assertIsNone(palette[0])
+        self.assertEqual(decode_window(palette, runs, 3),
+                         [[None, None, "#102030"], ["#102030", "#FFFFFF", None]])
+        self.assertEqual(sum(runs[::2]), 6)
+        self.assertEqual(encode_window(np.zeros((3, 3), dtype=np.uint32)), ([None], [9, 0]))
+
+    def test_window_matches_map(self):
+        world_map = self.explored(WorldMap())
+        data = Minimap(world_map, radius=2).data()
+        rows = decode_window(data["palette"], data["runs"], data["width"])
+        self.assertEqual((data["x0"], data["y0"], len(rows)), (-2, 2, 5))
+        self.assertEqual(rows[0][2], "#102030")  # (0, 2), the north row comes first
+        self.assertEqual(rows[2][2:4], ["#102030", "#405060"])
+        self.assertEqual(sum(color is not None for row in rows for color in row), 3)
+        self.assertEqual(len(world_map.map), 3)
+
+    def test_window_shows_the_diamond_within_radius_steps(self):
+        world_map = WorldMap()
+        for x in range(-6, 7):
+            for y in range(-6, 7):
+                world_map.update_location(x, y, None, None, "#102030")
+        world_map.current_position = (1, -1)
+        data = Minimap(world_map, radius=4).data()
+        rows = decode_window(data["palette"], data["runs"], data["width"])
+        shown = {(data["x0"] + i, data["y0"] - j) for j, row in enumerate(rows) for i, color in enumerate(row) if color}
+        self.assertEqual(shown, {(1 + dx, -1 + dy) for dx in range(-4, 5) for dy in range(-4, 5)
+                                 if abs(dx) + abs(dy) <= 4})
+        self.assertEqual(len(shown), 41)  # what the old DFS reveal at distance 5 drew
+        self.assertIsNone(rows[0][0])  # (-3, 3): explored, but 8 steps away
+
+    def test_cached_until_move_or_tile_change(self):
+        world_map = self.explored(WorldMap())
+        minimap = Minimap(world_map, radius=2)
+        body, etag = minimap.encoded()
+        self.assertIs(minimap.encoded()[0], body)
+        world_map.get_region(-5, -5, 5, 5)
+        world_map.get_current_description()
+        self.assertEqual(minimap.encoded()[1], etag)
+        self.assertEqual(minimap.stats()["misses"], 1)
+
+        world_map.move("E")
+        moved = minimap.encoded()[1]
+        self.assertNotEqual(moved, etag)
+        world_map.update_location(2, 0, None, "far east", "#0000FF")
+        self.assertNotEqual(minimap.encoded()[1], moved)
+        world_map.move("W")
+        world_map.update_location(2, 0, None, "far east", "#405060")
+        self.assertNotEqual(minimap.encoded()[1], etag)  # same position, but (2, 0) is explored now
+
+    def test_sqlite_map(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            world_map = SQLiteWorldMap(db_path=os.path.join(tmp, "world_map.db"), json_path=None)
+            world_map.load_state()
+            self.explored(world_map)
+            world_map.save_state()
+            minimap = Minimap(world_map, radius=2)
+            _, etag = minimap.encoded()
+            world_map.update_location(1, 1, None, "dirty", "#0A0B0C")
+            data = minimap.data()
+            rows = decode_window(data["palette"], data["runs"], data["width"])
+            self.assertEqual(rows[1][3], "#0A0B0C")
+            self.assertNotEqual(minimap.encoded()[1], etag)
+            world_map.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
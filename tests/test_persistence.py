@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+
+from utils.persistence import PersistenceWriter
+
+
+class RecordingCommit:
+    """Commit function that records its arguments and can be held open."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, *args):
+        self.entered.set()
+        self.release.wait(5)
+        time.sleep(self.delay)
+        self.calls.append(args)
+
+
+class TestPersistenceWriter(unittest.TestCase):
+
+    def make_writer(self, commit, max_queue=16):
+        writer = PersistenceWriter(commit, max_queue=max_queue)
+        self.addCleanup(writer.close)
+        return writer
+
+    def test_request_does_not_wait_for_the_write(self):
+        commit = RecordingCommit(delay=0.2)
+        writer = self.make_writer(commit)
+        start = time.perf_counter()
+        writer.request("state")
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(commit.calls, [("state",)])
+
+    def test_burst_is_coalesced_into_latest_state(self):
+        commit = RecordingCommit()
+        commit.release.clear()
+        writer = self.make_writer(commit)
+        writer.request(0)
+        commit.entered.wait(5)
+        for i in range(1, 11):
+            writer.request(i)
+        commit.release.set()
+        self.assertTrue(writer.flush(timeout=5))
+
+        self.assertEqual(commit.calls, [(0,), (10,)])
+        stats = writer.stats()
+        self.assertEqual((stats["requests"], stats["writes"], stats["coalesced"]), (11, 2, 9))
+        self.assertEqual(stats["pending"], 0)
+
+    def test_full_queue_drops_superseded_requests(self):
+        commit = RecordingCommit()
+        commit.release.clear()
+        writer = self.make_writer(commit, max_queue=2)
+        writer.request(0)
+        commit.entered.wait(5)
+        for i in range(1, 6):
+            writer.request(i)
+        commit.release.set()
+        writer.flush(timeout=5)
+
+        self.assertEqual(commit.calls[-1], (5,))
+        self.assertEqual(writer.stats()["dropped"], 3)
+
+    def test_close_writes_pending_state(self):
+        commit = RecordingCommit(delay=0.05)
+        writer = PersistenceWriter(commit)
+        writer.request("a")
+        writer.request("b")
+        writer.close()
+        self.assertEqual(commit.calls[-1], ("b",))
+        self.assertTrue(writer.flush(timeout=1))
+
+    def test_lag_metrics(self):
+        commit = RecordingCommit(delay=0.05)
+        writer = self.make_writer(commit)
+        writer.request("state")
+        writer.flush(timeout=5)
+        stats = writer.stats()
+        self.assertGreaterEqual(stats["last_lag_ms"], 50)
+        self.assertGreaterEqual(stats["max_lag_ms"], stats["last_lag_ms"])
+        self.assertEqual(stats["mean_lag_ms"], round(stats["last_lag_ms"], 3))
+        self.assertGreaterEqual(stats["last_write_ms"], 50)
+
+    def test_commit_error_does_not_stop_the_writer(self):
+        calls = []
+
+        def commit(value):
+            calls.append(value)
+            if value == "bad":
+                raise OSError("disk full")
+
+        writer = self.make_writer(commit)
+        writer.request("bad")
+        writer.flush(timeout=5)
+        writer.request("good")
+        writer.flush(timeout=5)
+        self.assertEqual(calls, ["bad", "good"])
+        self.assertEqual(writer.stats()["errors"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from utils import llm_utils
+from utils.llm_utils import ResponseCache, create_message_stream
+
+
+class CountingOpenAIClient:
+    def __init__(self, payload):
+        self.calls = 0
+        self.payload = payload
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        for i in range(0, len(self.payload), 5):
+            function = SimpleNamespace(arguments=self.payload[i:i + 5])
+            delta = SimpleNamespace(tool_calls=[SimpleNamespace(function=function)])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmpdir.name, "cache")
+
+    def tearDown(self):
+        llm_utils._response_cache = None
+        self.tmpdir.cleanup()
+
+    def test_hit_miss_and_stats(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=10_000, ttl=60)
+        key = ResponseCache.make_key("openai", "gpt-4o", "system", [{"role": "user", "content": "look"}])
+        self.assertIsNone(cache.get(key))
+        cache.put(key, ["You ", "look.", {"narrative": "You look."}])
+        self.assertEqual(cache.get(key), ["You ", "look.", {"narrative": "You look."}])
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_key_is_canonical(self):
+        self.assertEqual(ResponseCache.make_key({"a": 1, "b": 2}), ResponseCache.make_key({"b": 2, "a": 1}))
+        self.assertNotEqual(ResponseCache.make_key({"a": 1}), ResponseCache.make_key({"a": 2}))
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=10_000, ttl=60)
+        cache.put("k", [{"narrative": "old"}])
+        with patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_size_eviction_is_lru_and_persists(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=350, ttl=60)
+        for key in ("a", "b", "c"):
+            cache.put(key, ["x" * 20, {"narrative": "x" * 20}])
+        cache.get("a")
+        cache.put("d", ["x" * 20, {"narrative": "x" * 20}])
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+        reopened = ResponseCache(self.cache_dir, max_bytes=350, ttl=60)
+        self.assertEqual(reopened.stats()["entries"], cache.stats()["entries"])
+
+    def test_replay_through_create_message_stream(self):
+        payload = json.dumps({"narrative": "The door \"creaks\".", "events": ["door"]})
+        client = CountingOpenAIClient(payload)
+        settings = {"LLM_PROVIDER": "openai", "LLM_RESPONSE_CACHE": True,
+                    "LLM_RESPONSE_CACHE_DIR": self.cache_dir}
+        history = [{"role": "user", "content": "open the door"}]
+        closed, usages = [], []
+        with patch.multiple("config", **settings), patch("builtins.print"):
+            first = list(create_message_stream(client, chat_history=history, narrative_callback=closed.append))
+            second = list(create_message_stream(client, chat_history=history, narrative_callback=closed.append,
+                                                usage_callback=usages.append))
+            create_message_stream(client, chat_history=history, temperature=0.7)
+        self.assertEqual(client.calls, 1)
+        self.assertEqual(closed, ['The door "creaks".'] * 2)
+        # A hit still reports usage, as a zero-cost record marked cached
+        self.assertEqual(usages, [dict(llm_utils.CACHED_USAGE)])
+        self.assertEqual(usages[0]["input_tokens"] + usages[0]["output_tokens"], 0)
+        self.assertEqual(first, second)
+        self.assertEqual(second[-2], json.loads(payload))
+        self.assertIsNone(second[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
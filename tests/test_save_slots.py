@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from src.world_map import SQLiteWorldMap, WorldMap
+from utils.asset_store import AssetStore
+from utils.chat_history import ChatHistory
+from utils.save_slots import SaveSlots, _apply_history_delta, _history_delta
+
+
+class ListWorldState:
+    def __init__(self):
+        self.rules = {}
+        self.events = []
+        self.memory = {"summary": "", "folded": 0}
+
+    def snapshot(self):
+        return dict(self.rules), list(self.events), self.memory
+
+
+class TestSaveSlots(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.assets = AssetStore(os.path.join(self.tmp.name, "assets"))
+        self.slots = self.open_slots()
+        self.world_map = WorldMap()
+        self.world_state = ListWorldState()
+        self.history = ChatHistory()
+
+    def open_slots(self, snapshot_every=3):
+        return SaveSlots(os.path.join(self.tmp.name, "slots"), snapshot_every=snapshot_every, asset_store=self.assets)
+
+    def play_turn(self, turn):
+        self.world_map.move("N")
+        self.world_map.update_location(*self.world_map.current_position, None, f"Room {turn}", "#112233")
+        self.world_state.events.append(f"event {turn}")
+        self.world_state.rules["turn"] = str(turn)
+        self.history.append("user", f"action {turn}")
+        self.history.append("assistant", f"narrative {turn}")
+        checkpoint_id = self.slots.checkpoint(self.world_map, self.world_state, self.history, None, None)
+        self.slots.flush()
+        return checkpoint_id
+
+    def test_load_rebuilds_each_turn(self):
+        for turn in range(1, 11):
+            self.play_turn(turn)
+        self.world_map.update_location(0, 0, None, "Start", None)
+        self.play_turn(11)
+
+        state = self.open_slots().load("default")
+        self.assertEqual(state["tiles"], self.world_map.map)
+        self.assertEqual(state["current_position"], self.world_map.current_position)
+        self.assertEqual(state["events"], self.world_state.events)
+        self.assertEqual(state["rules"], {"turn": "11"})
+        self.assertEqual(state["history"], self.history.to_list())
+
+    def test_replay_is_bounded_and_deltas_are_small(self):
+        for turn in range(1, 21):
+            self.play_turn(turn)
+        kinds = [meta["kind"] for meta in reversed(self.slots.history())]
+        self.assertEqual(kinds[:5], ["full", "delta", "delta", "delta", "full"])
+        for meta in self.slots.history():
+            self.assertLessEqual(self.open_slots().load("default", meta["id"])["replayed"], 3)
+
+        delta = max((m for m in self.slots.history() if m["kind"] == "delta"), key=lambda m: m["turn"])
+        with open(self.slots._path(delta["id"])) as f:
+            self.assertNotIn("Room 1\"", f.read())
+
+    def test_old_checkpoint_matches_that_turn(self):
+        ids = [self.play_turn(turn) for turn in range(1, 8)]
+        state = self.slots.load("default", ids[2])
+        self.assertEqual(state["events"], ["event 1", "event 2", "event 3"])
+        self.assertEqual(state["current_position"], (0, 3))
+        self.assertNotIn((0, 4), state["tiles"])
+
+    def test_branch_shares_history(self):
+        ids = [self.play_turn(turn) for turn in range(1, 6)]
+        files = len(os.listdir(self.slots.checkpoints_dir))
+        self.slots.branch("alt", ids[1])
+        self.assertEqual(len(os.listdir(self.slots.checkpoints_dir)), files)
+
+        state = self.slots.load("alt")
+        self.world_map.restore(state["tiles"], state["current_position"])
+        self.world_state.events = state["events"]
+        self.history = ChatHistory(state["history"])
+        self.play_turn("alt")
+
+        self.assertEqual(self.slots.load("alt")["events"], ["event 1", "event 2", "event alt"])
+        self.assertEqual(self.slots.load("default")["events"][-1], "event 5")
+        self.assertEqual([m["id"] for m in self.slots.history("alt")][1:], [ids[1], ids[0]])
+
+    def test_new_slot_starts_with_full_snapshot(self):
+        self.play_turn(1)
+        self.slots.start("second")
+        self.world_map.reset()
+        self.world_state.events = []
+        self.history.clear()
+        checkpoint_id = self.play_turn(1)
+        self.assertEqual(self.slots.index[checkpoint_id]["kind"], "full")
+        self.assertIsNone(self.slots.index[checkpoint_id]["parent"])
+        reopened = self.open_slots()
+        self.assertEqual(reopened.active, "second")
+        self.assertEqual({s["slot"] for s in reopened.list_slots()}, {"default", "second"})
+
+    def test_fold_between_checkpoints(self):
+        for turn in range(1, 4):
+            self.play_turn(turn)
+        self.world_state.memory = {"summary": "Rooms 1 and 2 were explored.", "folded": 2}
+        del self.world_state.events[:2]
+        checkpoint_id = self.play_turn(4)
+        self.play_turn(5)
+
+        self.assertEqual(self.slots.index[checkpoint_id]["kind"], "full")
+        state = self.open_slots().load("default")
+        self.assertEqual(state["events"], ["event 3", "event 4", "event 5"])
+        self.assertEqual(state["memory"], self.world_state.memory)
+
+    def test_sqlite_full_snapshot(self):
+        self.world_map = SQLiteWorldMap(db_path=os.path.join(self.tmp.name, "world_map.db"), json_path=None)
+        self.addCleanup(self.world_map.close)
+        self.world_map.load_state()
+        for turn in range(1, 6):
+            self.play_turn(turn)
+            if turn % 2:
+                self.world_map.save_state()  # a mix of stored and unsaved tiles
+
+        state = self.open_slots().load("default")
+        self.assertEqual(state["tiles"], {position: tile.to_dict() for position, tile in self.world_map.map.items()})
+
+    def test_history_delta(self):
+        old = [{"role": "user", "content": str(i)} for i in range(6)]
+        for new in (old + [{"role": "assistant", "content": "x"}], old[2:] + [{"role": "user", "content": "y"}],
+                    old[:-1] + [{"role": "user", "content": "z"}], [], old):
+            self.assertEqual(_apply_history_delta(old, _history_delta(old, new)), new)
+
+
+if __name__ == '__main__':
+    unittest.main()
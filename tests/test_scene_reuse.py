@@ -0,0 +1,133 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+import config
+
+HALL = {"scene_description": "A torch-lit hall", "new_svg": "<svg id='hall'/>", "tile_color": "#7A6A53"}
+YARD = {"scene_description": "A muddy yard", "new_svg": "<svg id='yard'/>", "tile_color": "#3B5E2B"}
+
+
+class TestSceneReuse(unittest.TestCase):
+
+    def setUp(self):
+        from src.game_structure import Game
+
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        patcher = mock.patch.multiple(config, PRELOAD_MODULES_ON_START=False, LLM_WARM_UP_ON_START=False,
+                                      PERSISTENCE_WRITER=False, WORLD_MEMORY=False, PIPELINED_TURNS=False,
+                                      COMBINED_ENGINE_VISUALS=False, REUSE_SCENE_VISUALS=True, GENERATE_VIDEO=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.game = Game()
+        self.addCleanup(self.game.shutdown)
+
+        self.visual_calls = 0
+        self.game.generate_first_person_visuals = self.fake_visuals
+        self.game.image_manager.generate_new_image = self.fake_image
+
+    def fake_visuals(self, user_input, scene_svg, scene_description, narrative, cancelled=None):
+        self.visual_calls += 1
+        return {"first_person_description": f"view {self.visual_calls}", "first_person_video": "pan"}
+
+    def fake_image(self, visual_output, config):
+        image = Image.new("RGB", (8, 8), (self.visual_calls * 40, 0, 0))
+        self.game.asset_store.put_image(image)
+        return image
+
+    def turn(self, movement="NONE", scene=None):
+        self.game.update_game_state({"narrative": "You walk.", "movement": movement, "scene": scene})
+        return self.game.new_image.info["asset_id"]
+
+    def test_revisit_reuses_visuals_until_the_scene_changes(self):
+        hall_image = self.turn(scene=HALL)
+        yard_image = self.turn("N", YARD)
+        self.assertEqual(self.visual_calls, 2)
+
+        self.assertEqual(self.turn("S"), hall_image)
+        self.assertTrue(self.game.turn_timing["visuals_reused"])
+        self.assertEqual(self.turn("N"), yard_image)
+        self.assertEqual(self.visual_calls, 2)
+
+        # Staying put regenerates, as the action may have changed the view
+        self.turn()
+        self.assertEqual(self.visual_calls, 3)
+
+        # A rewritten scene no longer matches what was generated for it
+        self.turn("S", dict(HALL, new_svg="<svg id='flooded hall'/>"))
+        self.assertEqual(self.visual_calls, 4)
+        self.assertFalse(self.game.turn_timing["visuals_reused"])
+
+    def test_revisit_reuses_the_finished_video(self):
+        jobs = []
+
+        def start_video_generation(image_path, prompt, callback, rate_limited_flag):
+            jobs.append(image_path)
+            video_path = os.path.join(self.tmp.name, f"clip_{len(jobs)}.mp4")
+            with open(video_path, 'wb') as f:
+                f.write(f"video {len(jobs)}".encode())
+            callback(video_path=video_path, last_frame=None, rate_limited=False)
+
+        self.game.video_manager.start_video_generation = start_video_generation
+        with mock.patch.object(config, "GENERATE_VIDEO", True):
+            self.turn(scene=HALL)
+            self.turn("N", YARD)
+            self.turn("S")
+        self.assertEqual((self.visual_calls, len(jobs)), (2, 2))
+        with open(self.game.current_video, 'rb') as f:
+            self.assertEqual(f.read(), b"video 1")
+
+    def test_revisit_cancels_the_prefetch(self):
+        self.turn(scene=HALL)
+        self.turn("N", YARD)
+        streaming = threading.Event()
+
+        def streamed_visuals(*args, cancelled=None):
+            streaming.set()
+            for _ in range(100):  # ~1 s of streamed chunks
+                if cancelled.wait(0.01):
+                    return {}
+            return self.fake_visuals(*args)
+
+        self.game.generate_first_person_visuals = streamed_visuals
+        self.game.start_visual_prefetch("You walk.")
+        _, future, _ = self.game._visual_prefetch
+        self.assertTrue(streaming.wait(1))
+        self.turn("S")
+        self.assertTrue(self.game.turn_timing["visuals_reused"])
+        self.assertTrue(self.game.turn_timing["visual_prefetch_cancelled"])
+        self.assertEqual(future.result(timeout=0.5), ({}, mock.ANY, mock.ANY))
+        self.assertEqual(self.visual_calls, 2)
+
+    def test_nearby_visuals_are_kept_by_the_disk_budget(self):
+        hall_image = self.turn(scene=HALL)
+        self.turn("N", YARD)
+        hall_path = self.game.asset_store.path(hall_image)
+        with mock.patch.object(config, "SCENE_VISUALS_KEEP_RADIUS", 1):
+            self.assertIn(hall_path, self.game.referenced_files())
+            self.game.world_map.current_position = (0, 3)  # two steps beyond the radius
+            self.assertNotIn(hall_path, self.game.referenced_files())
+            self.game.world_map.current_position = (1, 0)
+            self.assertIn(hall_path, self.game.referenced_files())
+            # A rewritten scene will not reuse them, so they may go
+            self.game.world_map.update_location(0, 0, "<svg id='flooded hall'/>", HALL["scene_description"], "#2A4D69")
+            self.assertNotIn(hall_path, self.game.referenced_files())
+
+    def test_missing_image_is_regenerated(self):
+        hall_image = self.turn(scene=HALL)
+        self.turn("N", YARD)
+        os.remove(self.game.asset_store.path(hall_image))
+        self.turn("S")
+        self.assertEqual(self.visual_calls, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from utils.file_utils import probe_video
+
+HEAVY_MODULES = ["openai", "anthropic", "runwayml", "imgur_python", "moviepy", "cairosvg", "numpy"]
+
+
+class TestProbeVideo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def mp4(self, duration=2.5):
+        from moviepy.editor import ColorClip
+
+        path = os.path.join(self.tmp.name, "clip.mp4")
+        ColorClip((32, 18), color=(10, 20, 30), duration=duration).write_videofile(path, fps=10, logger=None)
+        return path
+
+    def test_reads_duration_from_headers(self):
+        self.assertAlmostEqual(probe_video(self.mp4()), 2.5, places=1)
+
+    def test_rejects_truncated_and_foreign_files(self):
+        with open(self.mp4(), 'rb') as f:
+            data = f.read()
+        self.assertIsNone(probe_video(self.write("torn.mp4", data[:-64])))
+        self.assertIsNone(probe_video(self.write("page.mp4", b"<html>rate limited</html>")))
+        self.assertIsNone(probe_video(self.write("empty.mp4", b"")))
+        self.assertIsNone(probe_video(os.path.join(self.tmp.name, "missing.mp4")))
+
+
+class TestColdStart(unittest.TestCase):
+
+    def test_importing_the_game_skips_heavy_modules(self):
+        code = ("import sys, src.game_structure, src.world_map, utils.state_manager; "
+                f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_game_loads_state_once(self):
+        from src.game_structure import Game
+        from src.world_map import WorldMap
+        from utils.event_log import AppendLog
+
+        tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        with mock.patch.multiple(config, PRELOAD_MODULES_ON_START=False, LLM_WARM_UP_ON_START=False,
+                                 PERSISTENCE_WRITER=False), \
+                mock.patch.object(WorldMap, "load_state", autospec=True, side_effect=WorldMap.load_state) as map_load, \
+                mock.patch.object(AppendLog, "load", autospec=True, side_effect=AppendLog.load) as log_load:
+            game = Game()
+        self.addCleanup(game.shutdown)
+        self.assertEqual(map_load.call_count, 1)
+        self.assertEqual(log_load.call_count, 1)
+        self.assertEqual(game.world_map.current_position, (0, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
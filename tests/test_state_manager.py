@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+from src.world_map import WorldMap
+from utils.chat_history import ChatHistory
+from utils.state_manager import StateManager
+
+
+class CountingWorldState:
+    def __init__(self):
+        self.saves = 0
+
+    def load_state(self):
+        pass
+
+    def save_state(self):
+        self.saves += 1
+        return 0
+
+
+class BlockingWorldMap(WorldMap):
+    """Holds the first save open until released, to overlap two commits."""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def save_state(self):
+        self.entered.set()
+        self.release.wait(5)
+        return super().save_state()
+
+
+class TestStateManagerCommit(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, self.cwd)
+        self.manager = StateManager(saves_dir="saves")
+        self.world_map = WorldMap()
+        self.world_state = CountingWorldState()
+        self.history = ChatHistory()
+
+    def commit(self, image=None, video=None):
+        self.manager.save_game_state(self.world_map, self.world_state, self.history, video, image)
+        return self.manager.last_commit_bytes
+
+    def test_clean_commit_writes_nothing(self):
+        self.world_map.update_location(0, 0, None, "A hall", "#123456")
+        self.history.append("user", "look")
+        image = Image.new("RGB", (8, 8), "red")
+        self.assertGreater(self.commit(image), 0)
+        self.assertEqual(self.commit(image), 0)
+        self.assertEqual(len(os.listdir("saves/assets")), 1)
+
+        self.history.append("assistant", "You see a hall.")
+        written = self.commit(image)
+        self.assertEqual(written, os.path.getsize("game_state.json"))
+        self.assertEqual(len(os.listdir("saves/assets")), 1)
+
+    def test_state_references_assets_by_id(self):
+        with open("clip.mp4", "wb") as f:
+            f.write(b"not really a video")
+        image = Image.new("RGB", (8, 8), "green")
+        self.commit(image, "clip.mp4")
+        with open("game_state.json") as f:
+            state = json.load(f)
+        self.assertEqual(sorted(os.listdir("saves/assets")), sorted([state["image"], state["video"]]))
+        self.assertNotIn("current_image", state)
+
+        # The same content under a new path is deduplicated
+        with open("clip_copy.mp4", "wb") as f:
+            f.write(b"not really a video")
+        self.assertEqual(self.commit(image, "clip_copy.mp4"), 0)
+
+    def test_writes_are_atomic_replacements(self):
+        self.world_map.update_location(0, 0, None, "A hall")
+        self.commit()
+        self.assertEqual(sorted(os.listdir(".")), ["game_state.json", "saves", "world_map.json"])
+        with open("world_map.json") as f:
+            self.assertEqual(json.load(f)["map"]["(0, 0)"]["description"], "A hall")
+
+    def test_loaded_state_is_clean(self):
+        self.world_map.update_location(0, 0, None, "A hall")
+        self.history.append("user", "look")
+        self.commit(Image.new("RGB", (8, 8), "blue"))
+
+        manager, world_map = StateManager(saves_dir="saves"), WorldMap()
+        state = manager.load_game_state(world_map, self.world_state, None)
+        manager.save_game_state(world_map, self.world_state, state["chat_history"], state["video_path"],
+                                state["current_image"])
+        self.assertEqual(manager.last_commit_bytes, 0)
+
+    def test_legacy_base64_state_is_migrated(self):
+        import base64
+        import io
+        buffered = io.BytesIO()
+        Image.new("RGB", (8, 8), "red").save(buffered, format="PNG")
+        with open("game_state.json", "w") as f:
+            json.dump({"chat_history": [], "video_path": None,
+                       "current_image": base64.b64encode(buffered.getvalue()).decode()}, f)
+
+        state = self.manager.load_game_state(WorldMap(), self.world_state, None)
+        self.assertEqual(state["current_image"].size, (8, 8))
+        self.commit(state["current_image"])
+        with open("game_state.json") as f:
+            self.assertEqual(json.load(f), {"chat_history": [], "video": None,
+                                            "image": state["current_image"].info["asset_id"]})
+
+    def test_concurrent_commits_coalesce(self):
+        self.world_map = BlockingWorldMap()
+        self.world_map.update_location(0, 0, None, "A hall")
+        first = threading.Thread(target=self.commit)
+        first.start()
+        self.world_map.entered.wait(5)
+
+        # A second thread's commit returns at once and is folded into the running one
+        self.history.append("user", "from the video thread")
+        self.commit()
+        self.assertEqual(self.manager.coalesced, 1)
+        self.world_map.release.set()
+        first.join(5)
+
+        self.assertEqual(self.manager.commits, 2)
+        with open("game_state.json") as f:
+            self.assertEqual(json.load(f)["chat_history"][-1]["content"], "from the video thread")
+
+
+if __name__ == '__main__':
+    unittest.main()
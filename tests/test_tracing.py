@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from utils.tracing import Tracer, traced, traced_stream
+import utils.tracing as tracing
+
+
+class TestTracer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.tracer = Tracer(enabled=True, trace_dir=self.tmp.name)
+        patcher = patch.object(tracing, "tracer", self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(self.tracer.close)
+
+    def test_span_written_to_jsonl(self):
+        self.tracer.turn = 3
+        with self.tracer.span("save_game_state", size=10):
+            time.sleep(0.01)
+        path = os.path.join(self.tmp.name, f"trace_{self.tracer.session}.jsonl")
+        with open(path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["name"], "save_game_state")
+        self.assertEqual(records[0]["turn"], 3)
+        self.assertEqual(records[0]["attrs"], {"size": 10})
+        self.assertGreaterEqual(records[0]["duration_ms"], 10)
+
+    def test_chrome_trace_format(self):
+        @traced("generate_new_image")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        trace = self.tracer.chrome_trace()
+        complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+        metadata = [e for e in trace["traceEvents"] if e["ph"] == "M"]
+        self.assertEqual([e["name"] for e in complete], ["generate_new_image"])
+        self.assertEqual(set(complete[0]) >= {"ts", "dur", "pid", "tid", "args"}, True)
+        self.assertEqual(metadata[0]["name"], "thread_name")
+
+        path = self.tracer.export_chrome()
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)["traceEvents"]), 2)
+
+    def test_error_recorded_on_span(self):
+        @traced("upload_image_to_imgur")
+        def fail():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            fail()
+        self.assertIn("boom", self.tracer.spans[0]["attrs"]["error"])
+
+    def test_traced_stream_records_ttft_and_narrative(self):
+        def stream():
+            time.sleep(0.01)
+            yield "Hello "
+            yield "world"
+            yield {"narrative": "Hello world"}
+            yield None
+
+        chunks = list(traced_stream(stream(), "llm_stream", tool="game_output"))
+        self.assertEqual(chunks, ["Hello ", "world", {"narrative": "Hello world"}, None])
+        spans = {span["name"]: span for span in self.tracer.spans}
+        self.assertEqual(set(spans), {"llm_stream", "narrative_stream"})
+        self.assertGreaterEqual(spans["llm_stream"]["attrs"]["ttft_ms"], 10)
+        self.assertEqual(spans["llm_stream"]["attrs"]["tool"], "game_output")
+
+    def test_traced_stream_closes_span_when_consumer_stops_at_dict(self):
+        def stream():
+            yield {"narrative": ""}
+            time.sleep(0.05)
+            yield None
+
+        for chunk in traced_stream(stream(), "llm_stream"):
+            if isinstance(chunk, dict):
+                break
+        self.assertEqual(len(self.tracer.spans), 1)
+        self.assertLess(self.tracer.spans[0]["duration_ms"], 50)
+
+
+class TestDisabledTracer(unittest.TestCase):
+
+    def test_disabled_records_nothing(self):
+        tmp = tempfile.mkdtemp()
+        tracer = Tracer(enabled=False, trace_dir=tmp)
+        with patch.object(tracing, "tracer", tracer):
+            @traced("noop")
+            def work():
+                return 1
+
+            self.assertEqual(work(), 1)
+            with tracer.span("noop"):
+                pass
+        self.assertEqual(len(tracer.spans), 0)
+        self.assertEqual(os.listdir(tmp), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
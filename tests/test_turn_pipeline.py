@@ -0,0 +1,223 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import config
+
+VISUAL_CALL = 0.1  # seconds the stand-in visual LLM call takes
+
+
+class GameTestCase(unittest.TestCase):
+    """A Game in a temporary directory, with background writers and warm-up off."""
+
+    settings = {}
+
+    def setUp(self):
+        from src.game_structure import Game
+
+        self.tmp = tempfile.TemporaryDirectory()
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, cwd)
+        patcher = mock.patch.multiple(config, **dict(
+            PRELOAD_MODULES_ON_START=False, LLM_WARM_UP_ON_START=False, PERSISTENCE_WRITER=False,
+            WORLD_MEMORY=False, GENERATE_VIDEO=False, LLM_RESPONSE_CACHE=False, **self.settings))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.game = Game()
+        self.addCleanup(self.game.shutdown)
+
+
+class TestVisualPrefetch(GameTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.game.generate_first_person_visuals = self.fake_visuals
+        self.game.world_map.update_location(0, 0, "<svg id='hall'/>", "A hall", "#7A6A53")
+        self.game.chat_history.append("user", "look around")
+
+    def fake_visuals(self, user_input, scene_svg, scene_description, narrative, cancelled=None):
+        self.calls.append((threading.current_thread().name, scene_svg))
+        time.sleep(VISUAL_CALL)
+        return {"first_person_description": f"view of {scene_svg}"}
+
+    def resolve(self):
+        return self.game.resolve_visuals("look around", self.game.world_map.get_current_svg(),
+                                         self.game.world_map.get_current_description(), "You look.")
+
+    def test_unchanged_inputs_reuse_the_prefetch(self):
+        self.game.start_visual_prefetch("You look.")
+        time.sleep(VISUAL_CALL / 2)  # the rest of the engine output streaming
+        output = self.resolve()
+
+        self.assertEqual(output, {"first_person_description": "view of <svg id='hall'/>"})
+        self.assertEqual(len(self.calls), 1)
+        self.assertTrue(self.calls[0][0].startswith("visual-prefetch"))
+        timing = self.game.turn_timing
+        self.assertTrue(timing["visual_prefetched"])
+        self.assertGreaterEqual(timing["visual_call"], VISUAL_CALL)
+        self.assertLess(timing["visual_wait"], timing["visual_call"])
+        self.assertAlmostEqual(timing["visual_hidden"], timing["visual_call"] - timing["visual_wait"])
+        self.assertGreater(timing["visual_hidden"], VISUAL_CALL / 4)
+        self.assertIsNone(self.game._visual_prefetch)
+
+    def test_movement_after_the_narrative_regenerates(self):
+        self.game.start_visual_prefetch("You look.")
+        self.game.world_map.move("N")
+        self.game.world_map.update_location(0, 1, "<svg id='yard'/>", "A yard", "#3B5E2B")
+        output = self.resolve()
+
+        self.assertEqual(output, {"first_person_description": "view of <svg id='yard'/>"})
+        self.assertEqual([svg for _, svg in self.calls], ["<svg id='hall'/>", "<svg id='yard'/>"])
+        self.assertEqual(self.calls[1][0], threading.current_thread().name)
+        self.assertFalse(self.game.turn_timing["visual_prefetched"])
+        self.assertEqual(self.game.turn_timing["visual_hidden"], 0.0)
+
+    def test_scene_change_after_the_narrative_regenerates(self):
+        self.game.start_visual_prefetch("You look.")
+        self.game.world_map.update_location(0, 0, "<svg id='flooded hall'/>", "A hall", "#2A4D69")
+        output = self.resolve()
+
+        self.assertEqual(output, {"first_person_description": "view of <svg id='flooded hall'/>"})
+        self.assertEqual(len(self.calls), 2)
+        self.assertFalse(self.game.turn_timing["visual_prefetched"])
+
+    def test_stale_prefetch_is_cancelled(self):
+        self.game.start_visual_prefetch("You look.")
+        _, _, cancelled = self.game._visual_prefetch
+        self.game.world_map.update_location(0, 0, "<svg id='flooded hall'/>", "A hall", "#2A4D69")
+        self.resolve()
+        self.assertTrue(cancelled.is_set())
+        self.assertTrue(self.game.turn_timing["visual_prefetch_cancelled"])
+
+    def test_without_prefetch_the_call_is_inline(self):
+        self.resolve()
+        self.assertEqual(len(self.calls), 1)
+        self.assertFalse(self.game.turn_timing["visual_prefetched"])
+        self.assertEqual(self.game.turn_timing["visual_hidden"], 0.0)
+
+
+class TestEngineRouting(GameTestCase):
+    """Whole turns against the fake OpenAI engine in utils/fake_providers."""
+
+    def setUp(self):
+        from utils.fake_providers import DEFAULT_TOOL_OUTPUTS, start_fake_providers, stop_fake_providers
+        from utils.llm_utils import close_clients
+
+        self.providers = start_fake_providers(ports={}, seed=0)
+        self.addCleanup(stop_fake_providers, self.providers)
+        self.engine = self.providers["openai"]
+        # Stay on the tile, so a pipelined prefetch matches the final inputs
+        self.engine.payloads["game_output"] = dict(DEFAULT_TOOL_OUTPUTS["game_output"], movement="NONE")
+        patcher = mock.patch.multiple(config, FAKE_PROVIDERS=True, OPENAI_BASE_URL=self.engine.base_url + "/v1",
+                                      LLM_PROVIDER="openai", ENGINE_LLM_PROVIDER="openai", VISUAL_LLM_PROVIDER="openai")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        close_clients()
+        self.addCleanup(close_clients)
+        super().setUp()
+
+        self.images = []  # visual output handed to the image generator
+        self.game.image_manager.generate_new_image = lambda visual_output, config: self.images.append(visual_output)
+        patcher = mock.patch.object(self.game, "generate_first_person_visuals",
+                                    wraps=self.game.generate_first_person_visuals)
+        self.visual_calls = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def play(self, action="open the door"):
+        with mock.patch("builtins.print"):
+            for chunk in self.game.process_input(action):
+                if isinstance(chunk, dict):
+                    self.game.update_game_state(chunk)
+                    return chunk
+        self.fail("the engine stream ended without a tool output")
+
+    def engine_requests(self):
+        return self.engine.stats["requests"]
+
+    def test_combined_mode_skips_the_visual_call(self):
+        from utils.fake_providers import DEFAULT_TOOL_OUTPUTS
+
+        with mock.patch.multiple(config, COMBINED_ENGINE_VISUALS=True, PIPELINED_TURNS=True):
+            output = self.play()
+        self.assertEqual(self.engine_requests(), 1)
+        self.visual_calls.assert_not_called()
+        self.assertEqual(self.images, [DEFAULT_TOOL_OUTPUTS["game_visual_output"]["visuals"]])
+        self.assertEqual(output["visuals"], self.images[0])
+        self.assertNotIn("visual_prefetched", self.game.turn_timing)
+
+    def test_combined_mode_without_visuals_falls_back_to_the_visual_call(self):
+        from utils.fake_providers import DEFAULT_TOOL_OUTPUTS
+
+        self.engine.payloads["game_visual_output"] = self.engine.payloads["game_output"]  # no visual fields
+        with mock.patch.multiple(config, COMBINED_ENGINE_VISUALS=True, PIPELINED_TURNS=True):
+            output = self.play()
+        self.assertNotIn("visuals", output)
+        self.assertEqual(self.engine_requests(), 2)
+        self.visual_calls.assert_called_once()
+        self.assertEqual(self.images, [DEFAULT_TOOL_OUTPUTS["visual_output"]["visuals"]])
+        self.assertFalse(self.game.turn_timing["visual_prefetched"])
+
+    def test_two_call_mode_prefetches_from_the_engine_narrative(self):
+        with mock.patch.multiple(config, COMBINED_ENGINE_VISUALS=False, PIPELINED_TURNS=True):
+            self.play()
+        self.assertEqual(self.engine_requests(), 2)
+        self.visual_calls.assert_called_once()
+        self.assertTrue(self.game.turn_timing["visual_prefetched"])
+
+    def test_cancelled_visual_call_stops_reading_the_stream(self):
+        cancelled = threading.Event()
+        cancelled.set()
+        with mock.patch("builtins.print"):
+            output = self.game.generate_first_person_visuals("look", "<svg/>", "A hall", "You look.",
+                                                             cancelled=cancelled)
+        self.assertEqual(output, {})
+        self.assertEqual(self.engine_requests(), 1)
+
+    def test_visual_stream_failure_is_logged_and_set_on_the_span(self):
+        from utils.tracing import Tracer
+
+        def failing_stream(*args, **kwargs):
+            yield "The hall"
+            raise RuntimeError("connection reset")
+
+        visual_tracer = Tracer(enabled=True, trace_dir=None)
+        with mock.patch("src.game_structure.tracer", visual_tracer), \
+                mock.patch("src.game_structure.create_message_stream", failing_stream), \
+                self.assertLogs(level="ERROR") as logs:
+            output = self.game.generate_first_person_visuals("look", "<svg/>", "A hall", "You look.")
+        self.assertEqual(output, {})
+        self.assertIn("Visual stream failed after chunk 'The hall'", logs.output[0])
+        self.assertIn("RuntimeError: connection reset", logs.output[0])  # the traceback
+        span, = visual_tracer.spans
+        self.assertEqual(span["name"], "generate_first_person_visuals")
+        self.assertEqual(span["attrs"]["error"], "RuntimeError('connection reset')")
+
+    def test_turn_diagnostics_go_to_the_log_and_the_turn_span(self):
+        from utils.tracing import Tracer
+
+        turn_tracer = Tracer(enabled=True, trace_dir=None)
+        with mock.patch("src.game_structure.tracer", turn_tracer), \
+                mock.patch.multiple(config, COMBINED_ENGINE_VISUALS=False, PIPELINED_TURNS=True), \
+                self.assertLogs(level="INFO") as logs:
+            self.play()
+        messages = "\n".join(logs.output)
+        for diagnostic in ("Engine context: ~", "Engine tokens: ", "Turn timing: "):
+            self.assertIn(diagnostic, messages)
+
+        turn = [span for span in turn_tracer.spans if span["name"] == "turn"]
+        self.assertEqual(len(turn), 1)
+        attrs = turn[0]["attrs"]
+        self.assertEqual(attrs["context_tokens"], self.game.context_tokens)
+        self.assertEqual(attrs["usage"], self.game.turn_usage)
+        self.assertEqual(attrs["turn_total"], self.game.turn_timing["turn_total"])
+        self.assertTrue(attrs["visual_prefetched"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.color_grid import PRESENT, format_color, parse_color
+from src.world_map import SQLiteWorldMap, Tile, WorldMap, _UNLOADED
+
+
+class TestWorldMapStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, self.cwd)
+
+    def open_sqlite(self, **kwargs):
+        world_map = SQLiteWorldMap(db_path="world_map.db", **kwargs)
+        self.addCleanup(world_map.close)
+        world_map.load_state()
+        return world_map
+
+    def test_json_round_trip_without_eval(self):
+        world_map = WorldMap()
+        world_map.update_location(-2, 3, "<svg/>", "A cave", "#101010")
+        world_map.save_state()
+        with open("world_map.json") as f:
+            self.assertIn("(-2, 3)", json.load(f)["map"])
+
+        loaded = WorldMap()
+        loaded.load_state()
+        self.assertEqual(loaded.get_location_color(-2, 3), "#101010")
+
+    def test_sqlite_round_trip(self):
+        world_map = self.open_sqlite()
+        world_map.update_location(0, 0, "<svg/>", "A hall", "#7A6A53")
+        world_map.move("N")
+        world_map.update_location(0, 1, None, "A corridor", "#333333")
+        world_map.save_state()
+
+        loaded = self.open_sqlite()
+        self.assertEqual(loaded.current_position, (0, 1))
+        self.assertEqual(loaded.get_current_description(), "A corridor")
+        self.assertEqual(loaded.get_or_create_location(0, 0)["svg"], "<svg/>")
+
+    def test_saves_only_changed_tiles(self):
+        world_map = self.open_sqlite()
+        for x in range(50):
+            world_map.update_location(x, 0, "<svg>" + "x" * 500 + "</svg>", "tile", "#000000")
+        first = world_map.save_state()
+        self.assertEqual(world_map.save_state(), 0)
+        world_map.update_location(7, 0, None, "changed", "#FFFFFF")
+        self.assertLess(world_map.save_state(), first / 20)
+        self.assertEqual(self.open_sqlite().get_or_create_location(7, 0)["description"], "changed")
+
+    def test_iter_tiles_streams_past_the_cache(self):
+        world_map = self.open_sqlite(cache_size=4)
+        for x in range(20):
+            world_map.update_location(x, 0, f"<svg id='{x}'/>", f"tile {x}", "#123456")
+        world_map.remember_visuals(3, 0, {"output": {}, "image": "abc.png", "video": None})
+        world_map.save_state()
+        world_map.update_location(5, 0, None, "unsaved", "#654321")
+        world_map.peek(1, 0)
+        hot = list(world_map._tiles)
+
+        tiles = dict(world_map.iter_tiles())
+        self.assertEqual(tiles, {position: tile.to_dict() for position, tile in world_map.map.items()})
+        self.assertEqual(tiles[(5, 0)]["description"], "unsaved")
+        self.assertEqual(tiles[(3, 0)]["visuals"]["image"], "abc.png")
+        self.assertEqual(list(world_map._tiles), hot)
+
+    def test_color_lookup_skips_bodies_and_cache_is_bounded(self):
+        world_map = self.open_sqlite(cache_size=10)
+        for x in range(30):
+            world_map.update_location(x, 0, "<svg/>", f"tile {x}", "#123456")
+        world_map.save_state()
+
+        loaded = self.open_sqlite(cache_size=10)
+        self.assertEqual(loaded.get_location_color(5, 0), "#123456")
+        self.assertIs(loaded._tiles[(5, 0)]["svg"], _UNLOADED)
+        self.assertEqual(loaded.get_or_create_location(5, 0)["description"], "tile 5")
+        for x in range(30):
+            loaded.get_location_color(x, 0)
+        self.assertEqual(len(loaded._tiles), 10)
+
+    def test_migrates_existing_json(self):
+        legacy = WorldMap()
+        legacy.update_location(1, 1, "<svg/>", "Old tile", "#ABCDEF")
+        legacy.move("E")
+        legacy.save_state()
+
+        world_map = self.open_sqlite()
+        self.assertEqual(world_map.current_position, (1, 0))
+        self.assertEqual(world_map.get_or_create_location(1, 1)["description"], "Old tile")
+
+    def test_reset(self):
+        world_map = self.open_sqlite()
+        world_map.update_location(4, 4, None, "far away", "#000000")
+        world_map.save_state()
+        world_map.reset()
+        world_map.save_state()
+        self.assertEqual(set(self.open_sqlite().map), {(0, 0)})
+
+
+class TestCompactTiles(unittest.TestCase):
+
+    def test_tile_is_slotted_and_shares_directions(self):
+        world_map = WorldMap()
+        first, second = world_map.get_or_create_location(0, 0), world_map.get_or_create_location(5, 5)
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIs(first.directions, second.directions)
+        second["directions"] = ["N", "S", "E", "W"]
+        self.assertIs(first.directions, second.directions)
+        self.assertEqual(dict(first), {"svg": None, "description": None, "directions": ("N", "S", "E", "W"),
+                                       "color": "#FFFFFF"})
+        self.assertEqual(first, {"svg": None, "description": None, "directions": ["N", "S", "E", "W"],
+                                 "color": "#FFFFFF"})
+        with self.assertRaises(KeyError):
+            first["shape"]
+
+    def test_region_colors_follow_updates(self):
+        world_map = WorldMap()
+        world_map.update_location(-1, 0, None, "west", "#102030")
+        grid = world_map.get_region_colors(-40, -3, 40, 3)
+        self.assertEqual(grid.shape, (6, 80))
+        self.assertEqual(int(grid[3, 39]), PRESENT | 0x102030)
+        self.assertEqual(int((grid != 0).sum()), 1)
+
+        world_map.update_location(33, 2, None, "east", "#abc")  # across a chunk boundary, short hex
+        world_map.update_location(-1, 0, None, "west", "#FFFFFF")
+        grid = world_map.get_region_colors(-40, -3, 40, 3)
+        self.assertEqual(format_color(grid[5, 73]), "#AABBCC")
+        self.assertEqual(format_color(grid[3, 39]), "#FFFFFF")
+        self.assertIsNone(format_color(grid[0, 0]))
+        self.assertEqual(len(world_map.map), 2)  # the query created nothing
+
+    def test_region_matches_per_tile_colors(self):
+        world_map = WorldMap()
+        for x in range(-20, 45, 3):
+            for y in range(-35, 10, 2):
+                world_map.update_location(x, y, None, None, f"#{(x * 7919 + y * 104729) & 0xFFFFFF:06X}")
+        grid = world_map.get_region_colors(-20, -35, 45, 10)
+        for (x, y), tile in world_map.map.items():
+            self.assertEqual(format_color(grid[y + 35, x + 20]), tile.color)
+
+    def test_parse_color(self):
+        self.assertEqual(parse_color("#7a6a53"), 0x7A6A53)
+        self.assertEqual(parse_color("red"), 0xFFFFFF)
+        self.assertEqual(parse_color(None), 0xFFFFFF)
+
+    def test_sqlite_region_colors(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            world_map = SQLiteWorldMap(db_path=os.path.join(tmp, "world_map.db"), json_path=None)
+            world_map.load_state()
+            world_map.update_location(2, 2, None, "stored", "#010203")
+            world_map.save_state()
+            world_map.update_location(3, 2, None, "dirty", "#040506")
+            grid = world_map.get_region_colors(0, 0, 4, 4)
+            self.assertEqual([format_color(v) for v in grid[2]], [None, None, "#010203", "#040506"])
+            self.assertIsInstance(world_map.get_or_create_location(2, 2), Tile)
+            world_map.close()
+
+
+
+class TestReadOnlyLookups(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def explore(self, world_map):
+        world_map.update_location(0, 0, "<svg/>", "start", "#102030")
+        world_map.update_location(1, 0, "<svg/>", "east", "#405060")
+        world_map.save_state()
+
+    def assert_lookups_create_nothing(self, world_map):
+        for x in range(-7, 8):
+            for y in range(-7, 8):
+                world_map.get_location_color(x, y)
+                world_map.peek(x, y)
+        region = world_map.get_region(-7, -7, 8, 8)
+        self.assertEqual(region, {(0, 0): "#102030", (1, 0): "#405060"})
+        self.assertIsNone(world_map.peek(3, 3))
+        self.assertIsNone(world_map.get_location_color(3, 3))
+        self.assertEqual(world_map.get_location_color(3, 3, "#FFFFFF"), "#FFFFFF")
+        self.assertEqual(world_map.get_location_color(1, 0), "#405060")
+        self.assertEqual(len(world_map.map), 2)
+        self.assertFalse(world_map.dirty)
+        self.assertEqual(world_map.save_state(), 0)
+
+    def test_json_lookups_create_nothing(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        world_map = WorldMap()
+        self.explore(world_map)
+        self.assert_lookups_create_nothing(world_map)
+
+    def test_sqlite_lookups_create_nothing(self):
+        world_map = SQLiteWorldMap(db_path=os.path.join(self.tmp.name, "world_map.db"), json_path=None)
+        self.addCleanup(world_map.close)
+        world_map.load_state()
+        self.explore(world_map)
+        self.assert_lookups_create_nothing(world_map)
+        self.assertEqual(world_map.peek(1, 0).description, "east")  # bodies loaded, not _UNLOADED
+
+
+class TestSceneVisuals(unittest.TestCase):
+
+    VISUALS = {"output": {"first_person_description": "a hall"}, "image": "abc.png", "video": None}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def assert_remembers_visuals(self, world_map, reopen):
+        world_map.update_location(0, 0, "<svg/>", "start", "#102030")
+        version = world_map.version
+        world_map.remember_visuals(0, 0, self.VISUALS)
+        self.assertEqual(world_map.version, version)  # no color change
+        self.assertEqual(world_map.take_changes()[(0, 0)]["visuals"]["image"], "abc.png")
+        world_map.save_state()
+
+        reopened = reopen()
+        visuals = reopened.cached_visuals(0, 0)
+        self.assertEqual(visuals["output"], self.VISUALS["output"])
+        self.assertEqual(visuals["fingerprint"], reopened.peek(0, 0).scene_fingerprint())
+        self.assertIsNone(reopened.cached_visuals(1, 0))
+
+        # Same scene written again still matches; a changed scene does not
+        reopened.update_location(0, 0, "<svg/>", "start", "#102030")
+        self.assertIsNotNone(reopened.cached_visuals(0, 0))
+        reopened.update_location(0, 0, "<svg/>", "start, now flooded", "#102030")
+        self.assertIsNone(reopened.cached_visuals(0, 0))
+
+    def test_json(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        world_map = WorldMap()
+        self.assertNotIn("visuals", world_map.get_or_create_location(0, 0).to_dict())
+
+        def reopen():
+            reopened = WorldMap()
+            reopened.load_state()
+            return reopened
+
+        self.assert_remembers_visuals(world_map, reopen)
+
+    def test_sqlite(self):
+        db_path = os.path.join(self.tmp.name, "world_map.db")
+        maps = []
+
+        def reopen():
+            maps.append(SQLiteWorldMap(db_path=db_path, json_path=None))
+            self.addCleanup(maps[-1].close)
+            maps[-1].load_state()
+            return maps[-1]
+
+        self.assert_remembers_visuals(reopen(), reopen)
+
+    def test_sqlite_adds_column_to_old_database(self):
+        db_path = os.path.join(self.tmp.name, "world_map.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""CREATE TABLE tiles (x INTEGER NOT NULL, y INTEGER NOT NULL, color TEXT NOT NULL,
+                            directions TEXT NOT NULL, svg TEXT, description TEXT, PRIMARY KEY (x, y)) WITHOUT ROWID""")
+            conn.execute("""INSERT INTO tiles VALUES (0, 0, '#102030', '["N"]', '<svg/>', 'start')""")
+        conn.close()
+        world_map = SQLiteWorldMap(db_path=db_path, json_path=None)
+        self.addCleanup(world_map.close)
+        world_map.load_state()
+        self.assertEqual(world_map.peek(0, 0).description, "start")
+        world_map.remember_visuals(0, 0, self.VISUALS)
+        world_map.save_state()
+        self.assertEqual(world_map.map[(0, 0)].visuals["image"], "abc.png")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from src.game_structure import WorldState
+from utils.chat_history import ChatHistory
+from utils.context_utils import build_engine_context, estimate_tokens
+from utils.world_memory import WorldMemory, local_summarizer
+
+
+class TestWorldMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.world_state = self.open_state()
+        self.history = ChatHistory(max_history=10)
+        self.calls = []
+
+    def open_state(self):
+        state = WorldState(os.path.join(self.tmp.name, "world_state.json"), os.path.join(self.tmp.name, "world_state.log"))
+        state.load_state()
+        return state
+
+    def play(self, turns, start=0):
+        for turn in range(start, start + turns):
+            self.world_state.add_event(f"event {turn}")
+            self.history.append("user", f"action {turn}")
+            self.history.append("assistant", f"```html\n<p>narrative {turn}</p>\n```")
+
+    def summarizer(self, memory, events, messages, max_tokens):
+        self.calls.append((memory, list(events), [m["content"] for m in messages]))
+        return f"{memory} | folded {len(events)}"
+
+    def memory(self, **kwargs):
+        memory = WorldMemory(self.summarizer, event_window=4, history_window=4, fold_every=3, max_tokens=50, **kwargs)
+        self.addCleanup(memory.close)
+        return memory
+
+    def test_fold_keeps_windows_and_persists(self):
+        self.play(8)
+        self.assertTrue(self.memory().fold(self.world_state, self.history))
+
+        memory, events, messages = self.calls[0]
+        self.assertEqual(events, [f"event {i}" for i in range(4)])
+        self.assertEqual(messages[0], "action 3")  # the deque already dropped turns 0-2
+        self.assertEqual(self.world_state.events, [f"event {i}" for i in range(4, 8)])
+        self.assertEqual(self.world_state.memory, {"summary": " | folded 4", "folded": 4})
+        self.assertEqual([m["content"] for m in self.history][::2], ["action 6", "action 7"])
+
+        self.world_state.save_state()
+        reloaded = self.open_state()
+        self.assertEqual((reloaded.events, reloaded.memory), (self.world_state.events, self.world_state.memory))
+
+    def test_prompt_and_state_stay_bounded(self):
+        memory = WorldMemory(local_summarizer, event_window=4, history_window=4, fold_every=3, max_tokens=50)
+        self.addCleanup(memory.close)
+        sizes = []
+        for block in range(20):
+            self.play(5, start=block * 5)
+            memory.maybe_fold(self.world_state, self.history)
+            memory.wait()
+            _, messages, tokens = build_engine_context(
+                "system", {}, "", "a hall", ["N"], self.world_state.events[-5:], self.history.messages(),
+                "look", 6000, memory=self.world_state.memory["summary"])
+            sizes.append(tokens)
+        self.assertLessEqual(len(self.world_state.events), 4 + 3)
+        self.assertLessEqual(estimate_tokens(self.world_state.memory["summary"]), 50)
+        self.assertIn("event 99", self.world_state.memory["summary"] + str(self.world_state.events))
+        self.assertNotIn("<p>", self.world_state.memory["summary"])
+        self.assertLessEqual(max(sizes[10:]), max(sizes[:10]))
+
+    def test_fold_is_discarded_after_restore(self):
+        self.play(8)
+
+        def summarize_then_reset(*args):
+            self.world_state.restore({}, [])
+            return "stale"
+
+        memory = WorldMemory(summarize_then_reset, event_window=4, history_window=4, fold_every=3)
+        self.addCleanup(memory.close)
+        self.assertFalse(memory.fold(self.world_state, self.history))
+        self.assertEqual(self.world_state.memory["summary"], "")
+        self.assertEqual(memory.stats()["discarded"], 1)
+
+    def test_maybe_fold_only_when_due(self):
+        saves = []
+        memory = self.memory(on_fold=lambda: saves.append(1))
+        self.play(2)
+        self.assertIsNone(memory.maybe_fold(self.world_state, self.history))
+        self.play(5, start=2)
+        self.assertTrue(memory.maybe_fold(self.world_state, self.history).result())
+        self.assertEqual(saves, [1])
+
+    def test_memory_block_in_engine_prompt(self):
+        args = ("system", {"rule": "text"}, "<svg/>", "a hall", ["N"], [], [], "look", 6000)
+        system_blocks, _, _ = build_engine_context(*args, memory="The player owes the innkeeper.")
+        self.assertEqual(len(system_blocks), 4)
+        self.assertIn("The player owes the innkeeper.", system_blocks[2]["text"])
+        self.assertEqual(len(build_engine_context(*args)[0]), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
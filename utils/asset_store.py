@@ -0,0 +1,83 @@
+import hashlib
+import io
+import os
+import shutil
+
+from utils.file_utils import write_atomic
+
+ASSET_ID_KEY = "asset_id"  # PIL Image.info key remembering which asset an image came from
+
+
+class AssetStore:
+    """Content-addressed images and videos under ``saves/assets``.
+
+    An asset ID is the SHA-256 of the file's bytes plus its extension, so storing the
+    same content twice writes nothing. Images remember their ID in ``image.info``, which
+    lets a generated image be stored from the provider's bytes without re-encoding, and
+    lets an unchanged image be saved again for free. Storing existing content refreshes
+    the file's mtime, which the disk budget uses as its last-use time.
+    """
+
+    def __init__(self, root="./saves/assets"):
+        self.root = root
+        self.bytes_written = 0
+        self.deduplicated = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, asset_id):
+        return os.path.join(self.root, asset_id)
+
+    def exists(self, asset_id):
+        return bool(asset_id) and os.path.exists(self.path(asset_id))
+
+    def _reuse(self, asset_id):
+        try:
+            os.utime(self.path(asset_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_bytes(self, data, ext):
+        asset_id = f"{hashlib.sha256(data).hexdigest()}.{ext}"
+        if self._reuse(asset_id):
+            self.deduplicated += 1
+        else:
+            self.bytes_written += write_atomic(self.path(asset_id), data, fsync=False)
+        return asset_id
+
+    def put_file(self, path):
+        ext = os.path.splitext(path)[1].lstrip(".") or "bin"
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        asset_id = f"{digest.hexdigest()}.{ext}"
+        target = self.path(asset_id)
+        if self._reuse(asset_id):
+            self.deduplicated += 1
+        else:
+            shutil.copyfile(path, f"{target}.tmp")
+            os.replace(f"{target}.tmp", target)
+            self.bytes_written += os.path.getsize(target)
+        return asset_id
+
+    def put_image(self, image, data=None, ext="png"):
+        """Store an image, from its already-encoded ``data`` when given, and return its ID."""
+        asset_id = image.info.get(ASSET_ID_KEY)
+        if asset_id and self.exists(asset_id):
+            return asset_id
+        if data is None:
+            buffered = io.BytesIO()
+            image.save(buffered, format="PNG")
+            data, ext = buffered.getvalue(), "png"
+        asset_id = self.put_bytes(data, ext)
+        image.info[ASSET_ID_KEY] = asset_id
+        return asset_id
+
+    def open_image(self, asset_id):
+        """Open a stored image. PIL reads only the header here; pixels decode on first use."""
+        from PIL import Image
+
+        image = Image.open(self.path(asset_id))
+        image.info[ASSET_ID_KEY] = asset_id
+        return image
@@ -0,0 +1,80 @@
+import threading
+from collections import deque
+from typing import Dict, Iterable, List
+
+import config
+
+
+class ChatHistory:
+    """Bounded user/assistant chat history.
+
+    Backed by a ``deque(maxlen=max_history)`` so appends are O(1) and old turns fall off
+    the front. Roles always alternate and the history always starts with a user message:
+    a message with the same role as the last one replaces it (e.g. a retried action after
+    a failed turn), and an assistant message left at the head after eviction is dropped.
+
+    Safe to share between threads: the world-memory fold reads and drops old turns on its
+    own thread while the game appends, so every access goes through one lock and readers
+    get a list snapshot rather than a live view of the deque.
+    """
+
+    def __init__(self, messages: Iterable[Dict[str, str]] = (), max_history: int = config.MAX_CHAT_HISTORY):
+        self._messages = deque(maxlen=max_history)
+        self._lock = threading.Lock()
+        for message in messages:
+            self.append(message["role"], message["content"])
+
+    @property
+    def max_history(self):
+        return self._messages.maxlen
+
+    def append(self, role: str, content: str):
+        message = {"role": role, "content": content}
+        with self._lock:
+            if self._messages and self._messages[-1]["role"] == role:
+                self._messages[-1] = message
+            else:
+                self._messages.append(message)
+            while self._messages and self._messages[0]["role"] != "user":
+                self._messages.popleft()
+
+    def messages(self, exclude_last: bool = False) -> List[Dict[str, str]]:
+        """Provider payload view. The list holds the stored message dicts themselves, not copies."""
+        with self._lock:
+            if exclude_last and self._messages:
+                return [self._messages[i] for i in range(len(self._messages) - 1)]
+            return list(self._messages)
+
+    def to_list(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return list(self._messages)
+
+    @classmethod
+    def from_list(cls, messages, max_history: int = config.MAX_CHAT_HISTORY):
+        return cls(messages or [], max_history=max_history)
+
+    def drop(self, messages: Iterable[Dict[str, str]]):
+        """Remove ``messages`` (stored dicts, as returned by ``messages()``) from the front."""
+        dropped = {id(message) for message in messages}
+        with self._lock:
+            while self._messages and (id(self._messages[0]) in dropped or self._messages[0]["role"] != "user"):
+                self._messages.popleft()
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_list()[index]
+        with self._lock:
+            return self._messages[index]
+
+    def __repr__(self):
+        return f"ChatHistory({self.to_list()!r}, max_history={self.max_history})"
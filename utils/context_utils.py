@@ -0,0 +1,145 @@
+import json
+import math
+import re
+from typing import Dict, List
+
+# Word pieces and single punctuation marks; long words cost about one token per 4 chars
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def _piece_tokens(piece):
+    return math.ceil(len(piece) / 4) if len(piece) > 4 else 1
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate, close to BPE counts for English prose, JSON and SVG."""
+    if not text:
+        return 0
+    return sum(_piece_tokens(piece) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Longest prefix of text whose estimate fits in max_tokens."""
+    used = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > max_tokens:
+            return text[:match.start()]
+    return text
+
+
+class ContextSection:
+    """One prioritized part of a prompt.
+
+    A section holds either ``text`` or a list of ``items`` (oldest first). When the prompt
+    is over budget, lower priorities are trimmed first: item sections drop their oldest
+    items ``group`` at a time, text sections are truncated, or dropped whole when
+    ``elide_whole`` is set (e.g. SVG, which is useless half-cut). Required sections are
+    never trimmed.
+    """
+
+    def __init__(self, name, priority, text=None, items=None, required=False, elide_whole=False, group=1):
+        self.name = name
+        self.priority = priority
+        self.text = text
+        self.items = list(items) if items is not None else None
+        self.required = required
+        self.elide_whole = elide_whole
+        self.group = group
+        self.omitted = 0  # items dropped, or tokens cut from text
+
+    @staticmethod
+    def item_tokens(item):
+        if isinstance(item, dict):
+            return estimate_tokens(item.get("content", "")) + 4  # role and message framing
+        if isinstance(item, tuple):
+            return sum(estimate_tokens(str(part)) for part in item) + 2
+        return estimate_tokens(str(item)) + 1
+
+    def tokens(self):
+        if self.items is not None:
+            return sum(self.item_tokens(item) for item in self.items)
+        return estimate_tokens(self.text)
+
+    def trim(self, deficit):
+        """Remove at least ``deficit`` tokens if possible; return how many were removed."""
+        if self.items is not None:
+            removed = 0
+            while self.items and removed < deficit:
+                for item in self.items[:self.group]:
+                    removed += self.item_tokens(item)
+                del self.items[:self.group]
+                self.omitted += self.group
+            return removed
+
+        total = estimate_tokens(self.text)
+        if not total:
+            return 0
+        if self.elide_whole or deficit >= total:
+            self.text = ""
+            self.omitted = total
+            return total
+        self.text = truncate_to_tokens(self.text, total - deficit)
+        removed = total - estimate_tokens(self.text)
+        self.omitted = removed
+        return removed
+
+
+def assemble_context(sections: List[ContextSection], budget: int) -> Dict[str, ContextSection]:
+    """Trim sections in ascending priority until their estimated total fits the budget.
+
+    The result is deterministic for the same inputs, so unchanged state yields an
+    unchanged (and therefore cacheable) prompt.
+    """
+    deficit = sum(section.tokens() for section in sections) - budget
+    for section in sorted(sections, key=lambda s: s.priority):
+        if deficit <= 0:
+            break
+        if not section.required:
+            deficit -= section.trim(deficit)
+    return {section.name: section for section in sections}
+
+
+def build_engine_context(system_prompt, rules, scene_svg, scene_description, directions,
+                         recent_events, history, user_input, budget, memory=""):
+    """Assemble the engine request within ``budget`` estimated tokens.
+
+    Returns ``(system_blocks, messages, tokens)``. The system blocks are the stable prefix
+    (prompt, rules, world memory, tile SVG) with cache breakpoints; the messages are the
+    kept history followed by the volatile per-turn context. ``memory`` is the summary of
+    the folded events and turns, already bounded to config.WORLD_MEMORY_MAX_TOKENS.
+    """
+    sections = assemble_context([
+        ContextSection("system", 100, text=system_prompt, required=True),
+        ContextSection("action", 100, text=user_input, required=True),
+        ContextSection("scene", 90, text=f"{scene_description}\nAvailable directions: {', '.join(directions)}"),
+        ContextSection("events", 70, items=recent_events),
+        ContextSection("memory", 60, text=memory or ""),
+        ContextSection("rules", 50, items=list(rules.items())),
+        ContextSection("svg", 40, text=scene_svg or "", elide_whole=True),
+        # Drop user/assistant pairs so the kept history still alternates
+        ContextSection("history", 30, items=history, group=2),
+    ], budget)
+
+    rules_text = json.dumps(dict(sections["rules"].items))
+    if sections["rules"].omitted:
+        rules_text += f" ({sections['rules'].omitted} older rules omitted)"
+    svg_text = "[omitted to fit the context budget]" if sections["svg"].omitted else (scene_svg or "None")
+
+    system_blocks = [
+        {"type": "text", "text": system_prompt},
+        {"type": "text", "text": f"Current world rules: {rules_text}", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": f"Current scene SVG: {svg_text}", "cache_control": {"type": "ephemeral"}},
+    ]
+    if sections["memory"].text:
+        # Changes only when events are folded, so it sits before the per-tile SVG
+        system_blocks.insert(2, {"type": "text", "text": f"World memory (earlier events): {sections['memory'].text}",
+                                 "cache_control": {"type": "ephemeral"}})
+    context = (
+        f"Current scene description: {sections['scene'].text}\n"
+        f"Recent events: {json.dumps(sections['events'].items)}\n"
+        f"Player action: {user_input}\n"
+    )
+    messages = sections["history"].items + [{"role": "user", "content": context}]
+    tokens = sum(section.tokens() for section in sections.values())
+    return system_blocks, messages, tokens
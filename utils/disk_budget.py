@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+import time
+
+import config
+
+MEDIA_EXTENSIONS = {".mp4", ".mov", ".webm", ".png", ".jpg", ".jpeg", ".webp", ".gif"}
+
+
+class DiskBudget:
+    """Keeps the media under ``roots`` within a byte budget and an age limit.
+
+    The index of files (size and last use) is built by an incremental scan of at most
+    ``scan_batch`` directory entries per step, so huge directories never stall a caller.
+    Last use is the file's mtime, which the asset store refreshes when it reuses a file.
+    ``enforce`` deletes files not used for ``max_age`` seconds and, once a full scan
+    has completed, the least recently used files until the total fits in ``max_bytes``.
+    Files returned by ``referenced()`` (the live game state) are never deleted. ``start``
+    runs both on a background thread.
+    """
+
+    def __init__(self, roots=config.DISK_BUDGET_DIRS, max_bytes=config.DISK_BUDGET_BYTES,
+                 max_age=config.DISK_MAX_AGE, referenced=None, scan_batch=config.DISK_SCAN_BATCH):
+        self.roots = [os.path.abspath(root) for root in roots]  # fixed, even if the working directory changes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.referenced = referenced or (lambda: ())
+        self.scan_batch = scan_batch
+        self.files = {}  # absolute path -> (size, last used)
+        self.total_bytes = 0
+        self.scan_complete = False  # the budget is only enforced once every file is known
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self._scan = None
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _walk(self):
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS and entry.is_file():
+                        yield entry
+
+    def _set(self, path, size, last_used):
+        previous = self.files.get(path)
+        self.total_bytes += size - (previous[0] if previous else 0)
+        self.files[path] = (size, last_used)
+
+    def _forget(self, path):
+        size, _ = self.files.pop(path)
+        self.total_bytes -= size
+
+    def scan_step(self):
+        """Index up to ``scan_batch`` more files. Returns True when this finished a full pass."""
+        if self._scan is None:
+            self._scan = self._walk()
+            self._seen = set()
+        for _ in range(self.scan_batch):
+            try:
+                entry = next(self._scan)
+                stat = entry.stat()
+            except StopIteration:
+                with self._lock:
+                    # Forget files deleted behind our back
+                    for path in set(self.files) - self._seen:
+                        self._forget(path)
+                    self.scan_complete = True
+                self._scan = None
+                return True
+            except OSError:
+                continue  # removed between listing and stat
+            path = os.path.abspath(entry.path)
+            with self._lock:
+                self._seen.add(path)
+                self._set(path, stat.st_size, stat.st_mtime)
+        return False
+
+    def enforce(self):
+        """Evict expired files, then least recently used ones while over budget. Returns bytes freed."""
+        now = time.time()
+        protected = {os.path.abspath(path) for path in self.referenced() if path}
+        with self._lock:
+            over = self.total_bytes - self.max_bytes if self.scan_complete else 0
+            candidates = sorted((last_used, path, size) for path, (size, last_used) in self.files.items()
+                                if path not in protected)
+        freed = 0
+        for last_used, path, size in candidates:
+            expired = self.max_age is not None and now - last_used > self.max_age
+            if not expired and over <= 0:
+                break  # everything after this one is newer
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime > last_used:
+                    # Used since it was indexed; take it up again on the next scan
+                    with self._lock:
+                        self._set(path, stat.st_size, stat.st_mtime)
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not evict {path}: {e}")
+                continue
+            with self._lock:
+                if path in self.files:
+                    self._forget(path)
+                self.evicted += 1
+                self.evicted_bytes += size
+            over -= size
+            freed += size
+        if freed:
+            print(f"Disk budget: evicted {freed / 1024 / 1024:.1f} MB")
+        return freed
+
+    def maintain(self):
+        self.scan_step()
+        return self.enforce()
+
+    def start(self, interval=config.DISK_BUDGET_INTERVAL):
+        """Scan and enforce on a daemon thread: back to back while a pass is running, then every ``interval`` seconds."""
+        def run():
+            while not self._stop.wait(interval if self.scan_complete and self._scan is None else 0.01):
+                try:
+                    self.maintain()
+                except Exception as e:
+                    logging.warning(f"Disk budget maintenance failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="disk-budget", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self.files),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "scan_complete": self.scan_complete,
+                "evicted": self.evicted,
+                "evicted_bytes": self.evicted_bytes,
+            }
@@ -0,0 +1,477 @@
+"""Local stand-ins for the provider APIs the game calls, for offline runs and benchmarks.
+
+Each server speaks just the subset of its provider's HTTP API that utils/llm_utils.py and
+utils/visual_utils.py use:
+
+  openai      POST /v1/chat/completions (streamed tool-call deltas, usage chunk)
+  anthropic   POST /v1/messages (streamed input_json_delta events)
+  stability   POST /v2beta/stable-image/... (image bytes)
+  imgur       POST /3/image, GET /i/<id>.png
+  runway      POST /v1/image_to_video, GET /v1/tasks/<id>, GET /files/<id>.mp4
+
+Every server draws its response latency from a ``Latency`` profile, can answer a share of
+requests with 429s, and returns canned payloads (overridable per tool name / asset).
+Set LLM_WORLD_FAKE_PROVIDERS=1 to point config at them, then either call
+``start_fake_providers()`` in-process or run them standalone:
+
+  python -m utils.fake_providers [--realistic] [--rate-limit 0.05]
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import config
+
+
+class Latency:
+    """Response latency: lognormal around ``median`` seconds, plus ``per_chunk`` seconds
+    between streamed chunks. The default profile adds no delay at all."""
+
+    def __init__(self, median=0.0, sigma=0.0, per_chunk=0.0):
+        self.median = median
+        self.sigma = sigma
+        self.per_chunk = per_chunk
+
+    def sample(self, rng):
+        if not self.median:
+            return 0.0
+        return self.median * math.exp(rng.gauss(0, self.sigma)) if self.sigma else self.median
+
+
+# Rough shape of the real services, for benchmarks that want realistic turn timings
+REALISTIC_LATENCY = {
+    "openai": Latency(0.5, 0.4, per_chunk=0.02),
+    "anthropic": Latency(0.7, 0.4, per_chunk=0.02),
+    "stability": Latency(4.0, 0.3),
+    "imgur": Latency(0.8, 0.5),
+    "runway": Latency(0.3, 0.2),
+}
+REALISTIC_RUNWAY_TASK = Latency(30.0, 0.2)
+
+DEFAULT_TOOL_OUTPUTS = {
+    "game_output": {
+        "narrative": "```html\n<p>You push the heavy oak door. It groans open onto a torch-lit \"hall\" "
+                     "where dust drifts through the flickering light.</p>\n```",
+        "events": ["The player opened the oak door"],
+        "scene": {
+            "scene_description": "A long stone hall lit by iron torches. Faded banners hang between "
+                                 "pillars, and a worn carpet runs toward a raised dais at the far end.",
+            "tile_color": "#7A6A53",
+        },
+        "movement": "N",
+        "rule_updates": None,
+    },
+    "visual_output": {
+        "visuals": {
+            "first_person_description": "A first person POV view of a torch-lit stone hall, faded "
+                                        "banners between pillars, warm flickering light.",
+            "first_person_video": "The camera slowly pushes forward down the hall as torchlight flickers.",
+        },
+    },
+    "world_memory": {
+        "summary": "The player crossed the courtyard and opened the oak door into the torch-lit hall.",
+    },
+}
+DEFAULT_TOOL_OUTPUTS["game_visual_output"] = dict(DEFAULT_TOOL_OUTPUTS["game_output"],
+                                                  **DEFAULT_TOOL_OUTPUTS["visual_output"])
+DEFAULT_TEXT_OUTPUT = "The torches flicker as you look around the hall."
+
+
+def default_image(output_format="png"):
+    from PIL import Image
+
+    image = Image.linear_gradient("L").resize((320, 180)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG" if output_format in ("jpeg", "jpg") else output_format.upper())
+    return buffer.getvalue()
+
+
+def default_video():
+    """A one second 64x36 clip, rendered once with moviepy's bundled ffmpeg."""
+    from moviepy.editor import ColorClip
+
+    path = os.path.join(tempfile.mkdtemp(prefix="fake_runway_"), "clip.mp4")
+    ColorClip(size=(64, 36), color=(90, 70, 50), duration=1).write_videofile(
+        path, fps=8, codec="libx264", audio=False, logger=None)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        self.server.provider.handle(self)
+
+    do_GET = do_POST = do_DELETE = _dispatch
+
+    def do_HEAD(self):
+        # Connection warm-up probes
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def json_body(self):
+        try:
+            return json.loads(self.body or b"{}")
+        except ValueError:
+            return {}
+
+    def send_bytes(self, status, data, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload, headers=None):
+        self.send_bytes(status, json.dumps(payload).encode(), "application/json", headers)
+
+    def send_stream(self, events, per_chunk=0.0):
+        """Write server-sent events with chunked transfer encoding, sleeping between events."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            if per_chunk:
+                time.sleep(per_chunk)
+            data = event.encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class FakeProvider:
+    """Base stand-in server. Subclasses list ``routes`` as (method, path regex, handler name)."""
+
+    name = None
+    routes = []
+    rate_limit_body = {"error": {"message": "Rate limit exceeded (fake provider)", "type": "rate_limit_error"}}
+
+    def __init__(self, latency=None, rate_limit=0.0, retry_after=1, payloads=None,
+                 host=config.FAKE_PROVIDERS_HOST, port=0, seed=None):
+        self.latency = latency or Latency()
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.payloads = dict(payloads or {})
+        self.host = host
+        self.port = port
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.provider = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name=f"fake-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def handle(self, request):
+        path = request.path.split("?", 1)[0]
+        for method, pattern, handler_name in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and method == request.command:
+                break
+        else:
+            request.send_json(404, {"error": {"message": f"{self.name} fake has no route {request.command} {path}"}})
+            return
+
+        with self._lock:
+            self.stats["requests"] += 1
+            limited = self.rate_limit and self.rng.random() < self.rate_limit
+            if limited:
+                self.stats["rate_limited"] += 1
+            delay = self.latency.sample(self.rng)
+        if delay:
+            time.sleep(delay)
+        if limited:
+            request.send_json(429, self.rate_limit_body, {"Retry-After": str(self.retry_after)})
+            return
+        getattr(self, handler_name)(request, *match.groups())
+
+    def tool_output(self, tool_name):
+        return self.payloads.get(tool_name, DEFAULT_TOOL_OUTPUTS.get(tool_name, {}))
+
+    def image_bytes(self, output_format="png"):
+        key = f"image.{output_format}"
+        with self._lock:
+            if key not in self.payloads:
+                self.payloads[key] = default_image(output_format)
+            return self.payloads[key]
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class FakeOpenAI(FakeProvider):
+    name = "openai"
+    routes = [("POST", r"(?:/v1)?/chat/completions", "chat_completions")]
+    chunk_chars = 16
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._seen_prefixes = set()
+
+    def cached_tokens(self, messages):
+        """Emulate automatic prefix caching: a repeated system prompt counts as cached."""
+        prefix = json.dumps([m for m in messages if m.get("role") == "system"], sort_keys=True)
+        with self._lock:
+            hit = prefix in self._seen_prefixes
+            self._seen_prefixes.add(prefix)
+        return _estimate_tokens(prefix) if hit else 0
+
+    def chat_completions(self, request):
+        body = request.json_body()
+        if not body.get("stream"):
+            request.send_json(400, {"error": {"message": "The fake OpenAI server only streams"}})
+            return
+
+        tools = body.get("tools") or []
+        choice = body.get("tool_choice")
+        tool_name = choice["function"]["name"] if isinstance(choice, dict) else (
+            tools[0]["function"]["name"] if tools else None)
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": body.get("model", "fake")}
+
+        def chunk(delta, finish_reason=None):
+            payload = dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish_reason}])
+            if include_usage:
+                payload["usage"] = None
+            return f"data: {json.dumps(payload)}\n\n"
+
+        def events():
+            if tool_name:
+                arguments = json.dumps(self.tool_output(tool_name))
+                yield chunk({"role": "assistant", "content": None, "tool_calls": [{
+                    "index": 0, "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                    "function": {"name": tool_name, "arguments": ""}}]})
+                for piece in _split(arguments, self.chunk_chars):
+                    yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": piece}}]})
+                yield chunk({}, "tool_calls")
+            else:
+                arguments = self.payloads.get("text", DEFAULT_TEXT_OUTPUT)
+                yield chunk({"role": "assistant", "content": ""})
+                for piece in _split(arguments, self.chunk_chars):
+                    yield chunk({"content": piece})
+                yield chunk({}, "stop")
+            if include_usage:
+                prompt_tokens = _estimate_tokens(json.dumps(body.get("messages", [])))
+                completion_tokens = _estimate_tokens(arguments)
+                yield "data: " + json.dumps(dict(base, choices=[], usage={
+                    "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                    "prompt_tokens_details": {"cached_tokens": self.cached_tokens(body.get("messages", []))},
+                })) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        request.send_stream(events(), self.latency.per_chunk)
+
+
+class FakeAnthropic(FakeProvider):
+    name = "anthropic"
+    routes = [("POST", r"/v1/messages", "messages")]
+    rate_limit_body = {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit exceeded (fake provider)"}}
+    chunk_chars = 16
+
+    def messages(self, request):
+        body = request.json_body()
+        if not body.get("stream"):
+            request.send_json(400, {"type": "error", "error": {"type": "invalid_request_error",
+                                                               "message": "The fake Anthropic server only streams"}})
+            return
+
+        tools = body.get("tools") or []
+        choice = body.get("tool_choice") or {}
+        # The game passes OpenAI-style tool definitions to both providers
+        tool_name = choice.get("name") or (choice.get("function") or {}).get("name") or (
+            (tools[0].get("name") or tools[0]["function"]["name"]) if tools else None)
+        system = body.get("system") or ""
+        input_tokens = _estimate_tokens(json.dumps(body.get("messages", [])) + json.dumps(system))
+        cached = sum(_estimate_tokens(block.get("text", "")) for block in system
+                     if isinstance(block, dict) and block.get("cache_control")) if isinstance(system, list) else 0
+
+        def event(kind, payload):
+            return f"event: {kind}\ndata: {json.dumps(dict(payload, type=kind))}\n\n"
+
+        def events():
+            yield event("message_start", {"message": {
+                "id": f"msg_{uuid.uuid4().hex[:12]}", "type": "message", "role": "assistant", "content": [],
+                "model": body.get("model", "fake"), "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens - cached, "output_tokens": 1,
+                          "cache_read_input_tokens": cached, "cache_creation_input_tokens": 0}}})
+            if tool_name:
+                text = json.dumps(self.tool_output(tool_name))
+                yield event("content_block_start", {"index": 0, "content_block": {
+                    "type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:12]}", "name": tool_name, "input": {}}})
+                for piece in _split(text, self.chunk_chars):
+                    yield event("content_block_delta", {"index": 0, "delta": {"type": "input_json_delta", "partial_json": piece}})
+                stop_reason = "tool_use"
+            else:
+                text = self.payloads.get("text", DEFAULT_TEXT_OUTPUT)
+                yield event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+                for piece in _split(text, self.chunk_chars):
+                    yield event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": piece}})
+                stop_reason = "end_turn"
+            yield event("content_block_stop", {"index": 0})
+            yield event("message_delta", {"delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                                          "usage": {"output_tokens": _estimate_tokens(text)}})
+            yield event("message_stop", {})
+
+        request.send_stream(events(), self.latency.per_chunk)
+
+
+class FakeStability(FakeProvider):
+    name = "stability"
+    routes = [("POST", r"/v2beta/stable-image/(.+)", "generate")]
+    rate_limit_body = {"name": "rate_limit_exceeded", "errors": ["Rate limit exceeded (fake provider)"]}
+
+    def generate(self, request, endpoint):
+        output_format = "jpeg" if b'name="output_format"\r\n\r\njpeg' in request.body else "png"
+        request.send_bytes(200, self.image_bytes(output_format), f"image/{output_format}",
+                           {"finish-reason": "SUCCESS", "seed": "0"})
+
+
+class FakeImgur(FakeProvider):
+    name = "imgur"
+    routes = [("POST", r"/3/image", "upload"), ("GET", r"/i/(\w+)\.png", "download")]
+    rate_limit_body = {"data": {"error": "Rate limit exceeded (fake provider)"}, "success": False, "status": 429}
+
+    def upload(self, request):
+        image_id = uuid.uuid4().hex[:7]
+        request.send_json(200, {"data": {"id": image_id, "link": f"{self.base_url}/i/{image_id}.png"},
+                                "success": True, "status": 200})
+
+    def download(self, request, image_id):
+        request.send_bytes(200, self.image_bytes("png"), "image/png")
+
+
+class FakeRunway(FakeProvider):
+    name = "runway"
+    routes = [("POST", r"/v1/image_to_video", "create"), ("GET", r"/v1/tasks/([\w-]+)", "retrieve"),
+              ("DELETE", r"/v1/tasks/([\w-]+)", "cancel"), ("GET", r"/files/([\w-]+)\.mp4", "download")]
+
+    def __init__(self, *args, task_latency=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.task_latency = task_latency or Latency()
+        self.tasks = {}
+
+    def create(self, request):
+        task_id = str(uuid.uuid4())
+        with self._lock:
+            duration = self.task_latency.sample(self.rng)
+            self.tasks[task_id] = (time.time(), duration)
+        request.send_json(200, {"id": task_id})
+
+    def retrieve(self, request, task_id):
+        if task_id not in self.tasks:
+            request.send_json(404, {"error": "Task not found"})
+            return
+        created, duration = self.tasks[task_id]
+        elapsed = time.time() - created
+        task = {"id": task_id, "createdAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(created))}
+        if elapsed < duration:
+            task.update(status="RUNNING", progress=round(elapsed / duration, 2))
+        else:
+            task.update(status="SUCCEEDED", output=[f"{self.base_url}/files/{task_id}.mp4"])
+        request.send_json(200, task)
+
+    def cancel(self, request, task_id):
+        self.tasks.pop(task_id, None)
+        request.send_bytes(204, b"", "application/json")
+
+    def download(self, request, task_id):
+        with self._lock:
+            if "video" not in self.payloads:
+                self.payloads["video"] = default_video()
+        request.send_bytes(200, self.payloads["video"], "video/mp4")
+
+
+FAKE_PROVIDERS = {cls.name: cls for cls in (FakeOpenAI, FakeAnthropic, FakeStability, FakeImgur, FakeRunway)}
+
+
+def start_fake_providers(latency=None, rate_limit=0.0, payloads=None, task_latency=None,
+                         ports=config.FAKE_PROVIDER_PORTS, seed=None):
+    """Start every fake provider on its configured port and return them by name.
+
+    ``latency`` maps provider name to a ``Latency`` (e.g. REALISTIC_LATENCY); ``rate_limit``
+    is a 429 probability, or a dict of them; ``payloads`` overrides canned outputs by tool
+    name or asset key ("image.png", "image.jpeg", "video", "text").
+    """
+    providers = {}
+    for name, cls in FAKE_PROVIDERS.items():
+        kwargs = {"task_latency": task_latency} if cls is FakeRunway else {}
+        providers[name] = cls(
+            latency=(latency or {}).get(name),
+            rate_limit=rate_limit.get(name, 0.0) if isinstance(rate_limit, dict) else rate_limit,
+            payloads=payloads, port=ports.get(name, 0), seed=seed, **kwargs,
+        ).start()
+    return providers
+
+
+def stop_fake_providers(providers):
+    for provider in providers.values():
+        provider.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--realistic", action="store_true", help="use REALISTIC_LATENCY instead of no delay")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--ephemeral", action="store_true", help="listen on free ports instead of FAKE_PROVIDER_PORTS")
+    args = parser.parse_args()
+
+    providers = start_fake_providers(
+        latency=REALISTIC_LATENCY if args.realistic else None, rate_limit=args.rate_limit,
+        task_latency=REALISTIC_RUNWAY_TASK if args.realistic else None,
+        ports={} if args.ephemeral else config.FAKE_PROVIDER_PORTS)
+    for name, provider in providers.items():
+        print(f"{name:<10} {provider.base_url}")
+    print("Run the game with LLM_WORLD_FAKE_PROVIDERS=1. Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_fake_providers(providers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+
+
+def write_atomic(path, data, fsync=True):
+    """Write bytes to path via a temp file and os.replace, so readers never see a partial file.
+
+    Returns the number of bytes written.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def _boxes(f, start, end):
+    """Yield (type, payload offset, payload end) for the ISO media boxes in f[start:end]."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        header = f.read(16)
+        size, box_type, header_size = int.from_bytes(header[:4], 'big'), header[4:8], 8
+        if size == 1:
+            size, header_size = int.from_bytes(header[8:16], 'big'), 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise ValueError(f"truncated {box_type!r} box")
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def probe_video(path):
+    """Duration in seconds of an MP4/MOV file from its box headers, or None if it is not a complete one.
+
+    Reads only the top-level box headers and the movie header, so checking a saved
+    video does not decode it or start ffmpeg.
+    """
+    try:
+        end = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            top = {box_type: (start, stop) for box_type, start, stop in _boxes(f, 0, end)}
+            if b"ftyp" not in top or b"moov" not in top:
+                return None
+            for box_type, start, stop in _boxes(f, *top[b"moov"]):
+                if box_type == b"mvhd":
+                    f.seek(start)
+                    header = f.read(32)
+                    if header[0] == 1:  # version 1: 64-bit times and duration
+                        timescale, duration = int.from_bytes(header[20:24], 'big'), int.from_bytes(header[24:32], 'big')
+                    else:
+                        timescale, duration = int.from_bytes(header[12:16], 'big'), int.from_bytes(header[16:20], 'big')
+                    return duration / timescale if timescale else None
+    except (OSError, ValueError):
+        return None
+    return None
@@ -2,12 +2,16 @@ import requests
 import os
 import io
 import base64
-from PIL import Image
 from utils.visual_utils import generate_svg_image, generate_image, upload_image_to_imgur
+from utils.tracing import traced
 
 import config
 
 class ImageManager:
+    def __init__(self, asset_store=None):
+        self.asset_store = asset_store
+
+    @traced("generate_new_image")
     def generate_new_image(self, visual_output, config):
         try:
             first_person_description = visual_output.get("first_person_description")
@@ -26,7 +30,12 @@ class ImageManager:
                     negative_prompt=config.NEGATIVE_STYLE_MODIFIER
                 )
 
+            from PIL import Image
+
             new_image = Image.open(io.BytesIO(image_bytes)) if image_bytes else None
+            if new_image and self.asset_store:
+                # Keep the provider's encoding; saving this image later is free
+                self.asset_store.put_image(new_image, image_bytes, (new_image.format or "png").lower())
             return new_image
         except Exception as e:
             print(f"Failed to generate image: {str(e)}")
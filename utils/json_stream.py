@@ -0,0 +1,172 @@
+import re
+
+# Characters that change the scanner state outside of a string
+_STRUCTURAL = re.compile(r'["{}\[\]:,]')
+# Characters that end a plain run inside a string
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+_OUTSIDE = 0
+_IN_STRING = 1
+_ESCAPE = 2
+_UNICODE = 3
+
+
+class JsonStringFieldExtractor:
+    """Resumable single-pass extractor for one top-level string field of a streamed JSON object.
+
+    Feed it the raw ``input_json_delta`` / tool-call argument fragments in order and it
+    returns the newly decoded characters of the field value. Every character is looked
+    at once, so each call costs O(len(delta)) no matter how large the buffer has grown.
+    Escapes (including ``\\uXXXX`` surrogate pairs) may be split across deltas.
+    """
+
+    def __init__(self, field_name):
+        self.field_name = field_name
+        self.done = False
+        self._parts = []
+
+        self._state = _OUTSIDE
+        self._depth = 0
+        self._expect_key = False
+        self._string_is_key = False
+        self._string_is_target = False
+        self._key_parts = []
+        self._last_key = None
+        self._after_colon = False
+        self._unicode_digits = ""
+        self._high_surrogate = None
+
+    @property
+    def value(self):
+        return "".join(self._parts)
+
+    def feed(self, text):
+        """Consume the next fragment and return the decoded field text it contained."""
+        if self.done or not text:
+            return ""
+
+        out = []
+        pos = 0
+        length = len(text)
+
+        while pos < length and not self.done:
+            state = self._state
+
+            if state == _OUTSIDE:
+                match = _STRUCTURAL.search(text, pos)
+                if match is None:
+                    break
+                char = match.group()
+                pos = match.end()
+                self._handle_structural(char)
+
+            elif state == _IN_STRING:
+                match = _STRING_SPECIAL.search(text, pos)
+                end = match.start() if match else length
+                if end > pos:
+                    self._emit(text[pos:end], out)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._state = _ESCAPE
+                else:
+                    self._close_string(out)
+
+            elif state == _ESCAPE:
+                char = text[pos]
+                pos += 1
+                if char == 'u':
+                    self._unicode_digits = ""
+                    self._state = _UNICODE
+                else:
+                    self._emit(_SIMPLE_ESCAPES.get(char, char), out)
+                    self._state = _IN_STRING
+
+            else:  # _UNICODE
+                needed = 4 - len(self._unicode_digits)
+                self._unicode_digits += text[pos:pos + needed]
+                pos += needed
+                if len(self._unicode_digits) == 4:
+                    self._emit_codepoint(int(self._unicode_digits, 16), out)
+                    self._state = _IN_STRING
+
+        decoded = "".join(out)
+        if decoded:
+            self._parts.append(decoded)
+        return decoded
+
+    def _handle_structural(self, char):
+        if char == '"':
+            self._state = _IN_STRING
+            self._string_is_key = self._depth == 1 and self._expect_key
+            self._string_is_target = (
+                self._depth == 1
+                and self._after_colon
+                and self._last_key == self.field_name
+            )
+            self._key_parts = []
+            self._after_colon = False
+        elif char in '{[':
+            self._depth += 1
+            self._expect_key = char == '{'
+            self._after_colon = False
+        elif char in '}]':
+            self._depth -= 1
+            self._expect_key = False
+            self._after_colon = False
+        elif char == ':':
+            self._after_colon = self._depth == 1
+        else:  # ','
+            self._expect_key = self._depth == 1
+            self._after_colon = False
+
+    def _close_string(self, out):
+        if self._high_surrogate is not None:
+            self._flush_surrogate(out)
+        self._state = _OUTSIDE
+        if self._string_is_key:
+            self._last_key = "".join(self._key_parts)
+            self._expect_key = False
+        elif self._string_is_target:
+            self.done = True
+        self._string_is_key = False
+        self._string_is_target = False
+
+    def _emit(self, chunk, out):
+        if self._high_surrogate is not None:
+            # A lone high surrogate followed by anything else is kept as the replacement char
+            self._flush_surrogate(out)
+        if self._string_is_target:
+            out.append(chunk)
+        elif self._string_is_key:
+            self._key_parts.append(chunk)
+
+    def _emit_codepoint(self, codepoint, out):
+        if 0xD800 <= codepoint <= 0xDBFF:
+            if self._high_surrogate is not None:
+                self._flush_surrogate(out)
+            self._high_surrogate = codepoint
+            return
+        if 0xDC00 <= codepoint <= 0xDFFF and self._high_surrogate is not None:
+            combined = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (codepoint - 0xDC00)
+            self._high_surrogate = None
+            self._emit(chr(combined), out)
+            return
+        self._emit(chr(codepoint), out)
+
+    def _flush_surrogate(self, out):
+        self._high_surrogate = None
+        if self._string_is_target:
+            out.append('�')
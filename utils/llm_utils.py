@@ -1,55 +1,333 @@
 import os
-import regex as re
-import anthropic
-import openai
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 import logging
-from typing import List, Dict, Optional, Generator
+from typing import TYPE_CHECKING, List, Dict, Optional, Generator, AsyncGenerator, Callable, Union
 import config
 import json
+from utils.json_stream import JsonStringFieldExtractor
+from utils.tracing import tracer, traced_stream
 
-NARRATIVE_START_PATTERN = f'"{config.NARRATIVE_PARAMETER_NAME}"\\s*:\\s*"'
-NARRATIVE_END_PATTERN = r'(?<!\\)("[(,\s*\")(\s*\})])'
-NARRATIVE_PATTERN = NARRATIVE_START_PATTERN+r"([.\n]*)"+NARRATIVE_END_PATTERN
+# The provider SDKs take most of a second to import, so they are imported when a client is built
+if TYPE_CHECKING:
+    import anthropic
+    import openai
+
+def _get_api_key(provider):
+    env_var = {"anthropic": "ANTHROPIC_API_KEY", "openai": "OPENAI_API_KEY"}.get(provider)
+    if env_var is None:
+        raise ValueError(f"Unsupported provider: {provider}")
+    api_key = os.getenv(env_var)
+    if not api_key and config.FAKE_PROVIDERS:
+        return config.FAKE_PROVIDER_KEY
+    if not api_key:
+        raise ValueError(f"{env_var} environment variable not set")
+    return api_key
 
 def initialize_client(provider):
+    api_key = _get_api_key(provider)
     if provider == "anthropic":
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-        return anthropic.Anthropic(api_key=api_key)
-    elif provider == "openai":
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
-        return openai.Client(api_key=api_key)
-    else:
-        raise ValueError(f"Unsupported provider: {provider}")
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key, base_url=config.ANTHROPIC_BASE_URL)
+    import openai
+    return openai.Client(api_key=api_key, base_url=config.OPENAI_BASE_URL)
+
+_client_registry = {}  # (provider, API key) -> SDK client
+_http_clients = {}  # (provider, API key) -> the pooled httpx.Client that SDK client sends through
+_client_registry_lock = threading.Lock()
+
+def _build_http_client():
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=config.LLM_HTTP_POOL_SIZE,
+            max_keepalive_connections=config.LLM_HTTP_POOL_SIZE,
+            keepalive_expiry=config.LLM_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(config.LLM_HTTP_TIMEOUT, connect=config.LLM_HTTP_CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
+
+def get_client(provider):
+    """Return the process-wide client for a provider and API key, sharing one pooled HTTP transport."""
+    api_key = _get_api_key(provider)
+    key = (provider, api_key)
+    with _client_registry_lock:
+        if key not in _client_registry:
+            http_client = _build_http_client()
+            if provider == "anthropic":
+                import anthropic
+                client = anthropic.Anthropic(api_key=api_key, base_url=config.ANTHROPIC_BASE_URL, http_client=http_client)
+            else:
+                import openai
+                client = openai.Client(api_key=api_key, base_url=config.OPENAI_BASE_URL, http_client=http_client)
+            _client_registry[key] = client
+            _http_clients[key] = http_client
+        return _client_registry[key]
+
+def warm_up_clients(providers, background=True):
+    """Open a pooled connection to each provider so the first turn skips the TCP/TLS handshake."""
+    def warm():
+        for provider in set(providers):
+            try:
+                client = get_client(provider)
+                with _client_registry_lock:
+                    http_client = _http_clients[(provider, _get_api_key(provider))]
+                # Any response (even 404) leaves an established keep-alive connection in the pool
+                http_client.head(str(client.base_url), timeout=config.LLM_HTTP_CONNECT_TIMEOUT)
+            except Exception as e:
+                logging.warning(f"Warm-up failed for {provider}: {e}")
+
+    if background:
+        thread = threading.Thread(target=warm, daemon=True)
+        thread.start()
+        return thread
+    warm()
+
+def close_clients():
+    with _client_registry_lock:
+        for client in _client_registry.values():
+            client.close()
+        _client_registry.clear()
+        _http_clients.clear()
+
+def initialize_async_client(provider):
+    api_key = _get_api_key(provider)
+    if provider == "anthropic":
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=api_key, base_url=config.ANTHROPIC_BASE_URL)
+    import openai
+    return openai.AsyncClient(api_key=api_key, base_url=config.OPENAI_BASE_URL)
+
+# Usage reported for a response replayed from the ResponseCache: no provider tokens were spent
+CACHED_USAGE = {"input_tokens": 0, "cached_input_tokens": 0, "cache_write_tokens": 0, "output_tokens": 0,
+                "cached": True}
+
+class ResponseCache:
+    """Disk-backed LRU of completed LLM streams, keyed on a canonical hash of the request.
+
+    Each entry is one JSON file holding the recorded chunks; file mtime doubles as the
+    last-access time so LRU order survives restarts. Entries older than ttl are misses.
+    """
+
+    def __init__(self, cache_dir, max_bytes, ttl):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".json"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-5], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def make_key(*parts):
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is None or time.time() - entry["created"] > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            os.utime(path)
+            self.hits += 1
+            return entry["chunks"]
+
+    def put(self, key, chunks):
+        data = json.dumps({"created": time.time(), "chunks": chunks}, separators=(",", ":"))
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            path = self._path(key)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        self._total_bytes -= self._entries.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+    def replay(self, chunks, narrative_callback=None, usage_callback=None):
+        for chunk in chunks:
+            if isinstance(chunk, dict):
+                if usage_callback:
+                    usage_callback(CACHED_USAGE.copy())
+                if narrative_callback:
+                    narrative_callback("".join(c for c in chunks if isinstance(c, str)))
+            yield chunk
+        yield None
+
+    def record(self, key, stream):
+        """Pass a live stream through, storing it once the final tool dict arrives."""
+        chunks = []
+        for chunk in stream:
+            if isinstance(chunk, dict):
+                # Consumers usually stop at the dict, so store before handing it over
+                self.put(key, chunks + [chunk])
+            elif chunk is not None:
+                chunks.append(chunk)
+            yield chunk
+
+    async def arecord(self, key, stream):
+        chunks = []
+        async for chunk in stream:
+            if isinstance(chunk, dict):
+                # Disk writes stay off the event loop
+                await asyncio.to_thread(self.put, key, chunks + [chunk])
+            elif chunk is not None:
+                chunks.append(chunk)
+            yield chunk
+
+_response_cache = None
+
+def get_response_cache():
+    """Process-wide ResponseCache, or None when LLM_RESPONSE_CACHE is off."""
+    global _response_cache
+    if not config.LLM_RESPONSE_CACHE:
+        return None
+    with _client_registry_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                config.LLM_RESPONSE_CACHE_DIR,
+                config.LLM_RESPONSE_CACHE_MAX_BYTES,
+                config.LLM_RESPONSE_CACHE_TTL,
+            )
+        return _response_cache
+
+def _response_cache_key(chat_history, system_prompt, tools, tools_choice, max_tokens):
+    model = config.ANTHROPIC_DEFAULT_MODEL if config.LLM_PROVIDER == "anthropic" else config.OPENAI_DEFAULT_MODEL
+    return ResponseCache.make_key(config.LLM_PROVIDER, model, system_prompt, tools, tools_choice, chat_history, max_tokens)
+
+def _feed_narrative(narrative, text, narrative_callback):
+    """Feed one tool delta to the extractor, firing narrative_callback once when the field closes."""
+    was_done = narrative.done
+    decoded = narrative.feed(text)
+    if narrative_callback and narrative.done and not was_done:
+        narrative_callback(narrative.value)
+    return decoded
+
+def _system_text(system_prompt):
+    """Flatten system content blocks to one string; identical blocks give identical bytes."""
+    if isinstance(system_prompt, str):
+        return system_prompt
+    return "\n\n".join(block["text"] for block in system_prompt)
+
+def _anthropic_usage(usage):
+    cached = getattr(usage, "cache_read_input_tokens", None) or 0
+    written = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return {
+        "input_tokens": usage.input_tokens + cached + written,
+        "cached_input_tokens": cached,
+        "cache_write_tokens": written,
+        "output_tokens": usage.output_tokens,
+    }
+
+def _openai_usage(usage):
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "input_tokens": usage.prompt_tokens,
+        "cached_input_tokens": (getattr(details, "cached_tokens", None) or 0) if details else 0,
+        "cache_write_tokens": 0,
+        "output_tokens": usage.completion_tokens,
+    }
 
 def create_message_stream(client,
                           chat_history: List[Dict[str, str]] = None,
-                          system_prompt: str = "You are a helpful assistant.",
+                          system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
                           tools: List[Dict] = None,
                           tools_choice: Dict = None,
                           model:str = None,
                           max_tokens: int = config.MAX_TOKENS,
-                          temperature: float = 0) -> Generator[str, None, Dict]:
-    print(json.dumps(chat_history,indent=4))
-    
+                          temperature: float = 0,
+                          usage_callback: Callable[[Dict], None] = None,
+                          narrative_callback: Callable[[str], None] = None) -> Generator[str, None, Dict]:
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        logging.debug(f"LLM request messages: {json.dumps(chat_history, indent=4)}")
+
+    tool_name = tools[0]["function"]["name"] if tools else None
+
+    cache = get_response_cache() if temperature == 0 else None
+    if cache is not None:
+        key = _response_cache_key(chat_history, system_prompt, tools, tools_choice, max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            stream = cache.replay(cached, narrative_callback, usage_callback)
+            return traced_stream(stream, "llm_stream", tool=tool_name, cached=True) if tracer.enabled else stream
+
     if config.LLM_PROVIDER == "anthropic":
-        return create_anthropic_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.ANTHROPIC_DEFAULT_MODEL, max_tokens, temperature)
+        stream = create_anthropic_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.ANTHROPIC_DEFAULT_MODEL, max_tokens, temperature, usage_callback, narrative_callback)
     elif config.LLM_PROVIDER == "openai":
-        return create_openai_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.OPENAI_DEFAULT_MODEL, max_tokens, temperature)
+        stream = create_openai_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.OPENAI_DEFAULT_MODEL, max_tokens, temperature, usage_callback, narrative_callback)
     else:
         raise ValueError(f"Unsupported LLM provider: {config.LLM_PROVIDER}")
 
-def create_anthropic_message_stream(client: anthropic.Anthropic,
+    if cache is not None:
+        stream = cache.record(key, stream)
+    if tracer.enabled:
+        stream = traced_stream(stream, "llm_stream", tool=tool_name, cached=False)
+    return stream
+
+def create_anthropic_message_stream(client: "anthropic.Anthropic",
                                     chat_history: List[Dict[str, str]] = None,
-                                    system_prompt: str = "You are a helpful assistant.",
+                                    system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
                                     tools: List[Dict] = None,
                                     tools_choice: Dict = None,
                                     model: str = config.ANTHROPIC_DEFAULT_MODEL,
                                     max_tokens: int = 1500,
-                                    temperature: float = 0) -> Generator[str, None, Dict]:
+                                    temperature: float = 0,
+                                    usage_callback: Callable[[Dict], None] = None,
+                                    narrative_callback: Callable[[str], None] = None) -> Generator[str, None, Dict]:
     try:
         if chat_history is None:
             chat_history = []
@@ -63,32 +341,17 @@ def create_anthropic_message_stream(client: anthropic.Anthropic,
             tools=tools,
             tool_choice=tools_choice
         ) as stream:
-            tool_text = ""
-            in_narrative = False
+            narrative = JsonStringFieldExtractor(config.NARRATIVE_PARAMETER_NAME)
 
             for event in stream:
                 if event.type == "content_block_delta" and event.delta.type == "input_json_delta":
-                    text = event.delta.partial_json
-                    tool_text += text
-
-                    if not in_narrative:
-                        start_match = re.search(NARRATIVE_START_PATTERN, tool_text)
-                        if start_match:
-                            in_narrative = True
-                            narrative_start = start_match.end()
-                            tool_text = tool_text[narrative_start:]
-                            yield tool_text
-                    else:
-                        end_match = re.search(NARRATIVE_END_PATTERN, tool_text)
-                        if end_match:
-                            tool_text = tool_text[:end_match.start()]
-                            if text == tool_text[-len(text)-1:]:
-                                yield text
-                            in_narrative = False
-                        else:
-                            yield text
+                    text = _feed_narrative(narrative, event.delta.partial_json, narrative_callback)
+                    if text:
+                        yield text
             
             message = stream.get_final_message()
+            if usage_callback:
+                usage_callback(_anthropic_usage(message.usage))
 
             for content in message.content:
                 if content.type == 'tool_use':
@@ -100,19 +363,21 @@ def create_anthropic_message_stream(client: anthropic.Anthropic,
         logging.error(f"Error creating message: {e}")
         yield None
 
-def create_openai_message_stream(client: openai.Client,
+def create_openai_message_stream(client: "openai.Client",
                                  chat_history: List[Dict[str, str]] = None,
-                                 system_prompt: str = "You are a helpful assistant.",
+                                 system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
                                  tools: List[Dict] = None,
                                  tools_choice: Dict = None,
                                  model: str = config.OPENAI_DEFAULT_MODEL,
                                  max_tokens: int = 1500,
-                                 temperature: float = 0) -> Generator[str, None, Dict]:
+                                 temperature: float = 0,
+                                 usage_callback: Callable[[Dict], None] = None,
+                                 narrative_callback: Callable[[str], None] = None) -> Generator[str, None, Dict]:
     try:
         if chat_history is None:
             chat_history = []
 
-        messages = [{"role": "system", "content": system_prompt}] + chat_history
+        messages = [{"role": "system", "content": _system_text(system_prompt)}] + chat_history
 
         stream = client.chat.completions.create(
             model=model,
@@ -121,39 +386,25 @@ def create_openai_message_stream(client: openai.Client,
             temperature=temperature,
             tools=tools,
             tool_choice=tools_choice,
-            stream=True
+            stream=True,
+            stream_options={"include_usage": True}
         )
 
-        tool_text = ""
-        total_text = ""
-        in_narrative = False
-        
+        tool_parts = []
+        narrative = JsonStringFieldExtractor(config.NARRATIVE_PARAMETER_NAME)
+
         for chunk in stream:
-            if chunk.choices[0].delta.tool_calls:
+            if getattr(chunk, "usage", None) and usage_callback:
+                usage_callback(_openai_usage(chunk.usage))
+            if chunk.choices and chunk.choices[0].delta.tool_calls:
                 tool_call = chunk.choices[0].delta.tool_calls[0]
                 if tool_call.function.arguments:
-                    text = tool_call.function.arguments
-                    tool_text += text
-                    total_text +=text
-
-                    if not in_narrative:
-                        start_match = re.search(NARRATIVE_START_PATTERN, tool_text)
-                        if start_match:
-                            in_narrative = True
-                            narrative_start = start_match.end()
-                            tool_text = tool_text[narrative_start:]
-                            yield tool_text
-                    else:
-                        end_match = re.search(NARRATIVE_END_PATTERN, tool_text)
-                        if end_match:
-                            tool_text = tool_text[:end_match.start()]
-                            if text == tool_text[-len(text)-1:]:
-                                yield text
-                            in_narrative = False
-                        else:
-                            yield text
-
-        yield json.loads(total_text)
+                    tool_parts.append(tool_call.function.arguments)
+                    text = _feed_narrative(narrative, tool_call.function.arguments, narrative_callback)
+                    if text:
+                        yield text
+
+        yield json.loads("".join(tool_parts))
 
         yield None
 
@@ -161,17 +412,131 @@ def create_openai_message_stream(client: openai.Client,
         logging.error(f"Error creating message: {e}")
         yield None
 
-def update_chat_history(chat_history: List[Dict[str, str]], 
-                        role: str, 
-                        content: str, 
-                        max_history: int = 10) -> List[Dict[str, str]]:
-    chat_history.append({"role": role, "content": content})
+async def acreate_message_stream(client,
+                                 chat_history: List[Dict[str, str]] = None,
+                                 system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
+                                 tools: List[Dict] = None,
+                                 tools_choice: Dict = None,
+                                 model: str = None,
+                                 max_tokens: int = config.MAX_TOKENS,
+                                 temperature: float = 0,
+                                 usage_callback: Callable[[Dict], None] = None,
+                                 narrative_callback: Callable[[str], None] = None) -> AsyncGenerator:
+    """Async counterpart of create_message_stream for clients from initialize_async_client.
+
+    Yields the same protocol: decoded narrative strs, then the tool input dict, then None.
+    """
+    cache = get_response_cache() if temperature == 0 else None
+    if cache is not None:
+        key = _response_cache_key(chat_history, system_prompt, tools, tools_choice, max_tokens)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            for chunk in cache.replay(cached, narrative_callback, usage_callback):
+                yield chunk
+            return
 
-    chat_history[-max_history:]
+    if config.LLM_PROVIDER == "anthropic":
+        stream = acreate_anthropic_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.ANTHROPIC_DEFAULT_MODEL, max_tokens, temperature, usage_callback, narrative_callback)
+    elif config.LLM_PROVIDER == "openai":
+        stream = acreate_openai_message_stream(client, chat_history, system_prompt, tools, tools_choice, config.OPENAI_DEFAULT_MODEL, max_tokens, temperature, usage_callback, narrative_callback)
+    else:
+        raise ValueError(f"Unsupported LLM provider: {config.LLM_PROVIDER}")
 
-    # first message must be from user
-    if chat_history[0].get("role") != "user":
-        # lazily assuming 1 user 1 assistant back and forth
-        chat_history = chat_history[1:]
+    if cache is not None:
+        stream = cache.arecord(key, stream)
+    async for chunk in stream:
+        yield chunk
 
-    return chat_history
+async def acreate_anthropic_message_stream(client: "anthropic.AsyncAnthropic",
+                                           chat_history: List[Dict[str, str]] = None,
+                                           system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
+                                           tools: List[Dict] = None,
+                                           tools_choice: Dict = None,
+                                           model: str = config.ANTHROPIC_DEFAULT_MODEL,
+                                           max_tokens: int = 1500,
+                                           temperature: float = 0,
+                                           usage_callback: Callable[[Dict], None] = None,
+                                           narrative_callback: Callable[[str], None] = None) -> AsyncGenerator:
+    try:
+        if chat_history is None:
+            chat_history = []
+
+        async with client.messages.stream(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system=system_prompt,
+            messages=chat_history,
+            tools=tools,
+            tool_choice=tools_choice
+        ) as stream:
+            narrative = JsonStringFieldExtractor(config.NARRATIVE_PARAMETER_NAME)
+
+            async for event in stream:
+                if event.type == "content_block_delta" and event.delta.type == "input_json_delta":
+                    text = _feed_narrative(narrative, event.delta.partial_json, narrative_callback)
+                    if text:
+                        yield text
+
+            message = await stream.get_final_message()
+            if usage_callback:
+                usage_callback(_anthropic_usage(message.usage))
+
+            for content in message.content:
+                if content.type == 'tool_use':
+                    yield content.input
+
+        yield None
+
+    except Exception as e:
+        logging.error(f"Error creating message: {e}")
+        yield None
+
+async def acreate_openai_message_stream(client: "openai.AsyncClient",
+                                        chat_history: List[Dict[str, str]] = None,
+                                        system_prompt: Union[str, List[Dict]] = "You are a helpful assistant.",
+                                        tools: List[Dict] = None,
+                                        tools_choice: Dict = None,
+                                        model: str = config.OPENAI_DEFAULT_MODEL,
+                                        max_tokens: int = 1500,
+                                        temperature: float = 0,
+                                        usage_callback: Callable[[Dict], None] = None,
+                                        narrative_callback: Callable[[str], None] = None) -> AsyncGenerator:
+    try:
+        if chat_history is None:
+            chat_history = []
+
+        messages = [{"role": "system", "content": _system_text(system_prompt)}] + chat_history
+
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            tools=tools,
+            tool_choice=tools_choice,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+
+        tool_parts = []
+        narrative = JsonStringFieldExtractor(config.NARRATIVE_PARAMETER_NAME)
+
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) and usage_callback:
+                usage_callback(_openai_usage(chunk.usage))
+            if chunk.choices and chunk.choices[0].delta.tool_calls:
+                tool_call = chunk.choices[0].delta.tool_calls[0]
+                if tool_call.function.arguments:
+                    tool_parts.append(tool_call.function.arguments)
+                    text = _feed_narrative(narrative, tool_call.function.arguments, narrative_callback)
+                    if text:
+                        yield text
+
+        yield json.loads("".join(tool_parts))
+
+        yield None
+
+    except Exception as e:
+        logging.error(f"Error creating message: {e}")
+        yield None
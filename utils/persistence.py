@@ -0,0 +1,107 @@
+import atexit
+import queue
+import threading
+import time
+
+import config
+
+_STOP = object()
+
+
+class PersistenceWriter:
+    """Runs ``commit(*args)`` on a dedicated writer thread.
+
+    ``request`` only enqueues the arguments and returns, so callers never wait on disk.
+    The writer drains every queued request before committing and writes just the latest
+    one, so a burst of saves becomes one write. The queue is bounded; when it is full the
+    oldest request is dropped, since a newer one supersedes it anyway. ``flush`` waits
+    for everything requested so far, and runs at interpreter exit.
+    """
+
+    def __init__(self, commit, max_queue=config.PERSISTENCE_QUEUE_SIZE, name="state-writer"):
+        self.commit = commit
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._cond = threading.Condition()
+        self._requested = 0
+        self._written = 0
+        self._stats = {"requests": 0, "writes": 0, "coalesced": 0, "dropped": 0, "errors": 0,
+                       "last_lag_ms": 0.0, "max_lag_ms": 0.0, "total_lag_ms": 0.0, "last_write_ms": 0.0}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def request(self, *args):
+        with self._cond:
+            self._requested += 1
+            self._stats["requests"] += 1
+            item = (self._requested, time.perf_counter(), args)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = self._queue.get_nowait()
+                except queue.Empty:
+                    continue
+                # Keep the older enqueue time so lag still counts from the first pending request
+                item = (item[0], min(item[1], dropped[1]), item[2])
+                with self._cond:
+                    self._stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(item is _STOP for item in batch)
+            requests = [item for item in batch if item is not _STOP]
+            if requests:
+                self._write(requests)
+            if stop:
+                return
+
+    def _write(self, requests):
+        seq, _, args = requests[-1]
+        start = time.perf_counter()
+        try:
+            self.commit(*args)
+        except Exception as e:
+            print(f"Error in persistence writer: {e}")
+            with self._cond:
+                self._stats["errors"] += 1
+        end = time.perf_counter()
+        lag_ms = (end - min(item[1] for item in requests)) * 1000
+        with self._cond:
+            self._written = max(self._written, seq)
+            self._stats["writes"] += 1
+            self._stats["coalesced"] += len(requests) - 1
+            self._stats["last_lag_ms"] = lag_ms
+            self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], lag_ms)
+            self._stats["total_lag_ms"] += lag_ms
+            self._stats["last_write_ms"] = (end - start) * 1000
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Wait until every request made so far is written. Returns False on timeout."""
+        with self._cond:
+            target = self._requested
+            return self._cond.wait_for(lambda: self._written >= target or not self._thread.is_alive(), timeout)
+
+    def close(self, timeout=config.PERSISTENCE_FLUSH_TIMEOUT):
+        """Flush-on-shutdown: write what is pending, then stop the thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats["pending"] = self._requested - self._written
+        stats["mean_lag_ms"] = round(stats.pop("total_lag_ms") / stats["writes"], 3) if stats["writes"] else 0.0
+        return stats
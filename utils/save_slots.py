@@ -0,0 +1,255 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+import config
+from utils.asset_store import AssetStore
+from utils.file_utils import write_atomic
+
+
+class SaveSlots:
+    """Named save slots made of per-turn checkpoints.
+
+    Checkpoints form a tree in ``<root>/checkpoints``: each one names its parent and is
+    either a full snapshot or a delta holding only what changed since the parent (changed
+    tiles, new events, changed rules, the chat history edit and the image and video asset
+    IDs). A chain starts with a full snapshot and every ``snapshot_every`` deltas another
+    full snapshot is written, so loading any checkpoint replays at most that many deltas.
+    A slot is just a pointer to its latest checkpoint in ``slots.json``, so branching from
+    an old turn shares every checkpoint up to it.
+
+    ``checkpoint`` only captures the delta in memory; ``flush`` writes the captured
+    checkpoints and runs on the persistence writer with the rest of the save.
+    """
+
+    def __init__(self, root=config.SAVE_SLOTS_DIR, snapshot_every=config.CHECKPOINT_SNAPSHOT_EVERY,
+                 asset_store=None):
+        self.root = root
+        self.snapshot_every = snapshot_every
+        self.assets = asset_store or AssetStore()
+        self.checkpoints_dir = os.path.join(root, "checkpoints")
+        self.index_path = os.path.join(root, "index.jsonl")
+        self.slots_path = os.path.join(root, "slots.json")
+        os.makedirs(self.checkpoints_dir, exist_ok=True)
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._video_ids = {}  # video path -> asset ID, so a clip is hashed once
+        self._base = None  # the state of the active slot's head, which the next delta is taken against
+
+        self.index = {}  # checkpoint ID -> metadata
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        meta = json.loads(line)
+                        self.index[meta["id"]] = meta
+        slots = {"active": config.SAVE_SLOT, "slots": {}}
+        if os.path.exists(self.slots_path):
+            with open(self.slots_path, 'r') as f:
+                slots = json.load(f)
+        self.active = slots["active"]
+        self.slots = {name: head for name, head in slots["slots"].items() if head is None or head in self.index}
+
+    def _path(self, checkpoint_id):
+        return os.path.join(self.checkpoints_dir, f"{checkpoint_id}.json")
+
+    def head(self, slot=None):
+        return self.slots.get(slot or self.active)
+
+    def checkpoint(self, world_map, world_state, chat_history, current_video, current_image):
+        """Capture the current state as the next checkpoint of the active slot. Returns its ID."""
+        tiles = world_map.take_changes()
+        rules, events, memory = world_state.snapshot()
+        history = chat_history.to_list()
+
+        with self._lock:
+            parent = self.slots.get(self.active)
+            depth = self.index[parent]["depth"] + 1 if parent in self.index else 0
+            # A fold drops events from the front, so event offsets only hold within one memory
+            full = (self._base is None or depth > self.snapshot_every or len(events) < self._base["events"]
+                    or memory["folded"] != self._base["folded"])
+            if full:
+                depth = 0
+                data = {
+                    "tiles": [[x, y, tile] for (x, y), tile in world_map.iter_tiles()],
+                    "current_position": list(world_map.current_position),
+                    "rules": rules,
+                    "events": events,
+                    "memory": memory,
+                    "history": history,
+                }
+            else:
+                base = self._base
+                data = {
+                    "tiles": [[x, y, tile] for (x, y), tile in tiles.items()],
+                    "current_position": list(world_map.current_position),
+                    "rules": {name: text for name, text in rules.items() if base["rules"].get(name) != text},
+                    "events_from": base["events"],
+                    "events": events[base["events"]:],
+                    "history": _history_delta(base["history"], history),
+                }
+            meta = {
+                "id": uuid.uuid4().hex[:16],
+                "parent": parent,
+                "slot": self.active,
+                "turn": self.index[parent]["turn"] + 1 if parent in self.index else 0,
+                "kind": "full" if full else "delta",
+                "depth": depth,
+                "time": time.time(),
+            }
+            self._pending.append((meta, data, current_video, current_image))
+            self.index[meta["id"]] = meta
+            self.slots[self.active] = meta["id"]
+            self._base = {"rules": rules, "events": len(events), "folded": memory["folded"], "history": history}
+            return meta["id"]
+
+    def flush(self):
+        """Write the captured checkpoints and the slot pointers. Returns the bytes written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            slots = {"active": self.active, "slots": dict(self.slots)}
+        if not pending:
+            return 0
+        written = 0
+        index_lines = []
+        for meta, data, video, image in pending:
+            data["video"] = self._video_id(video)
+            data["image"] = self.assets.put_image(image) if image else None
+            meta["assets"] = [asset_id for asset_id in (data["video"], data["image"]) if asset_id]
+            record = json.dumps(dict(meta, data=data), separators=(",", ":")).encode("utf-8")
+            written += write_atomic(self._path(meta["id"]), record)
+            index_lines.append(json.dumps(meta, separators=(",", ":")) + "\n")
+        data = "".join(index_lines).encode("utf-8")
+        with open(self.index_path, 'ab') as f:
+            f.write(data)
+        written += len(data)
+        written += write_atomic(self.slots_path, json.dumps(slots).encode("utf-8"))
+        self.bytes_written += written
+        return written
+
+    def _video_id(self, path):
+        if not path or not os.path.exists(path):
+            return None
+        if path not in self._video_ids:
+            self._video_ids[path] = self.assets.put_file(path)
+        return self._video_ids[path]
+
+    def load(self, slot=None, checkpoint_id=None):
+        """Rebuild the state at a checkpoint (default: the head of ``slot``) and make ``slot`` active.
+
+        Loading an older checkpoint of a slot rewinds that slot; later checkpoints stay on
+        disk and remain loadable by ID. Returns ``None`` when there is nothing to load.
+        """
+        self.flush()
+        slot = slot or self.active
+        checkpoint_id = checkpoint_id or self.slots.get(slot)
+        if checkpoint_id not in self.index:
+            return None
+
+        chain = []
+        record_id = checkpoint_id
+        while True:
+            with open(self._path(record_id), 'rb') as f:
+                record = json.load(f)
+            chain.append(record)
+            if record["kind"] == "full":
+                break
+            record_id = record["parent"]
+
+        state = None
+        for record in reversed(chain):
+            data = record["data"]
+            if state is None:
+                state = {
+                    "tiles": {(x, y): tile for x, y, tile in data["tiles"]},
+                    "rules": dict(data["rules"]),
+                    "events": list(data["events"]),
+                    "memory": data.get("memory") or {"summary": "", "folded": 0},
+                    "history": list(data["history"]),
+                }
+            else:
+                state["tiles"].update({(x, y): tile for x, y, tile in data["tiles"]})
+                state["rules"].update(data["rules"])
+                state["events"] = state["events"][:data["events_from"]] + data["events"]
+                state["history"] = _apply_history_delta(state["history"], data["history"])
+            state["current_position"] = tuple(data["current_position"])
+            state["video"] = data.get("video")
+            state["image"] = data.get("image")
+
+        with self._lock:
+            self.active = slot
+            self.slots[slot] = checkpoint_id
+            self._base = {"rules": dict(state["rules"]), "events": len(state["events"]),
+                          "folded": state["memory"]["folded"], "history": list(state["history"])}
+        self._write_slots()
+        state["checkpoint"] = checkpoint_id
+        state["replayed"] = len(chain) - 1
+        return state
+
+    def start(self, slot):
+        """Make ``slot`` active with no checkpoints yet; the next checkpoint is a full snapshot."""
+        with self._lock:
+            self.active = slot
+            self.slots[slot] = None
+            self._base = None
+        self._write_slots()
+
+    def branch(self, slot, checkpoint_id):
+        """Create ``slot`` pointing at an existing checkpoint. Nothing is copied."""
+        if checkpoint_id not in self.index:
+            raise KeyError(f"Unknown checkpoint: {checkpoint_id}")
+        with self._lock:
+            self.slots[slot] = checkpoint_id
+        self._write_slots()
+
+    def _write_slots(self):
+        with self._lock:
+            slots = {"active": self.active, "slots": dict(self.slots)}
+        self.bytes_written += write_atomic(self.slots_path, json.dumps(slots).encode("utf-8"))
+
+    def history(self, slot=None):
+        """Metadata of a slot's checkpoints, newest first."""
+        checkpoints = []
+        checkpoint_id = self.slots.get(slot or self.active)
+        while checkpoint_id in self.index:
+            checkpoints.append(self.index[checkpoint_id])
+            checkpoint_id = self.index[checkpoint_id]["parent"]
+        return checkpoints
+
+    def head_assets(self):
+        """Asset IDs used by the latest checkpoint of every slot."""
+        with self._lock:
+            return {asset_id for head in self.slots.values() if head in self.index
+                    for asset_id in self.index[head].get("assets", ())}
+
+    def list_slots(self):
+        return [{
+            "slot": name,
+            "active": name == self.active,
+            "head": head,
+            "turn": self.index[head]["turn"] if head in self.index else None,
+            "time": self.index[head]["time"] if head in self.index else None,
+        } for name, head in self.slots.items()]
+
+
+def _history_delta(old, new):
+    """Describe ``new`` as ``old[drop:drop + keep] + append``, keeping as much of ``old`` as possible.
+
+    The chat history only appends, replaces its last message and drops from the front,
+    so the delta is usually a couple of appended messages.
+    """
+    best_drop, best_keep = len(old), 0
+    for drop in range(len(old)):
+        keep = 0
+        while keep < len(new) and drop + keep < len(old) and old[drop + keep] == new[keep]:
+            keep += 1
+        if keep > best_keep:
+            best_drop, best_keep = drop, keep
+    return {"drop": best_drop, "keep": best_keep, "append": new[best_keep:]}
+
+
+def _apply_history_delta(old, delta):
+    return old[delta["drop"]:delta["drop"] + delta["keep"]] + delta["append"]
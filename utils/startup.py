@@ -0,0 +1,19 @@
+import importlib
+import logging
+import threading
+
+
+def preload_modules(names, background=True):
+    """Import modules ahead of first use, by default on a daemon thread so startup does not wait."""
+    def preload():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logging.warning(f"Preloading {name} failed: {e}")
+
+    if background:
+        thread = threading.Thread(target=preload, name="module-preload", daemon=True)
+        thread.start()
+        return thread
+    preload()
@@ -2,53 +2,95 @@ import json
 import os
 import io
 import base64
-import time
-import shutil
+import threading
 
-from PIL import Image
-
-from moviepy.editor import VideoFileClip
+from utils.asset_store import AssetStore
+from utils.chat_history import ChatHistory
+from utils.file_utils import probe_video, write_atomic
+from utils.tracing import traced
 
 
 class StateManager:
-    def save_game_state(self, world_map, world_state, chat_history, current_video, current_image, saves_dir="./saves"):
+    """Saves the whole game as one commit.
+
+    A commit writes only the dirty parts: the world map and world state skip clean saves,
+    images and videos go to the content-addressed AssetStore (so an unchanged asset costs
+    nothing) and game_state.json, which references them by ID, is rewritten only when its
+    content differs. Files are replaced atomically. A commit requested while another one
+    is running (e.g. from the video callback thread) is coalesced: the running commit goes
+    round once more with the latest arguments.
+    """
+
+    def __init__(self, saves_dir="./saves", asset_store=None):
+        self.saves_dir = saves_dir
+        self.assets = asset_store or AssetStore(os.path.join(saves_dir, "assets"))
+        self.bytes_written = 0
+        self.last_commit_bytes = 0
+        self.commits = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._committing = False
+        self._pending = None
+        self._saved_state = None
+        self._saved_video = (None, None)  # (source path, asset ID)
+        self.saved_assets = ()  # asset IDs referenced by game_state.json
+
+    @traced("save_game_state")
+    def save_game_state(self, world_map, world_state, chat_history, current_video, current_image):
+        with self._lock:
+            self._pending = (world_map, world_state, chat_history, current_video, current_image)
+            if self._committing:
+                self.coalesced += 1
+                return
+            self._committing = True
+
+        while True:
+            with self._lock:
+                args, self._pending = self._pending, None
+                if args is None:
+                    self._committing = False
+                    return
+            self._commit(*args)
+
+    def _commit(self, world_map, world_state, chat_history, current_video, current_image):
+        written = 0
+        assets_before = self.assets.bytes_written
         try:
-            os.makedirs(saves_dir, exist_ok=True)
-            
-            # Save world and event state
-            world_map.save_state()
-            world_state.save_state()
-            
+            # Save world and event state (both no-ops when clean)
+            written += world_map.save_state() or 0
+            written += world_state.save_state() or 0
+
             state = {
-                'chat_history': chat_history,
-                'video_path': None,
-                'current_image': None
+                'chat_history': chat_history.to_list(),
+                'video': None,
+                'image': None
             }
-            
-            # Save current video with unique name
+
+            # Videos are hashed once per new path; images remember their asset ID
             if current_video and os.path.exists(current_video):
-                video_filename = f"video_state_{int(time.time())}.mp4"
-                video_save_path = os.path.join(saves_dir, video_filename)
-                shutil.copy2(current_video, video_save_path)
-                state['video_path'] = video_save_path
-                print(f"Saved video state to: {video_save_path}")
-            
-            # Save current image
+                if self._saved_video[0] != current_video:
+                    self._saved_video = (current_video, self.assets.put_file(current_video))
+                state['video'] = self._saved_video[1]
             if current_image:
-                image_filename = f"image_state_{int(time.time())}.png"
-                image_save_path = os.path.join(saves_dir, image_filename)
-                current_image.save(image_save_path)
-                state['current_image'] = self.encode_image_to_base64(current_image)
-                print(f"Saved image state to: {image_save_path}")
-            
-            # Save state file
-            state_path = os.path.abspath("./game_state.json")
-            with open(state_path, 'w') as f:
-                json.dump(state, f)
-            print(f"Saved game state to: {state_path}")
-            
+                state['image'] = self.assets.put_image(current_image)
+
+            self.saved_assets = tuple(asset_id for asset_id in (state['video'], state['image']) if asset_id)
+
+            # Save state file if it changed
+            data = json.dumps(state, separators=(",", ":")).encode('utf-8')
+            if data != self._saved_state:
+                state_path = os.path.abspath("./game_state.json")
+                written += write_atomic(state_path, data)
+                self._saved_state = data
+                print(f"Saved game state to: {state_path}")
+
         except Exception as e:
             print(f"Error saving game state: {e}")
+        finally:
+            written += self.assets.bytes_written - assets_before
+            self.commits += 1
+            self.last_commit_bytes = written
+            self.bytes_written += written
 
     def load_game_state(self, world_map, world_state, video_manager, load_path="game_state.json"):
         try:
@@ -59,31 +101,47 @@ class StateManager:
                 print("No game state file found")
                 return False
                 
-            with open(load_path, 'r') as f:
-                state = json.load(f)
+            with open(load_path, 'rb') as f:
+                raw_state = f.read()
+            state = json.loads(raw_state)
             
-            chat_history = state.get('chat_history', [])
-            video_path = state.get('video_path')
+            chat_history = ChatHistory.from_list(state.get('chat_history'))
+            video_path = None
             current_image = None
 
-            # Load video
-            if video_path and os.path.exists(video_path):
-                try:
-                    with VideoFileClip(video_path) as clip:
-                        duration = clip.duration
+            # Saves from before the asset store keep a video path and a base64 image
+            if 'video_path' in state or 'current_image' in state:
+                raw_state = None  # rewrite in the new format on the next commit
+                if state.get('video_path') and os.path.exists(state['video_path']):
+                    state['video'] = self.assets.put_file(state['video_path'])
+                if state.get('current_image'):
+                    from PIL import Image
+
+                    image_data = base64.b64decode(state['current_image'])
+                    image = Image.open(io.BytesIO(image_data))
+                    state['image'] = self.assets.put_image(image, image_data, (image.format or "png").lower())
+
+            # Load video, checking its container headers rather than decoding it
+            if self.assets.exists(state.get('video')):
+                video_path = self.assets.path(state['video'])
+                duration = probe_video(video_path)
+                if duration is None:
+                    print(f"Error validating video file: {video_path}")
+                else:
                     print(f"Loaded video: {video_path} (duration: {duration}s)")
-                    # Optionally, add to video_manager if needed
-                except Exception as e:
-                    print(f"Error validating video file: {e}")
             
-            # Load image
-            if state.get('current_image'):
+            # Load image (decoded on first use)
+            if self.assets.exists(state.get('image')):
                 try:
-                    image_data = base64.b64decode(state['current_image'])
-                    current_image = Image.open(io.BytesIO(image_data))
+                    current_image = self.assets.open_image(state['image'])
                     print("Loaded current image")
                 except Exception as e:
                     print(f"Error loading image: {e}")
+
+            # What is on disk now is clean
+            self._saved_state = raw_state
+            self._saved_video = (video_path, state.get('video'))
+            self.saved_assets = tuple(asset_id for asset_id in (state.get('video'), state.get('image')) if asset_id)
             
             return {
                 'chat_history': chat_history,
@@ -0,0 +1,184 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import config
+
+
+class _NoopSpan:
+    """Shared do-nothing span returned while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = repr(exc)
+        self.tracer.add_span(self.name, self.start, time.perf_counter(), **self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Collects timed spans for a session and exports them as JSONL and Chrome trace events.
+
+    Disabled tracing costs one attribute check per instrumented call. When enabled, each
+    finished span is appended to ``<trace_dir>/trace_<session>.jsonl`` as it completes, and
+    the Chrome trace (``chrome://tracing`` / Perfetto) is written on export or at exit.
+    """
+
+    def __init__(self, enabled=config.TRACING_ENABLED, trace_dir=config.TRACE_DIR, max_spans=100_000):
+        self.trace_dir = trace_dir
+        self.session = time.strftime("%Y%m%d_%H%M%S")
+        self.turn = None
+        self.spans = deque(maxlen=max_spans)
+        self._epoch = time.perf_counter()
+        self._wall_epoch = time.time()
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        if self.trace_dir:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            self._jsonl = open(os.path.join(self.trace_dir, f"trace_{self.session}.jsonl"), "a", encoding="utf-8")
+            atexit.register(self.close)
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def add_span(self, name, start, end, **attrs):
+        """Record a finished span from two time.perf_counter() readings."""
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        record = {
+            "name": name,
+            "start": round(self._wall_epoch + (start - self._epoch), 6),
+            "duration_ms": round((end - start) * 1000, 3),
+            "thread": thread.name,
+            "tid": thread.ident,
+            "turn": self.turn,
+            "attrs": attrs,
+            "_ts": (start - self._epoch) * 1e6,
+        }
+        with self._lock:
+            self.spans.append(record)
+            if self._jsonl:
+                self._jsonl.write(json.dumps({k: v for k, v in record.items() if k != "_ts"}, default=str) + "\n")
+                self._jsonl.flush()
+
+    def chrome_trace(self):
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            "name": span["name"],
+            "ph": "X",
+            "ts": span["_ts"],
+            "dur": span["duration_ms"] * 1000,
+            "pid": pid,
+            "tid": span["tid"],
+            "args": dict(span["attrs"], turn=span["turn"]),
+        } for span in spans]
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                   for tid, name in {span["tid"]: span["thread"] for span in spans}.items()]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path=None):
+        path = path or os.path.join(self.trace_dir, f"trace_{self.session}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        return path
+
+    def close(self):
+        if not self.enabled:
+            return
+        if self.spans and self.trace_dir:
+            self.export_chrome()
+        self.enabled = False
+        atexit.unregister(self.close)
+        with self._lock:
+            if self._jsonl:
+                self._jsonl.close()
+                self._jsonl = None
+
+
+tracer = Tracer()
+
+
+def traced(name):
+    """Decorator wrapping every call of the function in a span named ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def traced_stream(stream, name, **attrs):
+    """Pass an LLM chunk stream through, recording time to first chunk, narrative and total spans."""
+    start = time.perf_counter()
+    first_chunk = narrative_start = narrative_end = None
+    final = None
+    try:
+        for chunk in stream:
+            now = time.perf_counter()
+            if first_chunk is None:
+                first_chunk = now
+            if isinstance(chunk, str):
+                narrative_start = narrative_start or now
+                narrative_end = now
+            elif isinstance(chunk, dict):
+                # Consumers stop at the final dict, so close the spans here
+                final = chunk
+                break
+            yield chunk
+    finally:
+        end = time.perf_counter()
+        ttft_ms = round((first_chunk - start) * 1000, 3) if first_chunk else None
+        tracer.add_span(name, start, end, ttft_ms=ttft_ms, **attrs)
+        if narrative_start is not None:
+            tracer.add_span("narrative_stream", narrative_start, narrative_end, **attrs)
+
+    if final is not None:
+        yield final
+        yield from stream
@@ -1,31 +1,59 @@
 import os
+import re
 import time
 import shutil
 import requests
 import threading
-from moviepy.editor import VideoFileClip, concatenate_videoclips
-from PIL import Image
 from io import BytesIO
+from utils.file_utils import write_atomic
 from utils.visual_utils import upload_image_to_imgur, image_to_video
+from utils.tracing import traced
+
+_CLIP_NAME = re.compile(r"video_(\d+)\.mp4$")
+
 
 class VideoManager:
     def __init__(self, video_tmp_dir="./video_tmp", saves_dir="./saves"):
         self.video_tmp_dir = video_tmp_dir
         self.saves_dir = saves_dir
         self.videos_generated = 0
+        self.active_clips = set()  # clips being generated, which the disk budget must not evict
+        self._lock = threading.Lock()
         os.makedirs(self.video_tmp_dir, exist_ok=True)
         os.makedirs(self.saves_dir, exist_ok=True)
+        self._counter_path = os.path.join(self.video_tmp_dir, "next_clip")
+        self._next_clip = self._load_next_clip()
+
+    def _load_next_clip(self):
+        """The next free clip number: past the persisted counter and every clip on disk."""
+        next_clip = 0
+        if os.path.exists(self._counter_path):
+            with open(self._counter_path) as f:
+                next_clip = int(f.read().strip() or 0)
+        for name in os.listdir(self.video_tmp_dir):
+            match = _CLIP_NAME.match(name)
+            if match:
+                next_clip = max(next_clip, int(match.group(1)) + 1)
+        return next_clip
+
+    def reserve_clip_path(self):
+        """A clip path no earlier run or concurrent generation has used."""
+        with self._lock:
+            number, self._next_clip = self._next_clip, self._next_clip + 1
+            # Persisted so numbers stay unique even after old clips are evicted
+            write_atomic(self._counter_path, str(self._next_clip).encode(), fsync=False)
+            path = os.path.join(self.video_tmp_dir, f"video_{number}.mp4")
+            self.active_clips.add(path)
+            return path
 
     def start_video_generation(self, image_path, prompt, callback, rate_limited_flag):
+        temp_video_path = self.reserve_clip_path()
+
         def video_gen_thread():
             try:
                 # Upload image to imgur
                 image_url = upload_image_to_imgur(image_path)
                 
-                # Generate unique video name
-                video_name = f"video_{self.videos_generated}.mp4"
-                temp_video_path = os.path.join(self.video_tmp_dir, video_name)
-                
                 # Generate video
                 image_to_video(prompt, image_url, temp_video_path)
                 
@@ -40,11 +68,18 @@ class VideoManager:
             except Exception as e:
                 print(f"Video generation failed: {str(e)}")
                 callback(video_path=None, last_frame=None, rate_limited=False)
+            finally:
+                with self._lock:
+                    self.active_clips.discard(temp_video_path)
 
-        thread = threading.Thread(target=video_gen_thread, daemon=True)
+        thread = threading.Thread(target=video_gen_thread, name="video-generation", daemon=True)
         thread.start()
 
+    @traced("extract_last_frame")
     def extract_last_frame(self, video_path):
+        from moviepy.editor import VideoFileClip
+        from PIL import Image
+
         try:
             with VideoFileClip(video_path) as clip:
                 frames = [frame for i, frame in enumerate(clip.iter_frames()) 
@@ -57,10 +92,12 @@ class VideoManager:
 
     def compile_videos(self):
         """Compile all videos in video_tmp into a single video."""
+        from moviepy.editor import VideoFileClip, concatenate_videoclips
+
         try:
             video_files = sorted(
-                [f for f in os.listdir(self.video_tmp_dir) if f.startswith("video_")],
-                key=lambda x: int(x.split("_")[1].split(".")[0])
+                [f for f in os.listdir(self.video_tmp_dir) if _CLIP_NAME.match(f)],
+                key=lambda x: int(_CLIP_NAME.match(x).group(1))
             )
             
             if not video_files:
@@ -92,18 +129,3 @@ class VideoManager:
             
         except Exception as e:
             return None, f"Compilation failed: {str(e)}"
-
-    def cleanup_old_videos(self):
-        """Remove old video files to prevent disk space issues"""
-        if not os.path.exists(self.saves_dir):
-            return
-        for file in os.listdir(self.saves_dir):
-            if file.startswith("save_video_"):
-                file_path = os.path.join(self.saves_dir, file)
-                # Keep only videos from last 24 hours
-                if time.time() - os.path.getctime(file_path) > 86400:
-                    try:
-                        os.remove(file_path)
-                        print(f"Removed old video: {file_path}")
-                    except Exception as e:
-                        print(f"Error removing old video {file_path}: {e}")
@@ -2,16 +2,14 @@ import requests
 import json
 import time
 import os
-from PIL import Image, ImageFilter
 import io
-import cairosvg
 import base64
 
-import runwayml
+# cairosvg and runwayml are imported where they are used, so importing this module stays cheap
 
-from imgur_python import Imgur
+from utils.tracing import tracer, traced
 
-from config import (IMAGE_GENERATION_MODEL, SD_KEY, SD_API_HOST, IMAGE_GENERATION_SEED, SVG_IMAGE_ENDPOINT, IMGUR_CLIENT_ID, IMGUR_CLIENT_SECRET,VIDEO_GENERATION_MODEL, VIDEO_GENERATION_KEY)
+from config import (IMAGE_GENERATION_MODEL, SD_KEY, SD_API_HOST, IMAGE_GENERATION_SEED, SVG_IMAGE_ENDPOINT, IMGUR_CLIENT_ID, IMGUR_CLIENT_SECRET, IMGUR_API_URL, VIDEO_GENERATION_MODEL, VIDEO_GENERATION_KEY, RUNWAY_BASE_URL, VIDEO_POLL_INTERVAL)
 
 
 def send_async_generation_request(host, params, image_bytes=None):
@@ -63,6 +61,7 @@ def send_async_generation_request(host, params, image_bytes=None):
 
     return response
 
+@traced("upload_image_to_imgur")
 def upload_image_to_imgur(image_path):
     """Uploads an image to Imgur and returns the URL.
 
@@ -74,7 +73,7 @@ def upload_image_to_imgur(image_path):
     """
     client_id = IMGUR_CLIENT_ID
     headers = {"Authorization": f"Client-ID {client_id}"}
-    url = "https://api.imgur.com/3/image"
+    url = f"{IMGUR_API_URL}/3/image"
 
     with open(image_path, "rb") as file:
         files = {"image": file}
@@ -93,6 +92,7 @@ def upload_image_to_imgur(image_path):
     else:
         raise Exception(f"Failed to upload image: {response.text}")
 
+@traced("image_to_video")
 def image_to_video(prompt_text, image_url, video_path):
     """Converts an image to a video.
 
@@ -105,8 +105,10 @@ def image_to_video(prompt_text, image_url, video_path):
     print(f"Video Prompt: {prompt_text}")
 
 
+    import runwayml
+
     # The env var RUNWAYML_API_SECRET is expected to contain your API key.
-    client = runwayml.RunwayML(api_key=VIDEO_GENERATION_KEY)
+    client = runwayml.RunwayML(api_key=VIDEO_GENERATION_KEY, base_url=RUNWAY_BASE_URL)
 
     try:
         task = client.image_to_video.create(
@@ -123,32 +125,34 @@ def image_to_video(prompt_text, image_url, video_path):
     # print(f"Task ID: {task_id}")
     failure_code = None
     # Wait for the task to complete
-    while True:
-        time.sleep(1)
-        task = client.tasks.retrieve(id=task_id)
-        status = task.status
-        if status == 'PENDING':
-            continue
-        elif status == 'RUNNING':
-            # print(f"Task {task_id} is running with progress {task.progress}")
-            continue
-        elif status == 'SUCCEEDED':
-            output_urls = task.output
-            # print(f"Task {task_id} succeeded with output URLs:")
-            break
-        elif status == 'FAILED':
-            failure_reason = task.failure
-            failure_code = task.failureCode
-            print(failure_code)
-            if failure_code == 429:
-                raise requests.exceptions.RetryError("Rate limit exceeded")
-            else:
-                raise Exception(f"Task {task_id} failed with code {failure_code}: {failure_reason}")
+    with tracer.span("image_to_video.poll", task_id=task_id) as poll:
+        while True:
+            time.sleep(VIDEO_POLL_INTERVAL)
+            task = client.tasks.retrieve(id=task_id)
+            status = task.status
+            poll.set(status=status)
+            if status == 'PENDING':
+                continue
+            elif status == 'RUNNING':
+                # print(f"Task {task_id} is running with progress {task.progress}")
+                continue
+            elif status == 'SUCCEEDED':
+                output_urls = task.output
+                # print(f"Task {task_id} succeeded with output URLs:")
+                break
+            elif status == 'FAILED':
+                failure_reason = task.failure
+                failure_code = task.failureCode
+                print(failure_code)
+                if failure_code == 429:
+                    raise requests.exceptions.RetryError("Rate limit exceeded")
+                else:
+                    raise Exception(f"Task {task_id} failed with code {failure_code}: {failure_reason}")
     
-        elif status == 'CANCELED':
-            raise Exception(f"Task {task_id} was canceled")
-        else:
-            raise Exception(f"Unknown task status: {status}")
+            elif status == 'CANCELED':
+                raise Exception(f"Task {task_id} was canceled")
+            else:
+                raise Exception(f"Unknown task status: {status}")
 
     # Download the generated video
     output_url = output_urls[0]
@@ -233,6 +237,8 @@ def generate_image(positive_prompt, negative_prompt):
     return None
 
 def generate_svg_image(positive_prompt, svg, negative_prompt=None, seed=0, output_format="png", svg_output_path="./temp_svg.png", kwargs={}):
+    import cairosvg
+
     # Render SVG to PNG
     png_data = cairosvg.svg2png(bytestring=svg.encode('utf-8'), output_width=512, output_height=512)
     
@@ -278,6 +284,8 @@ def generate_svg_image(positive_prompt, svg, negative_prompt=None, seed=0, outpu
         raise Exception(f"API request failed: {str(e)}")
 
 if __name__ == "__main__":
+    from PIL import Image
+
     # Test the generate_svg_image function
     test_svg = '''
     <svg width="100" height="100">
@@ -0,0 +1,173 @@
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from utils.context_utils import estimate_tokens, truncate_to_tokens
+
+# Narratives arrive as fenced HTML; the memory only needs the words
+_MARKUP = re.compile(r"```\w*|<[^>]+>")
+
+
+def _turn_lines(memory, events, messages):
+    lines = memory.splitlines() if memory else []
+    lines += [f"Event: {event}" for event in events]
+    for message in messages:
+        speaker = "Player" if message["role"] == "user" else "Narrator"
+        text = " ".join(_MARKUP.sub(" ", message["content"]).split())
+        if text:
+            lines.append(f"{speaker}: {text}")
+    return lines
+
+
+def local_summarizer(memory, events, messages, max_tokens):
+    """Summary without an LLM call: the newest lines (previous memory, events, turns) that fit."""
+    kept = []
+    used = 0
+    for line in reversed(_turn_lines(memory, events, messages)):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(truncate_to_tokens(line, max_tokens))
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(reversed(kept))
+
+
+class LLMSummarizer:
+    """Summarizes with one world_memory tool call on ``client_factory()``'s client.
+
+    Falls back to ``local_summarizer`` when the call fails or returns no summary, so a
+    fold never loses the events it drops.
+    """
+
+    def __init__(self, client_factory, usage_callback=None):
+        self.client_factory = client_factory
+        self.usage_callback = usage_callback
+
+    def __call__(self, memory, events, messages, max_tokens):
+        from utils.llm_utils import create_message_stream
+
+        content = (
+            f"Current memory: {memory or 'None'}\n"
+            f"Older events: {json.dumps(events)}\n"
+            "Older turns:\n" + "\n".join(_turn_lines("", [], messages))
+        )
+        stream = create_message_stream(
+            self.client_factory(),
+            chat_history=[{"role": "user", "content": content}],
+            system_prompt=config.WORLD_MEMORY_SYSTEM_PROMPT.format(max_words=max_tokens * 3 // 4),
+            tools=config.WORLD_MEMORY_TOOLS,
+            tools_choice=config.WORLD_MEMORY_TOOL_CHOICE,
+            max_tokens=max_tokens * 2,
+            usage_callback=self.usage_callback,
+        )
+        summary = None
+        for chunk in stream:
+            if isinstance(chunk, dict):
+                summary = chunk.get("summary")
+        if not summary:
+            logging.info("World memory: no summary from the LLM, keeping the newest lines instead")
+            return local_summarizer(memory, events, messages, max_tokens)
+        return summary
+
+
+class WorldMemory:
+    """Folds old events and chat turns into the world state's bounded memory summary.
+
+    ``maybe_fold`` runs after each turn and returns at once. When ``fold_every`` events
+    have piled up past the newest ``event_window``, or the chat history is full, a
+    background thread hands everything older than the windows, with the previous memory,
+    to ``summarizer(memory, events, messages, max_tokens)``. The result, cut to
+    ``max_tokens``, replaces those events (a log record, saved with the rest of the
+    state) and the turns are dropped from the history. A fold computed while the game was
+    reset or a slot loaded is discarded. At most one fold runs at a time.
+    """
+
+    def __init__(self, summarizer=local_summarizer, event_window=config.WORLD_MEMORY_EVENT_WINDOW,
+                 history_window=config.WORLD_MEMORY_HISTORY_WINDOW, fold_every=config.WORLD_MEMORY_FOLD_EVERY,
+                 max_tokens=config.WORLD_MEMORY_MAX_TOKENS, on_fold=None):
+        self.summarizer = summarizer
+        self.event_window = event_window
+        self.history_window = history_window
+        self.fold_every = fold_every
+        self.max_tokens = max_tokens
+        self.on_fold = on_fold
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="world-memory")
+        self._running = None
+        self._lock = threading.Lock()
+        self._stats = {"folds": 0, "discarded": 0, "errors": 0, "events_folded": 0,
+                       "messages_folded": 0, "last_fold_ms": 0.0}
+
+    def due(self, world_state, chat_history):
+        history_full = len(chat_history) >= max(chat_history.max_history or 0, self.history_window + 2)
+        return len(world_state.events) >= self.event_window + self.fold_every or history_full
+
+    def maybe_fold(self, world_state, chat_history):
+        """Start a background fold if one is due and none is running. Returns its future, or None."""
+        with self._lock:
+            if self._running is not None and not self._running.done():
+                return None
+            if not self.due(world_state, chat_history):
+                return None
+            self._running = self._executor.submit(self._fold_logged, world_state, chat_history)
+            return self._running
+
+    def _fold_logged(self, world_state, chat_history):
+        try:
+            return self.fold(world_state, chat_history)
+        except Exception as e:
+            logging.warning(f"World memory fold failed: {e}")
+            with self._lock:
+                self._stats["errors"] += 1
+            return False
+
+    def fold(self, world_state, chat_history):
+        """Fold everything older than the windows now. Returns True if the state changed."""
+        started = time.perf_counter()
+        epoch = world_state.epoch  # read first: a restore after this discards the fold
+        _, events, memory = world_state.snapshot()
+        old_events = events[:max(len(events) - self.event_window, 0)]
+        messages = chat_history.messages()
+        old_messages = messages[:max(len(messages) - self.history_window, 0)]
+        if len(old_messages) % 2:
+            old_messages = old_messages[:-1]  # whole user/assistant turns only
+        if not old_events and not old_messages:
+            return False
+
+        summary = self.summarizer(memory["summary"], old_events, old_messages, self.max_tokens)
+        summary = truncate_to_tokens(summary or "", self.max_tokens)
+        if not world_state.fold(len(old_events), summary, epoch):
+            with self._lock:
+                self._stats["discarded"] += 1
+            return False
+        chat_history.drop(old_messages)
+
+        with self._lock:
+            self._stats["folds"] += 1
+            self._stats["events_folded"] += len(old_events)
+            self._stats["messages_folded"] += len(old_messages)
+            self._stats["last_fold_ms"] = (time.perf_counter() - started) * 1000
+        logging.info(f"World memory: folded {len(old_events)} events and {len(old_messages)} messages "
+                     f"into ~{estimate_tokens(summary)} tokens")
+        if self.on_fold:
+            self.on_fold()
+        return True
+
+    def wait(self, timeout=None):
+        """Wait for a running fold."""
+        running = self._running
+        if running is not None:
+            running.result(timeout)
+
+    def close(self, timeout=None):
+        self.wait(timeout)
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, running=self._running is not None and not self._running.done())